@@ -0,0 +1,203 @@
+"""
+Shared helpers of the benchmarks of the Extemporaneous Grading XBlock.
+
+The benchmarks run offline: the block is created on the XBlock `ToyRuntime`,
+the ledger and the exports are written to a temporary directory and the
+children are stand-ins that render a fixed fragment.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import django
+
+ROOT = Path(__file__).resolve().parent.parent
+COURSE_ID = "course-v1:benchmark+benchmark+benchmark"
+PHASES = ("children", "due_datetime", "late_due_datetime")
+
+
+def setup_django(**xblock_settings) -> None:
+    """
+    Set up Django with the settings of the workbench and storages in a temporary directory.
+
+    The directory is deleted when the process exits.
+
+    Args:
+        **xblock_settings: Extra XBlock settings.
+    """
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "workbench.settings")
+    django.setup()
+
+    # pylint: disable=import-outside-toplevel
+    from django.conf import settings
+
+    location = tempfile.mkdtemp(prefix="extemporaneous_grading_benchmark_")
+    atexit.register(shutil.rmtree, location, ignore_errors=True)
+    storage = {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": location}}
+    settings.XBLOCK_SETTINGS = {
+        "extemporaneous_grading": {
+            "LEDGER_STORAGE": storage,
+            "EXPORT_STORAGE": storage,
+            **xblock_settings,
+        }
+    }
+
+
+def make_user(index: int, is_course_team: bool = False) -> SimpleNamespace:
+    """
+    Make a stand-in of a user of the XBlock user service.
+
+    Args:
+        index (int): The number of the user.
+        is_course_team (bool, optional): Whether the user is an instructor.
+
+    Returns:
+        SimpleNamespace: The user.
+    """
+    # pylint: disable=import-outside-toplevel
+    from extemporaneous_grading.constants import ATTR_ANONYMOUS_USER_ID, ATTR_KEY_USER_ROLE, ATTR_USER_USERNAME
+
+    return SimpleNamespace(
+        opt_attrs={
+            ATTR_ANONYMOUS_USER_ID: f"anonymous_{index}",
+            ATTR_USER_USERNAME: f"learner_{index}",
+            ATTR_KEY_USER_ROLE: "instructor" if is_course_team else "student",
+        },
+        emails=[f"learner_{index}@example.com"],
+    )
+
+
+def make_record(index: int) -> dict:
+    """
+    Make a late submission record.
+
+    Args:
+        index (int): The number of the learner.
+
+    Returns:
+        dict: The late submission record.
+    """
+    accepted_at = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=index)
+    return {
+        "anonymous_user_id": f"anonymous_{index}",
+        "username": f"learner_{index}",
+        "email": f"learner_{index}@example.com",
+        "datetime": accepted_at.isoformat(),
+    }
+
+
+def make_block(
+    phase: str = "children",
+    children: int = 0,
+    user: SimpleNamespace | None = None,
+    runtime=None,
+    usage_id: str = "usage",
+    user_id: str = "user",
+):
+    """
+    Make an Extemporaneous Grading block on the `ToyRuntime` in the given deadline phase.
+
+    Args:
+        phase (str, optional): The deadline phase, one of `PHASES`.
+        children (int, optional): The number of children of the block.
+        user (SimpleNamespace, optional): The current user. Defaults to a learner.
+        runtime (ToyRuntime, optional): The runtime of the block.
+        usage_id (str, optional): The usage ID of the block.
+        user_id (str, optional): The ID of the user in the runtime, which scopes the user state fields.
+
+    Returns:
+        XBlockExtemporaneousGrading: The block.
+    """
+    # pylint: disable=import-outside-toplevel
+    from web_fragments.fragment import Fragment
+    from xblock.fields import ScopeIds
+    from xblock.test.toy_runtime import ToyRuntime
+
+    from extemporaneous_grading import XBlockExtemporaneousGrading
+
+    runtime = runtime or ToyRuntime()
+    runtime.get_block = lambda child_id: SimpleNamespace(
+        scope_ids=ScopeIds(user_id, "html", child_id, child_id),
+        render=lambda view, context: Fragment(f"<p>Content of {child_id}</p>"),
+    )
+    block = XBlockExtemporaneousGrading(
+        runtime=runtime,
+        field_data={},
+        scope_ids=ScopeIds(user_id, "extemporaneous_grading", "definition", usage_id),
+    )
+    block.course_id = COURSE_ID
+    block.children = [f"child_{index}" for index in range(children)]
+    now = datetime.now(timezone.utc)
+    offsets = {"children": (1, 2), "due_datetime": (-1, 1), "late_due_datetime": (-2, -1)}[phase]
+    block.due_date = now + timedelta(days=offsets[0])
+    block.late_due_date = now + timedelta(days=offsets[1])
+    block.due_time = block.late_due_time = "00:00"
+    current_user = user or make_user(0)
+    block.get_current_user = lambda: current_user
+    return block
+
+
+def make_json_request(data: dict | None = None):
+    """
+    Make a request to a JSON handler.
+
+    Args:
+        data (dict, optional): The body of the request.
+
+    Returns:
+        Request: The request.
+    """
+    from webob import Request  # pylint: disable=import-outside-toplevel
+
+    return Request.blank("/", method="POST", body=json.dumps(data or {}).encode("utf8"))
+
+
+def summarize(durations: list[float]) -> dict[str, float]:
+    """
+    Summarize a list of durations in seconds.
+
+    Args:
+        durations (list[float]): The durations.
+
+    Returns:
+        dict[str, float]: The number of samples and the mean, p50, p95 and p99 in milliseconds.
+    """
+    ordered = sorted(durations)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+    return {
+        "samples": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentile(0.50) * 1000, 3),
+        "p95_ms": round(percentile(0.95) * 1000, 3),
+        "p99_ms": round(percentile(0.99) * 1000, 3),
+    }
+
+
+def get_environment() -> dict:
+    """
+    Get the environment of a benchmark run, to be stored with its results.
+    """
+    # pylint: disable=import-outside-toplevel
+    from extemporaneous_grading import __version__
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "datetime": datetime.now(timezone.utc).isoformat(),
+    }
@@ -0,0 +1,356 @@
+"""
+Load simulation of the surge of learners right after the due datetime.
+
+Many simulated learners reach the block at once in the due phase. Each of them
+loads the student view, accepts the late submission through the
+`set_late_submission` handler and loads the unlocked view through the
+`children_fragment` handler, as the student view script does after the
+acceptance. A share of the learners accept twice concurrently, like a double
+click or a second tab.
+
+Every request creates its own block instance on a shared `ToyRuntime` and the
+handlers are called through `runtime.handle`, so the fields are saved at the end
+of each request as in the LMS. The requests run in a pool of threads, like the
+threads of a WSGI worker.
+
+The field data of the runtime is stored in a `DatabaseKeyValueStore`, which
+copies the values it reads and writes and waits `--kvs-latency` milliseconds on
+each call, like the database of the LMS. The `ToyRuntime` store returns the
+stored objects themselves, so every request would mutate the same list and the
+lost updates of the `field` ledger would never show up.
+
+The report has the p50/p95/p99 latency of each operation, the throughput of
+the run, and the integrity of the ledger: the accepted learners missing from it
+(lost writes) and the learners recorded more than once (duplicated writes).
+
+Usage:
+    python benchmarks/deadline_surge.py [--learners N] [--concurrency N] [--ledger {storage,field}]
+        [--double-accept-rate RATE] [--children N] [--kvs-latency MS] [--output OUTPUT]
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from common import get_environment, make_block, make_json_request, make_user, setup_django, summarize
+
+DEFAULT_LEARNERS = 500
+DEFAULT_CONCURRENCY = 32
+DEFAULT_LEDGER = "storage"
+DEFAULT_DOUBLE_ACCEPT_RATE = 0.1
+DEFAULT_CHILDREN = 5
+DEFAULT_KVS_LATENCY_MS = 1.0
+USAGE_ID = "deadline_surge"
+
+
+class Recorder:
+    """
+    Thread-safe recorder of the latency and errors of the simulated requests.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = defaultdict(list)
+        self.errors = Counter()
+
+    def measure(self, operation: str, function: Callable[[], object]) -> object | None:
+        """
+        Call a function as a request of the given operation and record its duration.
+
+        Args:
+            operation (str): The name of the operation.
+            function (Callable[[], object]): The request.
+
+        Returns:
+            object | None: The result of the request, or None if it raised an exception.
+        """
+        start = time.perf_counter()
+        try:
+            result = function()
+        except Exception:  # pylint: disable=broad-exception-caught
+            result = None
+            with self.lock:
+                self.errors[operation] += 1
+        duration = time.perf_counter() - start
+        with self.lock:
+            self.durations[operation].append(duration)
+        return result
+
+    @property
+    def requests(self) -> int:
+        """
+        Get the number of requests recorded.
+        """
+        return sum(len(durations) for durations in self.durations.values())
+
+
+class DatabaseKeyValueStore:
+    """
+    Key value store that copies the values and waits on each call, like a database.
+
+    Args:
+        kvs (KeyValueStore): The store of the values.
+        latency (float): The seconds to wait on each call.
+    """
+
+    def __init__(self, kvs, latency: float):
+        self.kvs = kvs
+        self.latency = latency
+
+    def get(self, key):
+        """
+        Get a copy of the value of a key.
+        """
+        time.sleep(self.latency)
+        return copy.deepcopy(self.kvs.get(key))
+
+    def set(self, key, value):
+        """
+        Set a copy of the value of a key.
+        """
+        time.sleep(self.latency)
+        self.kvs.set(key, copy.deepcopy(value))
+
+    def set_many(self, update_dict):
+        """
+        Set copies of the values of several keys in a single call.
+        """
+        time.sleep(self.latency)
+        for key, value in update_dict.items():
+            self.kvs.set(key, copy.deepcopy(value))
+
+    def delete(self, key):
+        """
+        Delete the value of a key.
+        """
+        time.sleep(self.latency)
+        self.kvs.delete(key)
+
+    def has(self, key):
+        """
+        Check whether a key has a value.
+        """
+        time.sleep(self.latency)
+        return self.kvs.has(key)
+
+    def default(self, key):  # pylint: disable=unused-argument
+        """
+        Get the default value of a key, which is left to the field.
+        """
+        raise KeyError(repr(key))
+
+
+class Surge:
+    """
+    A surge of simulated learners against a block in the due phase.
+
+    Args:
+        children (int): The number of children of the block.
+        kvs_latency (float): The seconds to wait on each call to the field data.
+    """
+
+    def __init__(self, children: int, kvs_latency: float):
+        # pylint: disable=import-outside-toplevel
+        from xblock.runtime import KvsFieldData
+        from xblock.test.toy_runtime import ToyRuntime, ToyRuntimeKeyValueStore
+
+        self.children = children
+        self.runtime = ToyRuntime()
+        self.runtime._services["field-data"] = KvsFieldData(  # pylint: disable=protected-access
+            DatabaseKeyValueStore(ToyRuntimeKeyValueStore({}), kvs_latency)
+        )
+        self.recorder = Recorder()
+        self.accepted = set()
+        self.accepted_lock = threading.Lock()
+
+    def make_block(self, index: int):
+        """
+        Make the block instance of a request of the given learner.
+        """
+        return make_block(
+            "due_datetime",
+            children=self.children,
+            user=make_user(index),
+            runtime=self.runtime,
+            usage_id=USAGE_ID,
+            user_id=f"learner_{index}",
+        )
+
+    def handle(self, index: int, handler: str):
+        """
+        Call a handler of the block in a request of the given learner.
+        """
+        block = self.make_block(index)
+        return self.runtime.handle(block, handler, make_json_request())
+
+    def accept(self, index: int) -> None:
+        """
+        Accept the late submission of the given learner and keep track of the success.
+        """
+        response = self.recorder.measure("set_late_submission", lambda: self.handle(index, "set_late_submission"))
+        if response is not None and response.status_code == 200 and response.json.get("success"):
+            with self.accepted_lock:
+                self.accepted.add(f"anonymous_{index}")
+
+    def learner(self, index: int, double_accept: bool, pool: ThreadPoolExecutor) -> None:
+        """
+        Run the requests of a learner: the view, the acceptance and the unlocked view.
+
+        Args:
+            index (int): The number of the learner.
+            double_accept (bool): Whether the learner accepts twice concurrently.
+            pool (ThreadPoolExecutor): The pool where the second acceptance runs.
+        """
+        self.recorder.measure("student_view", lambda: self.make_block(index).student_view({}))
+        second_accept = pool.submit(self.accept, index) if double_accept else None
+        self.accept(index)
+        if second_accept is not None:
+            second_accept.result()
+        self.recorder.measure("children_fragment", lambda: self.handle(index, "children_fragment"))
+
+    def run(self, learners: int, concurrency: int, double_accept_rate: float) -> float:
+        """
+        Run the surge and get its wall time.
+
+        The second acceptances run in their own pool, so they never wait for
+        a learner to finish.
+
+        Args:
+            learners (int): The number of learners.
+            concurrency (int): The number of learners served at once.
+            double_accept_rate (float): The share of learners that accept twice.
+
+        Returns:
+            float: The wall time of the surge in seconds.
+        """
+        double_accepts = [random.random() < double_accept_rate for _ in range(learners)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool, ThreadPoolExecutor(
+            max_workers=concurrency
+        ) as second_pool:
+            futures = [
+                pool.submit(self.learner, index, double_accepts[index], second_pool) for index in range(learners)
+            ]
+            for future in futures:
+                future.result()
+        return time.perf_counter() - start
+
+    def check_ledger(self) -> dict:
+        """
+        Compare the ledger of the block with the learners whose acceptance succeeded.
+
+        Returns:
+            dict: The number of accepted learners and recorded learners, and the
+                anonymous user IDs lost or recorded more than once.
+        """
+        # pylint: disable=import-outside-toplevel
+        from extemporaneous_grading.ledger import StorageLedger, get_ledger
+
+        block = self.make_block(0)
+        ledger = get_ledger(block)
+        records = Counter(record["anonymous_user_id"] for record in ledger)
+        if isinstance(ledger, StorageLedger):
+            # The records have one file per learner, so the duplicated writes show up in the index.
+            records |= Counter(key.rsplit("/", 1)[1].split("_", 1)[1] for key in ledger.iter_index_keys())
+        lost = sorted(self.accepted - set(records))
+        duplicated = sorted(anonymous_user_id for anonymous_user_id, count in records.items() if count > 1)
+        return {
+            "accepted": len(self.accepted),
+            "recorded": len(records),
+            "lost_writes": len(lost),
+            "duplicated_writes": len(duplicated),
+            "lost": lost,
+            "duplicated": duplicated,
+        }
+
+
+def run(  # pylint: disable=too-many-arguments
+    learners: int,
+    concurrency: int,
+    ledger: str,
+    double_accept_rate: float,
+    children: int,
+    kvs_latency_ms: float = DEFAULT_KVS_LATENCY_MS,
+) -> dict:
+    """
+    Simulate a surge of learners after the due datetime.
+
+    Args:
+        learners (int): The number of learners.
+        concurrency (int): The number of learners served at once.
+        ledger (str): The ledger backend.
+        double_accept_rate (float): The share of learners that accept twice.
+        children (int): The number of children of the block.
+        kvs_latency_ms (float, optional): The milliseconds to wait on each call to the field data.
+
+    Returns:
+        dict: The latency of each operation, the throughput and the integrity of the ledger.
+    """
+    setup_django(LEDGER_BACKEND=ledger)
+    surge = Surge(children, kvs_latency_ms / 1000)
+    wall_time = surge.run(learners, concurrency, double_accept_rate)
+    return {
+        "environment": get_environment(),
+        "parameters": {
+            "learners": learners,
+            "concurrency": concurrency,
+            "ledger": ledger,
+            "double_accept_rate": double_accept_rate,
+            "children": children,
+            "kvs_latency_ms": kvs_latency_ms,
+        },
+        "latency": {operation: summarize(durations) for operation, durations in surge.recorder.durations.items()},
+        "errors": dict(surge.recorder.errors),
+        "throughput": {
+            "requests": surge.recorder.requests,
+            "wall_time_s": round(wall_time, 3),
+            "requests_per_second": round(surge.recorder.requests / wall_time, 1),
+            "learners_per_second": round(learners / wall_time, 1),
+        },
+        "ledger": surge.check_ledger(),
+    }
+
+
+def main() -> None:
+    """
+    Run the simulation and print the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learners", type=int, default=DEFAULT_LEARNERS, help="number of simulated learners")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="learners served at once")
+    parser.add_argument("--ledger", choices=("storage", "field"), default=DEFAULT_LEDGER, help="ledger backend")
+    parser.add_argument(
+        "--double-accept-rate",
+        type=float,
+        default=DEFAULT_DOUBLE_ACCEPT_RATE,
+        help="share of learners that accept the late submission twice concurrently",
+    )
+    parser.add_argument("--children", type=int, default=DEFAULT_CHILDREN, help="children of the block")
+    parser.add_argument(
+        "--kvs-latency",
+        type=float,
+        default=DEFAULT_KVS_LATENCY_MS,
+        help="milliseconds to wait on each call to the field data",
+    )
+    parser.add_argument("--output", help="path of the JSON results")
+    args = parser.parse_args()
+
+    results = run(
+        args.learners, args.concurrency, args.ledger, args.double_accept_rate, args.children, args.kvs_latency
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as output:
+            json.dump(results, output, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
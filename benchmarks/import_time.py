@@ -0,0 +1,93 @@
+"""
+Benchmark of the import time of the Extemporaneous Grading XBlock.
+
+Each run imports the XBlock in a fresh interpreter with `python -X importtime`
+and reads the cumulative time of the modules from its report, so the result is
+the cold start cost paid by every LMS/CMS worker. The import of `pkg_resources`
+is measured the same way as a reference.
+
+Usage:
+    python benchmarks/import_time.py [--runs RUNS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+DEFAULT_RUNS = 10
+MODULES = ("extemporaneous_grading", "pkg_resources")
+
+
+def measure_import(module: str) -> dict[str, int]:
+    """
+    Import a module in a fresh interpreter and report the cumulative import time of each module.
+
+    Args:
+        module (str): The module to import.
+
+    Returns:
+        dict[str, int]: The cumulative import time of each imported module in microseconds.
+    """
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "workbench.settings")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        text=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def run(runs: int) -> dict[str, dict]:
+    """
+    Measure the import time of the `MODULES` in `runs` fresh interpreters.
+
+    Args:
+        runs (int): The number of interpreters started for each module.
+
+    Returns:
+        dict[str, dict]: The median and minimum import time of each module in
+            milliseconds, and whether the import of the XBlock loads `pkg_resources`.
+    """
+    results = {}
+    for module in MODULES:
+        samples = [measure_import(module) for _ in range(runs)]
+        durations = [timings[module] / 1000 for timings in samples]
+        results[module] = {
+            "median_ms": round(statistics.median(durations), 2),
+            "min_ms": round(min(durations), 2),
+            "imports_pkg_resources": any("pkg_resources" in timings for timings in samples),
+        }
+    return results
+
+
+def main() -> None:
+    """
+    Run the benchmark and print the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="number of interpreters started per module")
+    args = parser.parse_args()
+
+    for module, result in run(args.runs).items():
+        print(
+            f"{module:<25} median {result['median_ms']:>8.2f} ms  min {result['min_ms']:>8.2f} ms  "
+            f"pkg_resources imported: {result['imports_pkg_resources']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
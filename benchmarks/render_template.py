@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the rendering of the templates of the Extemporaneous Grading XBlock.
+
+Each template of the student view is rendered with `ResourceLoader`, which
+loads and compiles the template on every call, and with the compiled templates
+cached by `extemporaneous_grading.resources`. The results are the mean time per
+render in microseconds.
+
+Usage:
+    python benchmarks/render_template.py [--renders RENDERS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+import django
+
+DEFAULT_RENDERS = 500
+TEMPLATES = (
+    "static/html/children.html",
+    "static/html/due_datetime.html",
+    "static/html/late_due_datetime.html",
+)
+
+
+def get_context() -> dict:
+    """
+    Get a render context similar to the one of the student view.
+    """
+    block = SimpleNamespace(
+        due_datetime="2024-01-01 00:00:00+00:00",
+        late_due_datetime="2024-01-02 00:00:00+00:00",
+        due_date_explanation_text="The due date has passed.",
+        late_due_date_explanation_text="The late due date has passed.",
+        is_course_team=True,
+    )
+    return {
+        "block": block,
+        "due_datetime_has_passed": False,
+        "due_datetime": "2024-01-01T00:00:00+00:00",
+        "late_due_datetime": "2024-01-02T00:00:00+00:00",
+        "next_transition": "2024-01-01T00:00:00+00:00",
+        "deadline_events": False,
+        "children_contents": ["<p>Child content</p>"] * 3,
+    }
+
+
+def run(renders: int) -> dict[str, dict[str, float]]:
+    """
+    Measure the mean render time of each template with and without the compiled templates cache.
+
+    Args:
+        renders (int): The number of renders of each template.
+
+    Returns:
+        dict[str, dict[str, float]]: The mean time per render of each template in microseconds.
+    """
+    # pylint: disable=import-outside-toplevel
+    from xblock.utils.resources import ResourceLoader
+
+    from extemporaneous_grading.resources import render_template
+
+    loader = ResourceLoader("extemporaneous_grading.extemporaneous_grading")
+    results = {}
+    for template in TEMPLATES:
+        render_template(template, get_context())
+        uncached = timeit.timeit(lambda: loader.render_django_template(template, get_context()), number=renders)
+        cached = timeit.timeit(lambda: render_template(template, get_context()), number=renders)
+        results[template] = {
+            "resource_loader_us": round(uncached / renders * 1e6, 2),
+            "compiled_us": round(cached / renders * 1e6, 2),
+        }
+    return results
+
+
+def main() -> None:
+    """
+    Run the benchmark and print the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=DEFAULT_RENDERS, help="number of renders per template")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "workbench.settings")
+    django.setup()
+
+    for template, result in run(args.renders).items():
+        print(
+            f"{template:<36} ResourceLoader {result['resource_loader_us']:>9.2f} us  "
+            f"compiled {result['compiled_us']:>9.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Benchmark suite of the Extemporaneous Grading XBlock.
+
+The suite runs offline on the XBlock `ToyRuntime` and measures:
+
+- the `student_view` of each deadline phase, with many children;
+- the latency of `set_late_submission` as the ledger grows, for each ledger backend;
+- the throughput of the exports in rows per second, with their peak memory,
+  and the latency of the `download_csv` handler;
+- the cold import time of the XBlock.
+
+The results are written as JSON, so the runs of different releases can be
+compared.
+
+Usage:
+    python benchmarks/suite.py [--output OUTPUT] [--iterations N] [--children N] [--ledger-sizes N,N,...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable
+
+from common import (
+    PHASES,
+    get_environment,
+    make_block,
+    make_json_request,
+    make_record,
+    make_user,
+    setup_django,
+    summarize,
+)
+from import_time import measure_import
+
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_ITERATIONS = 200
+DEFAULT_CHILDREN = 20
+DEFAULT_LEDGER_SIZES = (0, 1000, 10000)
+LEDGER_BACKENDS = ("storage", "field")
+IMPORT_RUNS = 3
+
+
+def measure(function: Callable[[int], object], iterations: int) -> dict[str, float]:
+    """
+    Measure the duration of each call of a function.
+
+    Args:
+        function (Callable[[int], object]): The function, called with the number of the iteration.
+        iterations (int): The number of calls.
+
+    Returns:
+        dict[str, float]: The summary of the durations.
+    """
+    durations = []
+    for iteration in range(iterations):
+        start = time.perf_counter()
+        function(iteration)
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def fill_ledger(block, size: int) -> None:
+    """
+    Record `size` late submissions in the ledger of the block.
+    """
+    # pylint: disable=import-outside-toplevel
+    from extemporaneous_grading.ledger import FieldLedger, get_ledger
+
+    ledger = get_ledger(block)
+    if isinstance(ledger, FieldLedger):
+        block.late_submissions = [make_record(index) for index in range(size)]
+    else:
+        ledger.add_many(make_record(index) for index in range(size))
+
+
+def benchmark_student_view(iterations: int, children: int) -> dict:
+    """
+    Measure the `student_view` of each deadline phase.
+    """
+    results = {}
+    for phase in PHASES:
+        block = make_block(phase, children=children)
+        results[phase] = measure(lambda _: block.student_view({}), iterations)
+    return results
+
+
+def benchmark_set_late_submission(iterations: int, ledger_sizes: list[int]) -> dict:
+    """
+    Measure the `set_late_submission` handler as the ledger grows, for each ledger backend.
+    """
+    # pylint: disable=import-outside-toplevel
+    from django.conf import settings
+
+    xblock_settings = settings.XBLOCK_SETTINGS["extemporaneous_grading"]
+    results = {}
+    for backend in LEDGER_BACKENDS:
+        xblock_settings["LEDGER_BACKEND"] = backend
+        results[backend] = {}
+        for size in ledger_sizes:
+            block = make_block("due_datetime", usage_id=f"set_late_submission_{backend}_{size}")
+            fill_ledger(block, size)
+            users = [make_user(size + index) for index in range(iterations)]
+
+            def set_late_submission(iteration: int, block=block, users=users) -> None:
+                block.get_current_user = lambda: users[iteration]
+                block.set_late_submission(make_json_request())
+
+            results[backend][str(size)] = measure(set_late_submission, iterations)
+    xblock_settings.pop("LEDGER_BACKEND")
+    return results
+
+
+def benchmark_exports(rows: int) -> dict:
+    """
+    Measure the throughput and peak memory of each export format, and the `download_csv` handler.
+    """
+    # pylint: disable=import-outside-toplevel
+    from extemporaneous_grading.exports import EXPORT_FORMATS, get_export_format
+    from extemporaneous_grading.ledger import StorageLedger
+
+    block = make_block("children", user=make_user(0, is_course_team=True), usage_id="exports")
+    fill_ledger(block, rows)
+    records = list(StorageLedger(block.course_id, block.scope_ids.usage_id))
+
+    results = {}
+    for name in EXPORT_FORMATS:
+        try:
+            writer = get_export_format(name).writer
+        except ValueError:
+            continue
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in writer(iter(records)))
+        duration = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            "rows": rows,
+            "rows_per_second": round(rows / duration),
+            "bytes": size,
+            "peak_memory_kib": round(peak / 1024, 1),
+        }
+
+    start = time.perf_counter()
+    block.download_csv(make_json_request())
+    results["download_csv"] = {"rows": rows, "first_call_ms": round((time.perf_counter() - start) * 1000, 3)}
+    results["download_csv"]["cached_call"] = measure(lambda _: block.download_csv(make_json_request()), 10)
+    return results
+
+
+def benchmark_import_time() -> dict:
+    """
+    Measure the cold import time of the XBlock.
+    """
+    durations = [measure_import("extemporaneous_grading")["extemporaneous_grading"] / 1e6 for _ in range(IMPORT_RUNS)]
+    return summarize(durations)
+
+
+def main() -> None:
+    """
+    Run the benchmark suite and write the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="path of the JSON results")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="calls per measurement")
+    parser.add_argument("--children", type=int, default=DEFAULT_CHILDREN, help="children of the block")
+    parser.add_argument(
+        "--ledger-sizes",
+        default=",".join(str(size) for size in DEFAULT_LEDGER_SIZES),
+        help="comma-separated sizes of the ledger",
+    )
+    args = parser.parse_args()
+    ledger_sizes = [int(size) for size in args.ledger_sizes.split(",")]
+
+    setup_django()
+    results = {
+        "environment": get_environment(),
+        "parameters": {"iterations": args.iterations, "children": args.children, "ledger_sizes": ledger_sizes},
+        "student_view": benchmark_student_view(args.iterations, args.children),
+        "set_late_submission": benchmark_set_late_submission(args.iterations, ledger_sizes),
+        "exports": benchmark_exports(max(ledger_sizes)),
+        "import_time": benchmark_import_time(),
+    }
+
+    with open(args.output, "w", encoding="utf8") as output:
+        json.dump(results, output, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,7 @@ ATTR_KEY_USER_ROLE = "edx-platform.user_role"
 ATTR_ANONYMOUS_USER_ID = "edx-platform.anonymous_user_id"
 ATTR_USER_USERNAME = "edx-platform.username"
 TIME_PATTERN = r"^([01][0-9]|2[0-3]):[0-5][0-9]$"
+XBLOCK_SETTINGS_KEY = "extemporaneous_grading"
+DELTA_EXPORT_LIMIT = 1000
+MAX_DELTA_EXPORT_LIMIT = 10000
+MAX_BULK_LATE_SUBMISSIONS = 1000
@@ -0,0 +1,123 @@
+"""
+Deadline transitions of the Extemporaneous Grading XBlock.
+
+When a deadline passes, the content shown to the learner changes. Instead of
+polling, the client schedules a single timer to the next transition sent by the
+server, delayed by a random jitter of up to `DEADLINE_JITTER_SECONDS` seconds,
+so the clients of a unit do not refresh all at once. Optionally, the client can
+listen to a server-sent events stream that notifies the transition. The stream
+is produced by the backend configured with the `DEADLINE_EVENTS_BACKEND`
+XBlock setting.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import time
+from datetime import datetime
+from typing import Iterator
+
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from extemporaneous_grading.utils import get_xblock_settings
+
+DEADLINE_JITTER_SECONDS = 30
+DEADLINE_EVENTS_BACKENDS = {
+    "sleep": "extemporaneous_grading.deadlines.SleepDeadlineEvents",
+}
+DEFAULT_DEADLINE_EVENTS_BACKEND = "sleep"
+DEADLINE_EVENTS_TIMEOUT = 300
+DEADLINE_EVENTS_KEEPALIVE = 15
+
+
+def get_transition_jitter() -> float:
+    """
+    Get a random delay to spread the refresh of the clients after a transition.
+
+    Returns:
+        float: The delay in seconds, up to the `DEADLINE_JITTER_SECONDS` setting.
+    """
+    return random.uniform(0, get_xblock_settings().get("DEADLINE_JITTER_SECONDS", DEADLINE_JITTER_SECONDS))
+
+
+def format_event(event: str, data: dict) -> bytes:
+    """
+    Format a server-sent event.
+
+    Args:
+        event (str): The name of the event.
+        data (dict): The data of the event.
+
+    Returns:
+        bytes: The event in the `text/event-stream` format.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf8")
+
+
+class DeadlineEvents:
+    """
+    Base class for the server-sent events streams of the deadline transitions.
+
+    The stream sends a `transition` event when the content of the block must be
+    refreshed, that is, `jitter` seconds after the `transition`.
+    """
+
+    def __init__(self, transition: datetime, jitter: float):
+        self.transition = transition
+        self.jitter = jitter
+
+    def __iter__(self) -> Iterator[bytes]:
+        """
+        Iterate over the events of the stream.
+        """
+        raise NotImplementedError
+
+    def transition_event(self) -> bytes:
+        """
+        Get the event that notifies the transition.
+        """
+        return format_event("transition", {"transition": self.transition.isoformat()})
+
+
+class SleepDeadlineEvents(DeadlineEvents):
+    """
+    Stream that waits in the serving thread until the transition.
+
+    A comment is sent every `DEADLINE_EVENTS_KEEPALIVE` seconds to keep the
+    connection open. The stream is closed after `DEADLINE_EVENTS_TIMEOUT`
+    seconds, set with the XBlock setting of the same name, and the client
+    reconnects on its own. It is meant for servers where waiting does not hold a
+    worker, e.g. with gevent or ASGI workers.
+    """
+
+    def __iter__(self) -> Iterator[bytes]:
+        """
+        Wait for the transition, sending keep-alive comments in the meantime.
+        """
+        timeout = get_xblock_settings().get("DEADLINE_EVENTS_TIMEOUT", DEADLINE_EVENTS_TIMEOUT)
+        delay = (self.transition - timezone.now()).total_seconds() + self.jitter
+        end = time.monotonic() + min(delay, timeout)
+        yield b": connected\n\n"
+        while (remaining := end - time.monotonic()) > 0:
+            time.sleep(min(DEADLINE_EVENTS_KEEPALIVE, remaining))
+            if time.monotonic() < end:
+                yield b": keep-alive\n\n"
+        if delay <= timeout:
+            yield self.transition_event()
+
+
+def get_deadline_events(transition: datetime, jitter: float) -> DeadlineEvents:
+    """
+    Get the events stream of a transition according to the `DEADLINE_EVENTS_BACKEND` setting.
+
+    Args:
+        transition (datetime): The datetime of the transition.
+        jitter (float): The delay of the event after the transition, in seconds.
+
+    Returns:
+        DeadlineEvents: The events stream.
+    """
+    backend = get_xblock_settings().get("DEADLINE_EVENTS_BACKEND", DEFAULT_DEADLINE_EVENTS_BACKEND)
+    return import_string(DEADLINE_EVENTS_BACKENDS.get(backend, backend))(transition, jitter)
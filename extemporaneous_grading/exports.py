@@ -0,0 +1,378 @@
+"""
+Exports of the late submissions of the Extemporaneous Grading XBlock.
+
+The exports are generated in a single streaming pass over the records, in one
+of the `EXPORT_FORMATS`, following an explicit schema of typed columns.
+"""
+
+from __future__ import annotations
+
+import csv
+import importlib.util
+import io
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Callable, Iterable, Iterator, NamedTuple, Sequence, Tuple
+
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.utils.timezone import now
+
+from extemporaneous_grading.utils import get_xblock_settings
+
+log = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_RETENTION_SECONDS = 60 * 60
+
+STRING = "string"
+TIMESTAMP = "timestamp"
+Schema = Sequence[Tuple[str, str]]
+LATE_SUBMISSION_SCHEMA: Schema = (
+    ("anonymous_user_id", STRING),
+    ("username", STRING),
+    ("email", STRING),
+    ("datetime", TIMESTAMP),
+)
+
+
+class Echo:
+    """
+    File-like object that returns the written value instead of storing it.
+
+    It allows `csv.writer` to format rows without keeping them in memory.
+    """
+
+    def write(self, value: str) -> str:
+        """
+        Return the value to be written.
+        """
+        return value
+
+
+class IterableStream(io.RawIOBase):
+    """
+    Read-only stream over an iterator of bytes chunks.
+
+    It allows storages to consume a generated export chunk by chunk, without
+    writing it to a temporary file first.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        """
+        Return True, the stream can be read.
+        """
+        return True
+
+    def readinto(self, buffer) -> int:
+        """
+        Read the next bytes of the chunks into the given buffer.
+        """
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def as_file(chunks: Iterable[bytes], name: str) -> File:
+    """
+    Wrap an iterator of bytes chunks in a Django file.
+
+    Args:
+        chunks (Iterable[bytes]): The content of the file.
+        name (str): The name of the file.
+
+    Returns:
+        File: The file that can be saved in a storage.
+    """
+    return File(io.BufferedReader(IterableStream(chunks)), name=name)
+
+
+def iter_chunks(records: Iterable[dict], chunk_size: int) -> Iterator[list[dict]]:
+    """
+    Group the records in lists of `chunk_size` records.
+
+    Args:
+        records (Iterable[dict]): The late submission records.
+        chunk_size (int): The number of records in each chunk.
+
+    Yields:
+        list[dict]: The records, chunk by chunk.
+    """
+    iterator = iter(records)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def to_schema_value(value, field_type: str):
+    """
+    Convert a value of a record to the type of its field in the schema.
+
+    Args:
+        value: The value of the record.
+        field_type (str): The type of the field, `string` or `timestamp`.
+
+    Returns:
+        str | datetime | None: The typed value.
+    """
+    if value in (None, ""):
+        return None
+    if field_type == TIMESTAMP:
+        return datetime.fromisoformat(value).astimezone(timezone.utc)
+    return str(value)
+
+
+def iter_csv(
+    records: Iterable[dict],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    schema: Schema = LATE_SUBMISSION_SCHEMA,
+) -> Iterator[bytes]:
+    """
+    Iterate over the late submission records formatted as CSV.
+
+    The header is sent in the first chunk and the rows are grouped in chunks of
+    `chunk_size` rows, so only one chunk is kept in memory at a time.
+
+    Args:
+        records (Iterable[dict]): The late submission records.
+        chunk_size (int, optional): The number of rows in each chunk.
+        schema (Schema, optional): The columns of the CSV.
+
+    Yields:
+        bytes: The CSV content, chunk by chunk.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in schema]).encode("utf8")
+    for chunk in iter_chunks(records, chunk_size):
+        rows = (writer.writerow([record.get(name, "") for name, _ in schema]) for record in chunk)
+        yield "".join(rows).encode("utf8")
+
+
+def iter_ndjson(
+    records: Iterable[dict],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    schema: Schema = LATE_SUBMISSION_SCHEMA,
+) -> Iterator[bytes]:
+    """
+    Iterate over the late submission records formatted as newline-delimited JSON.
+
+    Each line is an object with the fields of the schema in order. Timestamps
+    are formatted as ISO 8601 datetimes in UTC.
+
+    Args:
+        records (Iterable[dict]): The late submission records.
+        chunk_size (int, optional): The number of lines in each chunk.
+        schema (Schema, optional): The fields of the objects.
+
+    Yields:
+        bytes: The NDJSON content, chunk by chunk.
+    """
+    for chunk in iter_chunks(records, chunk_size):
+        lines = []
+        for record in chunk:
+            row = {}
+            for name, field_type in schema:
+                value = to_schema_value(record.get(name), field_type)
+                row[name] = value.isoformat() if isinstance(value, datetime) else value
+            lines.append(json.dumps(row) + "\n")
+        yield "".join(lines).encode("utf8")
+
+
+class _DrainableSink(io.RawIOBase):
+    """
+    Writable stream that keeps the written bytes until they are drained.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        """
+        Return True, the stream can be written.
+        """
+        return True
+
+    def write(self, data) -> int:
+        """
+        Keep the written bytes.
+        """
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        """
+        Return the number of bytes written.
+        """
+        return self._position
+
+    def drain(self) -> bytes:
+        """
+        Return and forget the bytes written since the last call.
+        """
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet(
+    records: Iterable[dict],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    schema: Schema = LATE_SUBMISSION_SCHEMA,
+) -> Iterator[bytes]:
+    """
+    Iterate over the late submission records formatted as a Parquet file.
+
+    Each chunk of records is written as a row group, and the bytes of the file
+    are yielded as soon as each row group is written. Requires `pyarrow`, which
+    is only imported when the first chunk is requested since it is slow to
+    import.
+
+    Args:
+        records (Iterable[dict]): The late submission records.
+        chunk_size (int, optional): The number of rows in each row group.
+        schema (Schema, optional): The columns of the file.
+
+    Raises:
+        ImportError: If `pyarrow` is not installed.
+
+    Yields:
+        bytes: The Parquet content, row group by row group.
+    """
+    try:
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:  # pragma: no cover
+        raise ImportError("pyarrow is required to export in the Parquet format.") from exc
+
+    arrow_types = {STRING: pa.string(), TIMESTAMP: pa.timestamp("us", tz="UTC")}
+    arrow_schema = pa.schema([(name, arrow_types[field_type]) for name, field_type in schema])
+    sink = _DrainableSink()
+    with pq.ParquetWriter(sink, arrow_schema) as writer:
+        for chunk in iter_chunks(records, chunk_size):
+            columns = {
+                name: [to_schema_value(record.get(name), field_type) for record in chunk]
+                for name, field_type in schema
+            }
+            writer.write_table(pa.Table.from_pydict(columns, schema=arrow_schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+class ExportFormat(NamedTuple):
+    """
+    Format of the late submissions exports.
+    """
+
+    extension: str
+    content_type: str
+    writer: Callable[..., Iterator[bytes]]
+
+
+EXPORT_FORMATS = {
+    "csv": ExportFormat("csv", "text/csv", iter_csv),
+    "ndjson": ExportFormat("ndjson", "application/x-ndjson", iter_ndjson),
+    "parquet": ExportFormat("parquet", "application/vnd.apache.parquet", iter_parquet),
+}
+
+
+def is_parquet_available() -> bool:
+    """
+    Check if `pyarrow` is installed without importing it.
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def get_export_format(name: str | None) -> ExportFormat:
+    """
+    Get the export format with the given name.
+
+    Args:
+        name (str | None): The name of the format. Defaults to `csv`.
+
+    Raises:
+        ValueError: If the format does not exist or its dependencies are not installed.
+
+    Returns:
+        ExportFormat: The export format.
+    """
+    export_format = EXPORT_FORMATS.get(name or "csv")
+    if export_format is None:
+        raise ValueError(f"Unknown export format: {name}")
+    if export_format.writer is iter_parquet and not is_parquet_available():
+        raise ValueError("pyarrow is required to export in the Parquet format.")
+    return export_format
+
+
+def save_export(storage: Storage, path: str, chunks: Iterable[bytes]) -> str:
+    """
+    Save a content-addressed export in the storage unless it already exists.
+
+    The name of the export must identify its content, e.g. with the version of
+    the ledger, so an existing file is returned as is and the chunks are not
+    generated. When a new export is saved, the stale exports of the same format
+    in the same directory are deleted, as well as the file saved with an
+    alternative name if another request saved the same export at the same time.
+
+    Args:
+        storage (Storage): The storage of the exports.
+        path (str): The path of the export in the storage.
+        chunks (Iterable[bytes]): The content of the export.
+
+    Returns:
+        str: The path of the export in the storage.
+    """
+    if storage.exists(path):
+        return path
+
+    filename = path.rsplit("/", 1)[1]
+    saved_path = storage.save(path, as_file(chunks, filename))
+    if saved_path != path:
+        storage.delete(saved_path)
+
+    delete_stale_exports(storage, path)
+    return path
+
+
+def delete_stale_exports(storage: Storage, path: str) -> None:
+    """
+    Delete the older exports with the same extension as the given one.
+
+    Only the exports older than the `EXPORT_RETENTION_SECONDS` XBlock setting
+    are deleted, so the download URLs recently returned for other versions of
+    the ledger keep working. The exports of other formats are never deleted.
+
+    Args:
+        storage (Storage): The storage of the exports.
+        path (str): The path of the export that is kept.
+    """
+    directory, filename = path.rsplit("/", 1)
+    extension = filename.rsplit(".", 1)[-1]
+    retention = get_xblock_settings().get("EXPORT_RETENTION_SECONDS", EXPORT_RETENTION_SECONDS)
+    deadline = now() - timedelta(seconds=retention)
+    _, filenames = storage.listdir(directory)
+    for stale_filename in filenames:
+        if stale_filename == filename or not stale_filename.endswith(f".{extension}"):
+            continue
+        stale_path = f"{directory}/{stale_filename}"
+        try:
+            if storage.get_modified_time(stale_path) >= deadline:
+                continue
+        except (NotImplementedError, FileNotFoundError):
+            continue
+        log.info("Deleting the stale export %s.", stale_path)
+        storage.delete(stale_path)
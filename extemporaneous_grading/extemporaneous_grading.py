@@ -2,21 +2,24 @@
 
 from __future__ import annotations
 
-import csv
+import contextvars
+import hashlib
+import json
 import logging
 import re
-import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Optional
+from typing import ContextManager, Optional
 
-import pkg_resources
-from django.core.files.storage import default_storage
+from django.db import connections
 from django.utils import timezone, translation
 from web_fragments.fragment import Fragment
+from webob import Response
 from xblock.core import XBlock
 from xblock.exceptions import JsonHandlerError
-from xblock.fields import Boolean, DateTime, JSONField, List, Scope, String
-from xblock.utils.resources import ResourceLoader
+from xblock.fields import Boolean, DateTime, Integer, JSONField, List, Scope, String
 from xblock.utils.studio_editable import FutureFields, StudioContainerWithNestedXBlocksMixin, StudioEditableXBlockMixin
 from xblock.utils.studio_editable import loader as studio_loader
 from xblock.validation import Validation
@@ -25,12 +28,42 @@ from extemporaneous_grading.constants import (
     ATTR_ANONYMOUS_USER_ID,
     ATTR_KEY_USER_ROLE,
     ATTR_USER_USERNAME,
+    DELTA_EXPORT_LIMIT,
+    MAX_BULK_LATE_SUBMISSIONS,
+    MAX_DELTA_EXPORT_LIMIT,
     TIME_PATTERN,
 )
-from extemporaneous_grading.utils import _
+from extemporaneous_grading.deadlines import get_deadline_events, get_transition_jitter
+from extemporaneous_grading.exports import ExportFormat, get_export_format, iter_csv, save_export
+from extemporaneous_grading.fragment_cache import get_fragment_cache, get_fragment_cache_key, get_fragment_timeout
+from extemporaneous_grading.jobs import (
+    JOB_SUCCEEDED,
+    create_job,
+    get_job,
+    get_job_executor,
+    run_course_export_job,
+    run_export_job,
+    update_job,
+)
+from extemporaneous_grading.ledger import StorageLedger, get_ledger, iter_late_submissions, migrate_late_submissions
+from extemporaneous_grading.metrics import get_metrics_sink, iter_counted_rows
+from extemporaneous_grading.profiling import is_profile_requested, profile, should_profile
+from extemporaneous_grading.resources import (
+    STATIC_CSS,
+    STATIC_JS,
+    get_asset_uri,
+    get_resource,
+    get_translations_js,
+    open_asset,
+    render_template,
+)
+from extemporaneous_grading.tracing import start_span
+from extemporaneous_grading.utils import _, get_request_cached, get_storage, get_xblock_settings
 
 log = logging.getLogger(__name__)
-loader = ResourceLoader(__name__)
+
+CHILDREN_RENDER_WORKERS = 4
+CACHED_TEMPLATES = ("due_datetime", "late_due_datetime")
 
 
 @XBlock.needs("user", "i18n")
@@ -114,16 +147,41 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         default=False,
     )
 
+    late_submission_attempts = Integer(
+        display_name=_("Late Submission Attempts"),
+        help=_("Number of times the learner has accepted the late submission."),
+        scope=Scope.user_state,
+        default=0,
+    )
+
     late_submissions = List(
         display_name=_("Late Submissions"),
         help=_(
-            "List of all students who accepted the late submission. Contains "
-            "the anonymous_user_id, username, email, and datetime for each student."
+            "Legacy list of all students who accepted the late submission. Contains "
+            "the anonymous_user_id, username, email, and datetime for each student. "
+            "New submissions are recorded in the late submission ledger."
         ),
         scope=Scope.user_state_summary,
         default=[],
     )
 
+    late_submission_grants = String(
+        display_name=_("Late Submission Grants"),
+        help=_(
+            "Token that changes every time the course team records late submissions "
+            "on behalf of learners, so each learner checks the ledger once per change."
+        ),
+        scope=Scope.user_state_summary,
+        default="",
+    )
+
+    checked_late_submission_grants = String(
+        display_name=_("Checked Late Submission Grants"),
+        help=_("The token of the late submission grants when the ledger was last checked for the learner."),
+        scope=Scope.user_state,
+        default="",
+    )
+
     editable_fields = [
         "display_name",
         "due_date",
@@ -144,8 +202,47 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         Returns:
             str: The resource as a string.
         """
-        data = pkg_resources.resource_string(__name__, path)
-        return data.decode("utf8")
+        return get_resource(path)
+
+    @classmethod
+    def open_local_resource(cls, uri):
+        """
+        Open a local resource, including the fingerprinted static assets of the block.
+
+        Args:
+            uri (str | bytes): The URI of the resource.
+
+        Returns:
+            The file-like object of the resource.
+        """
+        asset = open_asset(uri.decode("utf8") if isinstance(uri, bytes) else uri)
+        if asset is not None:
+            return asset
+        return super().open_local_resource(uri)
+
+    def add_static_assets(self, fragment: Fragment) -> None:
+        """
+        Add the CSS and JavaScript of the block to the fragment.
+
+        The assets are inlined in the fragment unless the `SERVE_STATIC_ASSETS`
+        XBlock setting is enabled, in which case they are linked with their
+        fingerprinted local resource URLs.
+
+        Args:
+            fragment (Fragment): The fragment where the assets are added.
+        """
+        with get_metrics_sink().timer("assets.load"):
+            if get_xblock_settings().get("SERVE_STATIC_ASSETS", False):
+                for path in STATIC_CSS:
+                    fragment.add_css_url(self.runtime.local_resource_url(self, get_asset_uri(path)))
+                for path in STATIC_JS:
+                    fragment.add_javascript_url(self.runtime.local_resource_url(self, get_asset_uri(path)))
+                return
+
+            for path in STATIC_CSS:
+                fragment.add_css(self.resource_string(path))
+            for path in STATIC_JS:
+                fragment.add_javascript(self.resource_string(path))
 
     def render_template(self, template_path: str, context: Optional[dict] = None) -> str:
         """
@@ -160,23 +257,57 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         Returns:
             str: The rendered template
         """
-        return loader.render_django_template(template_path, context, i18n_service=self.runtime.service(self, "i18n"))
+        span_attributes = {"extemporaneous_grading.template": template_path}
+        with get_metrics_sink().timer("template.render"), start_span("render_template", span_attributes):
+            return render_template(template_path, context, i18n_service=self.runtime.service(self, "i18n"))
+
+    @property
+    def csv_name(self) -> str:
+        """
+        Get the name of the late submissions CSV file.
+        """
+        return f"{self.course_id}_late_responses_from_{self.scope_ids.usage_id}.csv"
+
+    def get_export_path(self, version: str, extension: str = "csv") -> str:
+        """
+        Get the path in the storage of the late submissions export of the given ledger version.
+
+        Args:
+            version (str): The version of the ledger.
+            extension (str, optional): The extension of the export format.
+
+        Returns:
+            str: The path of the export.
+        """
+        return (
+            f"late_submissions_exports/{self.course_id}/{self.scope_ids.usage_id}/"
+            f"{self.course_id}_late_responses_from_{self.scope_ids.usage_id}_{version}.{extension}"
+        )
 
     def get_current_user(self):
         """
         Get the current user.
+
+        The user is resolved once per request.
         """
-        return self.runtime.service(self, "user").get_current_user()
+        return get_request_cached(self, "current_user", lambda: self.runtime.service(self, "user").get_current_user())
 
     @property
     def is_course_team(self) -> bool:
         """
         Check if the user is part of the course team (instructor or staff).
+
+        The role is resolved once per request and course.
         """
-        user = self.get_current_user()
-        is_course_staff = user.opt_attrs.get("edx-platform.user_is_staff")
-        is_instructor = user.opt_attrs.get(ATTR_KEY_USER_ROLE) == "instructor"
-        return is_course_staff or is_instructor
+
+        def resolve_is_course_team() -> bool:
+            user = self.get_current_user()
+            is_course_staff = user.opt_attrs.get("edx-platform.user_is_staff")
+            is_instructor = user.opt_attrs.get(ATTR_KEY_USER_ROLE) == "instructor"
+            return bool(is_course_staff or is_instructor)
+
+        course_id = getattr(self, "course_id", None)
+        return get_request_cached(self, f"is_course_team.{course_id}", resolve_is_course_team)
 
     def author_view(self, context: dict) -> Fragment:
         """
@@ -199,6 +330,40 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
 
         return fragment
 
+    def render_children(self, context: dict, fragment: Fragment, can_reorder: bool = True, can_add: bool = False):
+        """
+        Render the children of the block with HTML appropriate for Studio.
+
+        Same as `StudioContainerWithNestedXBlocksMixin.render_children`, but the
+        children are loaded with `get_child_blocks`.
+
+        Args:
+            context (dict): The context to render in the template
+            fragment (Fragment): The fragment where the children are added
+            can_reorder (bool, optional): Whether the children can be reordered
+            can_add (bool, optional): Whether children can be added
+        """
+        contents = []
+        child_context = {"reorderable_items": set(), **(context or {})}
+
+        for child in self.get_child_blocks():
+            if can_reorder:
+                child_context["reorderable_items"].add(child.scope_ids.usage_id)
+            view_to_render = "author_view" if hasattr(child, "author_view") else "student_view"
+            rendered_child = child.render(view_to_render, child_context)
+            fragment.add_fragment_resources(rendered_child)
+            contents.append({"id": str(child.scope_ids.usage_id), "content": rendered_child.content})
+
+        mako_service = self.runtime.service(self, "mako")
+        # 'lms.' namespace_prefix is required for rendering in studio
+        mako_service.namespace_prefix = "lms."
+        fragment.add_content(
+            mako_service.render_template(
+                "studio_render_children_view.html",
+                {"items": contents, "xblock_context": context, "can_add": can_add, "can_reorder": can_reorder},
+            )
+        )
+
     def studio_view(self, context: dict) -> Fragment:  # pragma: no cover
         """
         Render a form for editing this XBlock.
@@ -250,38 +415,216 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         Returns:
             Fragment: The fragment to be rendered
         """
-        fragment = Fragment()
-        children_contents = []
+        span_attributes = {
+            "xblock.usage_id": str(self.scope_ids.usage_id),
+            "extemporaneous_grading.children": len(self.children),
+        }
+        with self.profiled("student_view"), get_metrics_sink().timer("student_view"), start_span(
+            "student_view", span_attributes
+        ) as span:
+            fragment = Fragment()
+            template_name = self.get_template()
+            span.set_attribute("extemporaneous_grading.phase", template_name)
+            self.add_view_content(fragment, template_name, context)
+
+            # Add i18n js
+            statici18n_js_url = self._get_statici18n_js_url()
+            if statici18n_js_url:
+                fragment.add_javascript_url(self.runtime.local_resource_url(self, statici18n_js_url))
+
+            self.add_static_assets(fragment)
+
+        return fragment
+
+    def add_view_content(self, fragment: Fragment, template_name: str, context: dict) -> None:
+        """
+        Render the template of the student view in the fragment.
 
+        When the template is `children`, the children are rendered too and their
+        resources are added to the fragment. The locked templates are rendered
+        from the fragment cache when possible. The current time of the server
+        and the jitter of the next transition are sent to the JavaScript of the
+        block, so they are not part of the cached content.
+
+        Args:
+            fragment (Fragment): The fragment where the content is added.
+            template_name (str): The name of the template.
+            context (dict): The context to render in the template.
+        """
+        now = timezone.now()
+        next_transition = self.get_next_transition(now)
+        if template_name in CACHED_TEMPLATES:
+            fragment.add_content(self.render_cached_view(template_name, context, next_transition))
+        else:
+            fragment.add_content(self.render_view(fragment, template_name, context, next_transition))
+        fragment.initialize_js(
+            "XBlockExtemporaneousGrading",
+            {"server_now": now.isoformat(), "transition_jitter_ms": round(get_transition_jitter() * 1000)},
+        )
+
+    def render_view(
+        self,
+        fragment: Fragment,
+        template_name: str,
+        context: dict,
+        next_transition: datetime | None,
+    ) -> str:
+        """
+        Render the template of the student view.
+
+        Args:
+            fragment (Fragment): The fragment where the resources of the children are added.
+            template_name (str): The name of the template.
+            context (dict): The context to render in the template.
+            next_transition (datetime | None): The next deadline transition of the view.
+
+        Returns:
+            str: The rendered template.
+        """
         render_context = {
             "block": self,
             "due_datetime_has_passed": timezone.now() > self.due_datetime,
             "due_datetime": self.due_datetime.isoformat(),
             "late_due_datetime": self.late_due_datetime.isoformat(),
+            "next_transition": next_transition.isoformat() if next_transition else "",
+            "deadline_events": get_xblock_settings().get("DEADLINE_EVENTS", False),
             **context,
         }
 
-        if (template_name := self.get_template()) == "children":
-            for child_id in self.children:
-                child = self.runtime.get_block(child_id)
-                child_fragment = self._render_child_fragment(child, context, "student_view")
+        if template_name == "children":
+            children_contents = []
+            for child_fragment in self.render_child_fragments(context, "student_view"):
                 fragment.add_fragment_resources(child_fragment)
                 children_contents.append(child_fragment.content)
 
             render_context.update({"children_contents": children_contents})
 
-        # Add i18n js
-        statici18n_js_url = self._get_statici18n_js_url()
-        if statici18n_js_url:
-            fragment.add_javascript_url(self.runtime.local_resource_url(self, statici18n_js_url))
+        return self.render_template(f"static/html/{template_name}.html", render_context)
 
-        fragment.add_content(self.render_template(f"static/html/{template_name}.html", render_context))
-        fragment.add_css(self.resource_string("static/css/extemporaneous_grading.css"))
-        fragment.add_javascript(self.resource_string("static/js/src/extemporaneous_grading.js"))
-        fragment.add_javascript(self.resource_string("static/js/src/resize_iframe.js"))
-        fragment.initialize_js("XBlockExtemporaneousGrading")
+    def render_cached_view(self, template_name: str, context: dict, next_transition: datetime | None) -> str:
+        """
+        Render a locked template of the student view through the fragment cache.
 
-        return fragment
+        The content is cached by block, version of its settings, template, role
+        of the user and language, until the next transition of the view. The
+        children view is never cached since the content of the children depends
+        on the learner.
+
+        Args:
+            template_name (str): The name of the template.
+            context (dict): The context to render in the template.
+            next_transition (datetime | None): The next deadline transition of the view.
+
+        Returns:
+            str: The rendered template.
+        """
+        cache = get_fragment_cache()
+        key = get_fragment_cache_key(
+            self.scope_ids.usage_id,
+            self.get_settings_version(),
+            template_name,
+            self.is_course_team,
+            translation.get_language(),
+        )
+        content = cache.get(key)
+        if content is None:
+            content = self.render_view(Fragment(), template_name, context, next_transition)
+            if timeout := get_fragment_timeout(next_transition):
+                cache.set(key, content, timeout)
+        return content
+
+    def get_settings_version(self) -> str:
+        """
+        Get a hash of the settings of the block, which changes when the block is edited.
+
+        Returns:
+            str: The version of the settings.
+        """
+        values = {
+            name: field.to_json(field.read_from(self))
+            for name, field in self.fields.items()  # pylint: disable=no-member
+            if field.scope in (Scope.settings, Scope.content)
+        }
+        return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf8")).hexdigest()
+
+    def get_child_blocks(self) -> list[XBlock]:
+        """
+        Get the children of the block.
+
+        The children are loaded in a single call when the runtime provides a
+        `get_blocks` method, and one by one otherwise.
+
+        Returns:
+            list[XBlock]: The children, in order.
+        """
+        get_blocks = getattr(self.runtime, "get_blocks", None)
+        with get_metrics_sink().timer("children.fetch"):
+            if callable(get_blocks):
+                return list(get_blocks(self.children))
+            return [self.runtime.get_block(child_id) for child_id in self.children]
+
+    def render_child_fragments(self, context: dict, view: str = "student_view") -> list[Fragment]:
+        """
+        Render the children of the block with the given view.
+
+        The children are rendered one after the other unless the
+        `PARALLEL_CHILDREN_RENDERING` XBlock setting is enabled, in which case they
+        are rendered in a pool of `CHILDREN_RENDER_WORKERS` threads. Either way,
+        the fragments are returned in the order of the children.
+
+        Args:
+            context (dict): The context to render the children with.
+            view (str, optional): The view to render.
+
+        Returns:
+            list[Fragment]: The fragments of the children.
+        """
+        children = self.get_child_blocks()
+        with get_metrics_sink().timer("children.render"):
+            return self._render_child_fragments(children, context, view)
+
+    def _render_child_fragments(self, children: list[XBlock], context: dict, view: str) -> list[Fragment]:
+        """
+        Render the given children, serially or in a thread pool according to the settings.
+        """
+        xblock_settings = get_xblock_settings()
+        if not xblock_settings.get("PARALLEL_CHILDREN_RENDERING", False) or len(children) < 2:
+            return [self._render_child_fragment(child, context, view) for child in children]
+
+        language = translation.get_language()
+
+        def render(child) -> Fragment:
+            try:
+                with translation.override(language):
+                    return self._render_child_fragment(child, context, view)
+            finally:
+                connections.close_all()
+
+        workers = xblock_settings.get("CHILDREN_RENDER_WORKERS", CHILDREN_RENDER_WORKERS)
+        # Each child runs in a copy of the current context, so its span is nested in the span of the view.
+        contexts = [contextvars.copy_context() for _ in children]
+        with ThreadPoolExecutor(max_workers=min(workers, len(children))) as pool:
+            return list(pool.map(lambda context_copy, child: context_copy.run(render, child), contexts, children))
+
+    def _render_child_fragment(self, child: XBlock, context: dict, view: str = "student_view") -> Fragment:
+        """
+        Render a child with the given view in its own trace span.
+
+        Args:
+            child (XBlock): The child to render.
+            context (dict): The context to render the child with.
+            view (str, optional): The view to render.
+
+        Returns:
+            Fragment: The fragment of the child.
+        """
+        span_attributes = {
+            "xblock.usage_id": str(child.scope_ids.usage_id),
+            "xblock.block_type": str(child.scope_ids.block_type),
+            "xblock.view": view,
+        }
+        with start_span("render_child", span_attributes):
+            return super()._render_child_fragment(child, context, view)
 
     def get_template(self) -> str:
         """
@@ -294,9 +637,81 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         if current_datetime > self.late_due_datetime:
             return "late_due_datetime"
         if self.due_datetime < current_datetime < self.late_due_datetime and not self.late_submission:
-            return "due_datetime"
+            if not self.has_recorded_late_submission():
+                return "due_datetime"
         return "children"
 
+    def has_recorded_late_submission(self) -> bool:
+        """
+        Check if the late submission of the current user was recorded on their behalf.
+
+        This runs on every render of the locked view, so the ledger is only
+        checked when the `late_submission_grants` token changed since the last
+        check for the learner, i.e. once per request of the course team to
+        `set_late_submissions`. The `late_submission` field of the learner is
+        set the first time the record is found, so it is not checked again.
+
+        Returns:
+            bool: True if the ledger has a record of the current user.
+        """
+        grants = self.late_submission_grants
+        if not grants or grants == self.checked_late_submission_grants:
+            return False
+        self.checked_late_submission_grants = grants
+        anonymous_user_id = self.get_current_user().opt_attrs.get(ATTR_ANONYMOUS_USER_ID)
+        if not anonymous_user_id or anonymous_user_id not in get_ledger(self):
+            return False
+        self.late_submission = True
+        return True
+
+    def get_deadline_phase(self) -> str:
+        """
+        Get the deadline phase of the block, regardless of the user.
+
+        Returns:
+            str: `before_due_datetime`, `due_datetime` or `late_due_datetime`.
+        """
+        current_datetime = timezone.now()
+        if current_datetime > self.late_due_datetime:
+            return "late_due_datetime"
+        if current_datetime > self.due_datetime:
+            return "due_datetime"
+        return "before_due_datetime"
+
+    def profiled(self, operation: str) -> ContextManager[None]:
+        """
+        Get the context manager that profiles an operation of the block when it is sampled.
+
+        The operation is profiled for a fraction of the calls set with the
+        `PROFILING_SAMPLE_RATE` XBlock setting, or when a member of the course
+        team requests it with the `profile_extemporaneous_grading` query parameter.
+
+        Args:
+            operation (str): The name of the view or handler.
+
+        Returns:
+            ContextManager[None]: The context manager of the profile.
+        """
+        if not should_profile(is_profile_requested() and self.is_course_team):
+            return nullcontext()
+        return profile(
+            str(getattr(self, "course_id", None)), str(self.scope_ids.usage_id), operation, self.get_deadline_phase()
+        )
+
+    def get_next_transition(self, now: datetime | None = None) -> datetime | None:
+        """
+        Get the next datetime when the template of the block changes for the user.
+
+        Args:
+            now (datetime, optional): The current datetime.
+
+        Returns:
+            datetime | None: The next transition, or None if the template will not change.
+        """
+        now = now or timezone.now()
+        deadlines = [self.late_due_datetime] if self.late_submission else [self.due_datetime, self.late_due_datetime]
+        return next((deadline for deadline in deadlines if deadline > now), None)
+
     @property
     def due_datetime(self) -> datetime:
         """
@@ -305,7 +720,7 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         Returns:
             datetime: The due date.
         """
-        return self.parse_datetime(self.due_date, self.due_time)
+        return self.get_deadline("due_datetime", self.due_date, self.due_time)
 
     @property
     def late_due_datetime(self) -> datetime:
@@ -315,7 +730,28 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         Returns:
             datetime: The late due date.
         """
-        return self.parse_datetime(self.late_due_date, self.late_due_time)
+        return self.get_deadline("late_due_datetime", self.late_due_date, self.late_due_time)
+
+    def get_deadline(self, name: str, date: datetime | str, time: str) -> datetime:
+        """
+        Get a deadline of the block, parsing it only when its fields change.
+
+        The parsed deadlines are cached on the block together with the date and
+        time they were parsed from, so editing the fields invalidates them.
+
+        Args:
+            name (str): The name of the deadline.
+            date (datetime | str): The date field of the deadline.
+            time (str): The time field of the deadline.
+
+        Returns:
+            datetime: The deadline.
+        """
+        deadlines = self.__dict__.setdefault("_deadlines", {})
+        cached = deadlines.get(name)
+        if cached is None or cached[0] != (date, time):
+            cached = deadlines[name] = ((date, time), self.parse_datetime(date, time))
+        return cached[1]
 
     @staticmethod
     def parse_datetime(date: datetime | str, time: str) -> datetime:
@@ -340,6 +776,11 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         """
         Set the late submission flag to True.
 
+        The acceptance is recorded in the ledger only the first time, later
+        calls just increase the `late_submission_attempts` counter. The legacy
+        `late_submissions` field is migrated first, so a learner recorded there
+        keeps their original acceptance datetime.
+
         Args:
             data (dict): The data received from the client.
             suffix (str, optional): The suffix of the handler.
@@ -347,46 +788,472 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         Returns:
             dict: The response to the client.
         """
-        self.late_submission = True
-        user = self.get_current_user()
-        self.late_submissions.append(
-            {
-                "anonymous_user_id": user.opt_attrs[ATTR_ANONYMOUS_USER_ID],
-                "username": user.opt_attrs[ATTR_USER_USERNAME],
-                "email": user.emails[0] if user.emails else "",
-                "datetime": timezone.now().isoformat(),
-            }
-        )
+        with self.profiled("set_late_submission"), start_span(
+            "set_late_submission", {"xblock.usage_id": str(self.scope_ids.usage_id)}
+        ) as span:
+            self.late_submission = True
+            self.late_submission_attempts += 1
+            user = self.get_current_user()
+            migrate_late_submissions(self)
+            added = get_ledger(self).add(
+                {
+                    "anonymous_user_id": user.opt_attrs[ATTR_ANONYMOUS_USER_ID],
+                    "username": user.opt_attrs[ATTR_USER_USERNAME],
+                    "email": user.emails[0] if user.emails else "",
+                    "datetime": timezone.now().isoformat(),
+                }
+            )
+            span.set_attribute("extemporaneous_grading.recorded", added)
+        get_metrics_sink().increment("late_submission.accepted" if added else "late_submission.duplicate")
+        return {
+            "success": True,
+        }
+
+    @XBlock.json_handler
+    def set_late_submissions(self, data: dict, suffix: str = "") -> dict:  # pylint: disable=unused-argument
+        """
+        Record the late submission of several learners on their behalf.
+
+        The learners are identified by the `anonymous_user_ids` or `usernames`
+        lists sent by the client. All the learners found are recorded in the
+        ledger at once, and the response has the result of each learner in the
+        order they were sent: `recorded`, `already_recorded` or `not_found`.
+        Then the `late_submission_grants` token is replaced, so the view of
+        the learners checks the ledger again and is unlocked. The token is
+        replaced even if all the learners were already recorded, so retrying a
+        request that failed after writing the ledger unlocks them too.
+
+        Args:
+            data (dict): The data received from the client.
+            suffix (str, optional): The suffix of the handler.
+
+        Raises:
+            JsonHandlerError: If the user is not part of the course team.
+            JsonHandlerError: If the lists of learners are not valid or too long.
+
+        Returns:
+            dict: The response to the client with the result of each learner.
+        """
+        if not self.is_course_team:
+            raise JsonHandlerError(403, _("Only the course team can accept late submissions on behalf of learners."))
+
+        anonymous_user_ids = data.get("anonymous_user_ids") or []
+        usernames = data.get("usernames") or []
+        if not all(
+            isinstance(values, list) and all(isinstance(value, str) and value for value in values)
+            for values in (anonymous_user_ids, usernames)
+        ):
+            raise JsonHandlerError(400, _("The learners must be lists of anonymous user IDs or usernames."))
+        if len(anonymous_user_ids) + len(usernames) > MAX_BULK_LATE_SUBMISSIONS:
+            raise JsonHandlerError(400, _("Too many learners in a single request."))
+
+        identifiers = [("anonymous_user_id", value) for value in anonymous_user_ids]
+        identifiers += [("username", value) for value in usernames]
+        accepted_at = timezone.now().isoformat()
+        learners = [self.get_learner(**{field: value}) for field, value in identifiers]
+        records = [{**learner, "datetime": accepted_at} for learner in learners if learner is not None]
+        migrate_late_submissions(self)
+        added_records = get_ledger(self).add_many(records)
+        if records:
+            self.late_submission_grants = uuid.uuid4().hex
+        metrics = get_metrics_sink()
+        metrics.increment("late_submission.accepted", sum(added_records))
+        metrics.increment("late_submission.duplicate", len(added_records) - sum(added_records))
+        added = iter(added_records)
+
+        results = []
+        for (field, value), learner in zip(identifiers, learners):
+            result = {field: value}
+            if learner is None:
+                result["status"] = "not_found"
+            else:
+                result["anonymous_user_id"] = learner["anonymous_user_id"]
+                result["status"] = "recorded" if next(added) else "already_recorded"
+            results.append(result)
+
         return {
             "success": True,
+            "results": results,
+        }
+
+    def get_learner(self, anonymous_user_id: str | None = None, username: str | None = None) -> dict | None:
+        """
+        Get the late submission information of a learner of the course.
+
+        Args:
+            anonymous_user_id (str, optional): The anonymous user ID of the learner.
+            username (str, optional): The username of the learner.
+
+        Returns:
+            dict | None: The anonymous user ID, username and email of the
+                learner, or None if the learner was not found.
+        """
+        user_service = self.runtime.service(self, "user")
+        if username is not None:
+            get_anonymous_user_id = getattr(user_service, "get_anonymous_user_id", None)
+            anonymous_user_id = get_anonymous_user_id and get_anonymous_user_id(username, str(self.course_id))
+        get_user_by_anonymous_id = getattr(user_service, "get_user_by_anonymous_id", None)
+        user = get_user_by_anonymous_id and anonymous_user_id and get_user_by_anonymous_id(anonymous_user_id)
+        if not user:
+            return None
+        return {
+            "anonymous_user_id": anonymous_user_id,
+            "username": user.username,
+            "email": user.email or "",
         }
 
+    @XBlock.json_handler
+    def children_fragment(self, data: dict, suffix: str = "") -> dict:  # pylint: disable=unused-argument
+        """
+        Render the children view of the block once the content is unlocked.
+
+        The locked views do not render the children. After the learner accepts
+        the late submission, the client replaces the locked view with the
+        fragment returned by this handler instead of reloading the page.
+
+        Args:
+            data (dict): The data received from the client.
+            suffix (str, optional): The suffix of the handler.
+
+        Raises:
+            JsonHandlerError: If the content of the block is locked for the user.
+
+        Returns:
+            dict: The fragment with the children of the block.
+        """
+        if self.get_template() != "children":
+            raise JsonHandlerError(403, _("The content of this component is locked."))
+
+        fragment = Fragment()
+        self.add_view_content(fragment, "children", {})
+        return fragment.to_dict()
+
+    @XBlock.json_handler
+    def view_fragment(self, data: dict, suffix: str = "") -> dict:  # pylint: disable=unused-argument
+        """
+        Render the current view of the block.
+
+        The client replaces the content of the block with this fragment when a
+        deadline passes.
+
+        Args:
+            data (dict): The data received from the client.
+            suffix (str, optional): The suffix of the handler.
+
+        Returns:
+            dict: The fragment with the current view of the block.
+        """
+        fragment = Fragment()
+        self.add_view_content(fragment, self.get_template(), {})
+        return fragment.to_dict()
+
+    @XBlock.handler
+    def deadline_events(self, request, suffix: str = "") -> Response:  # pylint: disable=unused-argument
+        """
+        Stream a server-sent event when the next deadline transition of the block passes.
+
+        The stream is only available when the `DEADLINE_EVENTS` XBlock setting is enabled.
+
+        Args:
+            request (Request): The request received from the client.
+            suffix (str, optional): The suffix of the handler.
+
+        Returns:
+            Response: The `text/event-stream` response, or an empty response if
+                there are no more transitions.
+        """
+        if not get_xblock_settings().get("DEADLINE_EVENTS", False):
+            return Response(status=404)
+
+        next_transition = self.get_next_transition()
+        if next_transition is None:
+            return Response(status=204)
+
+        response = Response(
+            app_iter=get_deadline_events(next_transition, get_transition_jitter()),
+            content_type="text/event-stream",
+        )
+        response.cache_control.no_cache = True
+        # Disable the buffering of the stream in nginx.
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
     @XBlock.json_handler
     def download_csv(self, data: dict, suffix: str = "") -> dict:  # pylint: disable=unused-argument
         """
         Download a CSV file with all late submissions data.
 
+        The legacy `late_submissions` field is migrated to the ledger before
+        generating the file. The file is named after the version of the ledger,
+        so it is only generated again when there are new late submissions.
+
         Args:
             data (dict): The data received from the client.
             suffix (str, optional): The suffix of the handler.
 
+        Raises:
+            JsonHandlerError: If the user is not part of the course team.
+
         Returns:
             dict: The response to the client.
         """
-        temporary_file = tempfile.NamedTemporaryFile(delete=True, suffix=".csv")
-        csv_name = f"{self.course_id}_late_responses_from_{self.scope_ids.usage_id}.csv"
+        if not self.is_course_team:
+            raise JsonHandlerError(403, _("Only the course team can export the late submissions."))
+
+        with self.profiled("download_csv"), start_span(
+            "download_csv", {"xblock.usage_id": str(self.scope_ids.usage_id)}
+        ) as span:
+            migrate_late_submissions(self)
+            storage = get_storage("EXPORT_STORAGE")
+            ledger = get_ledger(self)
+            if span.is_recording():
+                span.set_attribute("extemporaneous_grading.ledger_size", len(ledger))
+            export_path = self.get_export_path(ledger.version())
+            get_metrics_sink().increment("exports.csv")
+            records = iter_counted_rows(iter_late_submissions(self), ledger_size=True)
+            save_export(storage, export_path, iter_csv(records))
+
+        return {
+            "success": True,
+            "download_url": storage.url(export_path),
+        }
+
+    @XBlock.handler
+    def stream_export(self, request, suffix: str = "") -> Response:  # pylint: disable=unused-argument
+        """
+        Stream a file with all late submissions data.
+
+        The rows are read from the ledger and sent to the client in chunks, so
+        the file is neither built in memory nor stored before being sent. The
+        `format` query parameter selects one of the export formats: `csv`
+        (default), `ndjson` or `parquet`.
+
+        Args:
+            request (Request): The request received from the client.
+            suffix (str, optional): The suffix of the handler.
+
+        Returns:
+            Response: The streaming response with the file.
+        """
+        if not self.is_course_team:
+            return Response(status=403)
+        try:
+            export_format = get_export_format(request.GET.get("format"))
+        except ValueError as exc:
+            return Response(str(exc), status=400)
+
+        get_metrics_sink().increment(f"exports.{export_format.extension}")
+        filename = f"{self.course_id}_late_responses_from_{self.scope_ids.usage_id}.{export_format.extension}"
+        return Response(
+            app_iter=export_format.writer(iter_counted_rows(iter_late_submissions(self), ledger_size=True)),
+            content_type=export_format.content_type,
+            charset="utf8" if export_format.extension != "parquet" else None,
+            content_disposition=f'attachment; filename="{filename}"',
+        )
+
+    @XBlock.json_handler
+    def late_submissions_since(self, data: dict, suffix: str = "") -> dict:  # pylint: disable=unused-argument
+        """
+        Get the late submissions added after a cursor or a datetime.
+
+        The records are returned in the order of their acceptance datetime,
+        together with the cursor to get the next ones. The client sends either
+        the `cursor` of a previous response or a `since` ISO datetime, and
+        optionally a `limit` of records. An empty list of records means there
+        are no more records for now.
+
+        Args:
+            data (dict): The data received from the client.
+            suffix (str, optional): The suffix of the handler.
+
+        Raises:
+            JsonHandlerError: If the user is not part of the course team.
+            JsonHandlerError: If the cursor, the datetime or the limit is not valid.
+
+        Returns:
+            dict: The response to the client with the records and the next cursor.
+        """
+        if not self.is_course_team:
+            raise JsonHandlerError(403, _("Only the course team can export the late submissions."))
+
+        try:
+            since = datetime.fromisoformat(data["since"]) if data.get("since") else None
+            limit = min(int(data.get("limit") or DELTA_EXPORT_LIMIT), MAX_DELTA_EXPORT_LIMIT)
+            if limit < 1:
+                raise ValueError(f"Invalid limit: {limit}")
+        except (TypeError, ValueError) as exc:
+            raise JsonHandlerError(400, _("Invalid since datetime or limit.")) from exc
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        migrate_late_submissions(self)
+        try:
+            records, next_cursor = get_ledger(self).get_records_since(data.get("cursor"), since, limit)
+        except ValueError as exc:
+            raise JsonHandlerError(400, _("Invalid cursor.")) from exc
+
+        return {
+            "success": True,
+            "records": records,
+            "next_cursor": next_cursor,
+        }
+
+    @staticmethod
+    def get_requested_export_format(data: dict) -> ExportFormat:
+        """
+        Get the export format requested by the client.
+
+        Args:
+            data (dict): The data received from the client.
+
+        Raises:
+            JsonHandlerError: If the export format is not available.
+
+        Returns:
+            ExportFormat: The export format.
+        """
+        try:
+            return get_export_format(data.get("format"))
+        except ValueError as exc:
+            raise JsonHandlerError(400, str(exc)) from exc
+
+    @XBlock.json_handler
+    def start_export(self, data: dict, suffix: str = "") -> dict:  # pylint: disable=unused-argument
+        """
+        Start a background job that writes the late submissions export to the storage.
+
+        The client can select the export `format`: `csv` (default), `ndjson` or
+        `parquet`. If the export of the current version of the ledger already
+        exists, the job is created as succeeded without running it.
+
+        Only the storage ledger can be read by the job outside of the request
+        of the block. For other ledgers no job is started, and the response
+        has the URL of the `stream_export` handler to download the export in
+        a request of the client instead.
+
+        Args:
+            data (dict): The data received from the client.
+            suffix (str, optional): The suffix of the handler.
+
+        Raises:
+            JsonHandlerError: If the user is not part of the course team.
 
-        with open(temporary_file.name, "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["anonymous_user_id", "username", "email", "datetime"])
-            for submission in self.late_submissions:
-                writer.writerow(submission.values())
+        Returns:
+            dict: The response to the client with the ID of the job, or the
+                download URL of the export for ledgers other than the storage ledger.
+        """
+        if not self.is_course_team:
+            raise JsonHandlerError(403, _("Only the course team can export the late submissions."))
+        export_format = self.get_requested_export_format(data)
+        format_name = data.get("format") or "csv"
+
+        migrate_late_submissions(self)
+        ledger = get_ledger(self)
+        if not isinstance(ledger, StorageLedger):
+            return {
+                "success": True,
+                "job_id": None,
+                "download_url": self.runtime.handler_url(self, "stream_export", query=f"format={format_name}"),
+            }
+        total_rows = len(ledger)
+        export_path = self.get_export_path(ledger.version(), export_format.extension)
+        metrics = get_metrics_sink()
+        metrics.increment(f"exports.{export_format.extension}")
+        metrics.gauge("ledger.size", total_rows)
+
+        job_id = create_job(self.scope_ids.usage_id, total_rows)
+        storage = get_storage("EXPORT_STORAGE")
+        if storage.exists(export_path):
+            update_job(job_id, status=JOB_SUCCEEDED, rows_written=total_rows, download_url=storage.url(export_path))
+        else:
+            get_job_executor().submit(
+                run_export_job,
+                job_id,
+                str(self.course_id),
+                str(self.scope_ids.usage_id),
+                export_path,
+                format_name,
+            )
+
+        return {
+            "success": True,
+            "job_id": job_id,
+        }
+
+    @XBlock.json_handler
+    def start_course_export(self, data: dict, suffix: str = "") -> dict:  # pylint: disable=unused-argument
+        """
+        Start a background job that writes the late submissions export of the whole course to the storage.
+
+        The report merges the storage ledgers of all the Extemporaneous
+        Grading blocks of the course in the selected export `format`, so it
+        requires the `storage` ledger backend. Its status is polled with
+        `export_status`.
+
+        Args:
+            data (dict): The data received from the client.
+            suffix (str, optional): The suffix of the handler.
+
+        Raises:
+            JsonHandlerError: If the user is not part of the course team.
+            JsonHandlerError: If the ledger backend is not `storage`.
+
+        Returns:
+            dict: The response to the client with the ID of the job.
+        """
+        if not self.is_course_team:
+            raise JsonHandlerError(403, _("Only the course team can export the late submissions."))
+
+        export_format = self.get_requested_export_format(data)
+        if not isinstance(get_ledger(self), StorageLedger):
+            raise JsonHandlerError(400, _("The course report requires the storage ledger backend."))
+
+        migrate_late_submissions(self)
+        get_metrics_sink().increment(f"exports.course.{export_format.extension}")
+        job_id = create_job(self.scope_ids.usage_id, None)
+        export_name = (
+            f"late_submissions_exports/{self.course_id}/{self.course_id}_late_responses.{export_format.extension}"
+        )
+        get_job_executor().submit(
+            run_course_export_job, job_id, str(self.course_id), self.CATEGORY, export_name, data.get("format") or "csv"
+        )
+
+        return {
+            "success": True,
+            "job_id": job_id,
+        }
+
+    @XBlock.json_handler
+    def export_status(self, data: dict, suffix: str = "") -> dict:  # pylint: disable=unused-argument
+        """
+        Get the status of an export job started with `start_export`.
+
+        Args:
+            data (dict): The data received from the client with the `job_id`.
+            suffix (str, optional): The suffix of the handler.
+
+        Raises:
+            JsonHandlerError: If the user is not part of the course team.
+            JsonHandlerError: If the job does not exist for this block.
+
+        Returns:
+            dict: The response to the client with the status of the job.
+        """
+        if not self.is_course_team:
+            raise JsonHandlerError(403, _("Only the course team can export the late submissions."))
 
-        default_storage.save(csv_name, temporary_file)
+        job = get_job(data.get("job_id", ""))
+        if job is None or job["usage_id"] != str(self.scope_ids.usage_id):
+            raise JsonHandlerError(404, _("The export job does not exist."))
 
         return {
             "success": True,
-            "download_url": default_storage.url(csv_name),
+            "status": job["status"],
+            "rows_written": job["rows_written"],
+            "total_rows": job["total_rows"],
+            "percent": job["percent"],
+            "download_url": job["download_url"],
+            "error": job["error"],
         }
 
     @staticmethod
@@ -493,9 +1360,4 @@ class XBlockExtemporaneousGrading(StudioContainerWithNestedXBlocksMixin, StudioE
         locale_code = translation.get_language()
         if locale_code is None:
             return None
-        text_js = "public/js/translations/{locale_code}/text.js"
-        lang_code = locale_code.split("-")[0]
-        for code in (translation.to_locale(locale_code), lang_code, "en"):
-            if pkg_resources.resource_exists(loader.module_name, text_js.format(locale_code=code)):
-                return text_js.format(locale_code=code)
-        return None
+        return get_translations_js(locale_code)
@@ -0,0 +1,76 @@
+"""
+Cache of the rendered views of the Extemporaneous Grading XBlock.
+
+The locked views of a block only depend on its settings, the deadline phase,
+the role of the user and the language, so their rendered content is shared by
+all the learners in the same situation. The entries expire at the next deadline
+of the block, so a view is never served after the phase it was rendered for.
+
+The cache is configured with the `FRAGMENT_CACHE` XBlock setting: `locmem`
+(default) keeps the entries in the memory of the process, and any other value
+is used as the alias of a Django cache shared by all the workers.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from datetime import datetime
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+from extemporaneous_grading.utils import get_xblock_settings
+
+LOCAL_FRAGMENT_CACHE = "locmem"
+FRAGMENT_CACHE_KEY = "extemporaneous_grading.fragment.{digest}"
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+FRAGMENT_CACHE_MAX_ENTRIES = 1000
+
+local_fragment_cache = LocMemCache(
+    "extemporaneous_grading.fragments",
+    {"TIMEOUT": FRAGMENT_CACHE_TIMEOUT, "OPTIONS": {"MAX_ENTRIES": FRAGMENT_CACHE_MAX_ENTRIES}},
+)
+
+
+def get_fragment_cache() -> BaseCache:
+    """
+    Get the cache of the rendered views according to the `FRAGMENT_CACHE` setting.
+    """
+    alias = get_xblock_settings().get("FRAGMENT_CACHE", LOCAL_FRAGMENT_CACHE)
+    if alias == LOCAL_FRAGMENT_CACHE:
+        return local_fragment_cache
+    return caches[alias]
+
+
+def get_fragment_cache_key(*parts) -> str:
+    """
+    Get the cache key of a rendered view from the values it depends on.
+
+    Args:
+        *parts: The values the view depends on.
+
+    Returns:
+        str: The cache key.
+    """
+    digest = hashlib.sha256("\n".join(str(part) for part in parts).encode("utf8")).hexdigest()
+    return FRAGMENT_CACHE_KEY.format(digest=digest)
+
+
+def get_fragment_timeout(expires_at: datetime | None) -> int:
+    """
+    Get the timeout of a rendered view that must not be served after the given datetime.
+
+    Args:
+        expires_at (datetime | None): The datetime when the view stops being
+            valid, or None if it does not expire.
+
+    Returns:
+        int: The timeout in seconds, at most `FRAGMENT_CACHE_TIMEOUT`. It is 0
+            if the view is already expired.
+    """
+    if expires_at is None:
+        return FRAGMENT_CACHE_TIMEOUT
+    return max(min(math.floor((expires_at - timezone.now()).total_seconds()), FRAGMENT_CACHE_TIMEOUT), 0)
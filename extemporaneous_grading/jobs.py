@@ -0,0 +1,290 @@
+"""
+Background export jobs of the late submissions of the Extemporaneous Grading XBlock.
+
+An export job writes the late submissions export of a block to the storage while
+the client polls its status. The state of the jobs is kept in the Django cache
+configured with the `EXPORT_JOBS_CACHE` XBlock setting, so it can be read from
+any worker. The jobs are run by the executor configured with the
+`EXPORT_JOB_EXECUTOR` XBlock setting: `thread` (default) runs them in an
+in-process thread pool and `celery` sends them to a Celery task.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from extemporaneous_grading.exports import get_export_format, save_export
+from extemporaneous_grading.ledger import StorageLedger
+from extemporaneous_grading.metrics import iter_counted_rows
+from extemporaneous_grading.reports import (
+    COURSE_REPORT_SCHEMA,
+    count_course_late_submissions,
+    get_course_blocks,
+    get_course_report_version,
+    iter_course_late_submissions,
+)
+from extemporaneous_grading.utils import get_storage, get_xblock_settings
+
+try:
+    from celery import shared_task
+except ImportError:  # pragma: no cover
+    shared_task = None
+
+log = logging.getLogger(__name__)
+
+JOB_EXECUTORS = {
+    "thread": "extemporaneous_grading.jobs.ThreadPoolJobExecutor",
+    "celery": "extemporaneous_grading.jobs.CeleryJobExecutor",
+}
+DEFAULT_JOB_EXECUTOR = "thread"
+JOB_CACHE_KEY = "extemporaneous_grading.export_job.{job_id}"
+JOB_TIMEOUT = 60 * 60 * 24
+JOB_PROGRESS_INTERVAL = 1000
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+def get_jobs_cache():
+    """
+    Get the cache where the state of the jobs is stored.
+    """
+    return caches[get_xblock_settings().get("EXPORT_JOBS_CACHE", "default")]
+
+
+def get_job(job_id: str) -> dict | None:
+    """
+    Get the state of the given job.
+
+    Args:
+        job_id (str): The ID of the job.
+
+    Returns:
+        dict | None: The state of the job, or None if the job does not exist.
+    """
+    return get_jobs_cache().get(JOB_CACHE_KEY.format(job_id=job_id))
+
+
+def update_job(job_id: str, **changes) -> dict:
+    """
+    Update the state of the given job.
+
+    Args:
+        job_id (str): The ID of the job.
+        **changes: The values to update in the state of the job.
+
+    Returns:
+        dict: The new state of the job.
+    """
+    state = {**(get_job(job_id) or {}), **changes}
+    total_rows = state.get("total_rows")
+    if state.get("status") == JOB_SUCCEEDED:
+        state["percent"] = 100.0
+    elif total_rows:
+        state["percent"] = round(min(state.get("rows_written", 0) / total_rows, 1) * 100, 2)
+    get_jobs_cache().set(JOB_CACHE_KEY.format(job_id=job_id), state, JOB_TIMEOUT)
+    return state
+
+
+def create_job(usage_id: str, total_rows: int | None) -> str:
+    """
+    Create a pending export job for the given block.
+
+    Args:
+        usage_id (str): The usage ID of the block.
+        total_rows (int | None): The number of rows to export, if known.
+
+    Returns:
+        str: The ID of the job.
+    """
+    job_id = uuid.uuid4().hex
+    update_job(
+        job_id,
+        usage_id=str(usage_id),
+        status=JOB_PENDING,
+        rows_written=0,
+        total_rows=total_rows,
+        percent=0.0,
+        download_url=None,
+        error=None,
+    )
+    return job_id
+
+
+def _track_progress(job_id: str, records: Iterable[dict]) -> Iterator[dict]:
+    """
+    Iterate over the records updating the number of rows written by the job.
+    """
+    rows_written = 0
+    for rows_written, record in enumerate(records, start=1):
+        yield record
+        if rows_written % JOB_PROGRESS_INTERVAL == 0:
+            update_job(job_id, rows_written=rows_written)
+    update_job(job_id, rows_written=rows_written)
+
+
+def run_export_job(
+    job_id: str,
+    course_id: str,
+    usage_id: str,
+    export_path: str,
+    export_format: str = "csv",
+) -> None:
+    """
+    Write the late submissions export of the storage ledger of a block to the storage.
+
+    Args:
+        job_id (str): The ID of the job.
+        course_id (str): The course ID of the block.
+        usage_id (str): The usage ID of the block.
+        export_path (str): The content-addressed path of the export in the storage.
+        export_format (str, optional): The name of the export format.
+    """
+    update_job(job_id, status=JOB_RUNNING)
+    try:
+        records = StorageLedger(course_id, usage_id)
+        storage = get_storage("EXPORT_STORAGE")
+        writer = get_export_format(export_format).writer
+        save_export(storage, export_path, writer(_track_progress(job_id, iter_counted_rows(records))))
+        update_job(job_id, status=JOB_SUCCEEDED, download_url=storage.url(export_path))
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        log.exception("Export job %s of %s failed.", job_id, usage_id)
+        update_job(job_id, status=JOB_FAILED, error=str(exc))
+
+
+def run_course_export_job(
+    job_id: str,
+    course_id: str,
+    category: str,
+    export_name: str,
+    export_format: str = "csv",
+) -> None:
+    """
+    Write the late submissions export of all the blocks of a course to the storage.
+
+    The version of the report is added to the export name, so the export is
+    reused until a new late submission arrives in any of the blocks, and the
+    older versions are deleted by `save_export`.
+
+    Args:
+        job_id (str): The ID of the job.
+        course_id (str): The course ID.
+        category (str): The category of the Extemporaneous Grading blocks.
+        export_name (str): The path of the export in the storage, without the version.
+        export_format (str, optional): The name of the export format.
+    """
+    update_job(job_id, status=JOB_RUNNING)
+    try:
+        blocks = get_course_blocks(course_id, category)
+        total_rows = count_course_late_submissions(blocks)
+        update_job(job_id, total_rows=total_rows)
+        name, extension = export_name.rsplit(".", 1)
+        export_path = f"{name}_{get_course_report_version(blocks)}.{extension}"
+        storage = get_storage("EXPORT_STORAGE")
+        if storage.exists(export_path):
+            update_job(job_id, rows_written=total_rows)
+        else:
+            records = _track_progress(job_id, iter_counted_rows(iter_course_late_submissions(blocks)))
+            writer = get_export_format(export_format).writer
+            save_export(storage, export_path, writer(records, schema=COURSE_REPORT_SCHEMA))
+        update_job(job_id, status=JOB_SUCCEEDED, download_url=storage.url(export_path))
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        log.exception("Course export job %s of %s failed.", job_id, course_id)
+        update_job(job_id, status=JOB_FAILED, error=str(exc))
+
+
+def run_job(function_path: str, *args) -> None:
+    """
+    Run the job function with the given dotted path.
+
+    Args:
+        function_path (str): The dotted path of the job function.
+        *args: The arguments of the job function.
+    """
+    import_string(function_path)(*args)
+
+
+if shared_task is not None:
+    run_job_task = shared_task(name="extemporaneous_grading.run_job")(run_job)
+else:  # pragma: no cover
+    run_job_task = None
+
+
+class JobExecutor:
+    """
+    Base class for the executors of the export jobs.
+    """
+
+    def submit(self, function: Callable, *args) -> None:
+        """
+        Run the job function with the given arguments in the background.
+        """
+        raise NotImplementedError
+
+
+class ThreadPoolJobExecutor(JobExecutor):
+    """
+    Executor that runs the jobs in an in-process thread pool.
+
+    The size of the pool is configured with the `EXPORT_JOB_WORKERS` XBlock setting.
+    """
+
+    _pool = None
+
+    @classmethod
+    def get_pool(cls) -> ThreadPoolExecutor:
+        """
+        Get the thread pool shared by the process.
+        """
+        if cls._pool is None:
+            cls._pool = ThreadPoolExecutor(
+                max_workers=get_xblock_settings().get("EXPORT_JOB_WORKERS", 2),
+                thread_name_prefix="extemporaneous_grading_export",
+            )
+        return cls._pool
+
+    def submit(self, function: Callable, *args) -> None:
+        """
+        Run the job in the thread pool.
+        """
+        self.get_pool().submit(function, *args)
+
+
+class CeleryJobExecutor(JobExecutor):
+    """
+    Executor that sends the jobs to a Celery task.
+
+    The task is `run_job_task` unless another one is configured with the
+    `EXPORT_JOB_TASK` XBlock setting. The task receives the dotted path of the
+    job function followed by its arguments. Any object with a Celery-like
+    `delay` method can be used, e.g. a local stand-in that runs the job
+    synchronously.
+    """
+
+    def __init__(self, task=None):
+        task_path = get_xblock_settings().get("EXPORT_JOB_TASK")
+        self.task = task or (import_string(task_path) if task_path else run_job_task)
+        if self.task is None:
+            raise ImportError("Celery is required to use the celery export job executor.")
+
+    def submit(self, function: Callable, *args) -> None:
+        """
+        Send the job to the task.
+        """
+        self.task.delay(f"{function.__module__}.{function.__name__}", *args)
+
+
+def get_job_executor() -> JobExecutor:
+    """
+    Get the executor of the export jobs according to the `EXPORT_JOB_EXECUTOR` setting.
+    """
+    executor = get_xblock_settings().get("EXPORT_JOB_EXECUTOR", DEFAULT_JOB_EXECUTOR)
+    return import_string(JOB_EXECUTORS.get(executor, executor))()
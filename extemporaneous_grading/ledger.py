@@ -0,0 +1,716 @@
+"""
+Late submission ledgers for the Extemporaneous Grading XBlock.
+
+A ledger keeps a record for each learner who accepted the late submission.
+The backend is selected with the `LEDGER_BACKEND` XBlock setting, which can be
+one of the aliases in `LEDGER_BACKENDS` or the dotted path of a subclass of
+`LateSubmissionLedger`.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils.module_loading import import_string
+
+from extemporaneous_grading.utils import get_storage, get_xblock_settings
+
+log = logging.getLogger(__name__)
+
+LEDGER_BACKENDS = {
+    "field": "extemporaneous_grading.ledger.FieldLedger",
+    "storage": "extemporaneous_grading.ledger.StorageLedger",
+}
+DEFAULT_LEDGER_BACKEND = "field"
+LEDGER_VERSION_LENGTH = 16
+DELTA_EXPORT_LAG_SECONDS = 10
+
+
+def encode_cursor(position: str) -> str:
+    """
+    Encode a position of a ledger as an opaque cursor.
+
+    Args:
+        position (str): The position in the ledger.
+
+    Returns:
+        str: The cursor.
+    """
+    return base64.urlsafe_b64encode(position.encode("utf8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Decode a cursor created with `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Raises:
+        ValueError: If the cursor is not valid.
+
+    Returns:
+        str: The position in the ledger.
+    """
+    try:
+        return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf8")
+    except (binascii.Error, UnicodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor}") from exc
+
+
+def parse_record_datetime(record: dict) -> datetime:
+    """
+    Get the acceptance datetime of a record in UTC.
+
+    Args:
+        record (dict): The late submission record.
+
+    Returns:
+        datetime: The datetime of the record, or the current datetime if the record has none.
+    """
+    if not record.get("datetime"):
+        return datetime.now(timezone.utc)
+    return datetime.fromisoformat(record["datetime"]).astimezone(timezone.utc)
+
+
+def validate_limit(limit: int | None) -> None:
+    """
+    Check the maximum number of records requested from a ledger.
+
+    Args:
+        limit (int | None): The maximum number of records, or None for no limit.
+
+    Raises:
+        ValueError: If the limit is not a positive number.
+    """
+    if limit is not None and limit < 1:
+        raise ValueError(f"Invalid limit: {limit}")
+
+
+def get_record_key(record: dict) -> str:
+    """
+    Get a key of a record that sorts in the order of the acceptance datetimes.
+
+    Args:
+        record (dict): The late submission record.
+
+    Returns:
+        str: The key of the record.
+    """
+    return f"{parse_record_datetime(record):%Y%m%dT%H%M%S%f}_{record['anonymous_user_id']}"
+
+
+class LateSubmissionLedger(ABC):
+    """
+    Base class for the late submission ledgers.
+
+    A record is a dict with the `anonymous_user_id`, `username`, `email` and
+    `datetime` of the learner who accepted the late submission.
+    """
+
+    @classmethod
+    @abstractmethod
+    def from_block(cls, block) -> LateSubmissionLedger:
+        """
+        Create the ledger of the given block.
+
+        Args:
+            block (XBlockExtemporaneousGrading): The block that owns the ledger.
+
+        Returns:
+            LateSubmissionLedger: The ledger instance.
+        """
+
+    @abstractmethod
+    def append(self, record: dict) -> None:
+        """
+        Append a record to the ledger.
+
+        Args:
+            record (dict): The late submission record.
+        """
+
+    @abstractmethod
+    def get(self, anonymous_user_id: str) -> dict | None:
+        """
+        Get the record of the given anonymous user ID.
+
+        Args:
+            anonymous_user_id (str): The anonymous user ID of the learner.
+
+        Returns:
+            dict | None: The late submission record, or None if the learner has no record.
+        """
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Iterate over the records of the ledger.
+        """
+
+    def __len__(self) -> int:
+        """
+        Get the number of records in the ledger.
+        """
+        return sum(1 for _ in self)
+
+    def __contains__(self, anonymous_user_id: str) -> bool:
+        """
+        Check if the given anonymous user ID has a record in the ledger.
+        """
+        return self.get(anonymous_user_id) is not None
+
+    def add(self, record: dict) -> bool:
+        """
+        Append the record unless the learner already has one.
+
+        The first record of each learner is kept, so accepting the late
+        submission several times does not create duplicated records.
+
+        Args:
+            record (dict): The late submission record.
+
+        Returns:
+            bool: True if the record was appended, False if the learner already had one.
+        """
+        if record["anonymous_user_id"] in self:
+            return False
+        self.append(record)
+        return True
+
+    def get_records_since(
+        self,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[dict], str]:
+        """
+        Get the records added after a cursor, in the order of their acceptance datetime.
+
+        This implementation reads and sorts all the records, so the backends
+        should override it with one that reads only the new records.
+
+        Args:
+            cursor (str, optional): The cursor returned by a previous call.
+            since (datetime, optional): Get the records accepted after this datetime when there is no cursor.
+            limit (int, optional): The maximum number of records to return.
+
+        Raises:
+            ValueError: If the cursor or the limit is not valid.
+
+        Returns:
+            tuple[list[dict], str]: The records and the cursor to get the next ones.
+        """
+        validate_limit(limit)
+        if cursor:
+            after = decode_cursor(cursor)
+            if after and "_" not in after:
+                raise ValueError(f"Invalid cursor: {cursor}")
+        elif since:
+            after = f"{since.astimezone(timezone.utc):%Y%m%dT%H%M%S%f}_~"
+        else:
+            after = ""
+
+        records = []
+        for key, record in sorted((get_record_key(record), record) for record in self):
+            if key <= after:
+                continue
+            if limit is not None and len(records) >= limit:
+                break
+            records.append(record)
+            after = key
+        return records, encode_cursor(after)
+
+    def version(self) -> str:
+        """
+        Get a hash of the content of the ledger.
+
+        The version changes whenever a record is added, so it can be used to
+        identify the exports of the ledger.
+
+        Returns:
+            str: The version of the ledger.
+        """
+        digest = hashlib.sha256()
+        for record in self:
+            digest.update(json.dumps(record, sort_keys=True).encode("utf8"))
+        return digest.hexdigest()[:LEDGER_VERSION_LENGTH]
+
+    def extend(self, records: Iterable[dict]) -> int:
+        """
+        Add several records to the ledger, skipping the learners that already have one.
+
+        Args:
+            records (Iterable[dict]): The late submission records.
+
+        Returns:
+            int: The number of appended records.
+        """
+        return sum(self.add_many(records))
+
+    def add_many(self, records: Iterable[dict]) -> list[bool]:
+        """
+        Add several records to the ledger, reporting the result of each one.
+
+        Args:
+            records (Iterable[dict]): The late submission records.
+
+        Returns:
+            list[bool]: For each record, True if it was appended and False if
+                the learner already had one.
+        """
+        return [self.add(record) for record in records]
+
+
+class FieldLedger(LateSubmissionLedger):
+    """
+    Ledger backed by the `late_submissions` field of the block.
+
+    All the records are stored in a single `Scope.user_state_summary` list, so
+    this backend is only suitable for blocks with few learners: the whole list
+    is loaded and saved by every request that accepts a late submission. The
+    index of the records by anonymous user ID is kept on the block, so it is
+    built once per request and then only extended with the new records.
+    """
+
+    def __init__(self, block):
+        self.block = block
+
+    @classmethod
+    def from_block(cls, block) -> FieldLedger:
+        """
+        Create the ledger of the given block.
+        """
+        return cls(block)
+
+    def append(self, record: dict) -> None:
+        """
+        Append a record to the `late_submissions` field.
+        """
+        self.block.late_submissions.append(record)
+
+    @property
+    def index(self) -> dict[str, dict]:
+        """
+        Get the first record of each anonymous user ID in the `late_submissions` field.
+
+        The index is shared by the ledgers of the same block instance. Only the
+        records appended since the last lookup are indexed, and the index is
+        rebuilt if the field is replaced.
+        """
+        records = self.block.late_submissions
+        state = self.block.__dict__.get("_late_submissions_index")
+        if state is None or state["records"] is not records:
+            state = {"records": records, "size": 0, "index": {}}
+            self.block.__dict__["_late_submissions_index"] = state
+        for record in records[state["size"] :]:
+            state["index"].setdefault(record["anonymous_user_id"], record)
+        state["size"] = len(records)
+        return state["index"]
+
+    def get(self, anonymous_user_id: str) -> dict | None:
+        """
+        Get the first record of the given anonymous user ID in the `late_submissions` field.
+        """
+        return self.index.get(anonymous_user_id)
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Iterate over the records of the `late_submissions` field.
+        """
+        return iter(self.block.late_submissions)
+
+    def __len__(self) -> int:
+        """
+        Get the number of records in the `late_submissions` field.
+        """
+        return len(self.block.late_submissions)
+
+    def get_records_since(
+        self,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[dict], str]:
+        """
+        Get the records after a position of the `late_submissions` field.
+
+        The records are appended in order, so the position in the list is the cursor.
+        """
+        validate_limit(limit)
+        records = self.block.late_submissions
+        if cursor:
+            position = decode_cursor(cursor)
+            if not position.isdigit():
+                raise ValueError(f"Invalid cursor: {cursor}")
+            start = int(position)
+        elif since:
+            start = next(
+                (index for index, record in enumerate(records) if parse_record_datetime(record) > since),
+                len(records),
+            )
+        else:
+            start = 0
+        end = len(records) if limit is None else min(start + limit, len(records))
+        return records[start:end], encode_cursor(str(end))
+
+
+class StorageLedger(LateSubmissionLedger):
+    """
+    Append-only ledger backed by a Django storage.
+
+    Each record is written as its own file, so concurrent acceptances never
+    rewrite shared data. The files are sharded in directories by a hash of the
+    `anonymous_user_id`:
+
+        late_submissions/{course_id}/{usage_id}/records/{shard}/{anonymous_user_id}.json
+
+    An empty file is also written for each record in an index ordered by the
+    acceptance datetime and partitioned by day:
+
+        late_submissions/{course_id}/{usage_id}/index/{YYYYMMDD}/{YYYYMMDDTHHMMSSffffff}_{anonymous_user_id}
+
+    The storage is configured with the `LEDGER_STORAGE` XBlock setting and
+    defaults to the Django default storage.
+    """
+
+    ROOT_DIRECTORY = "late_submissions"
+    SHARD_PREFIX_LENGTH = 2
+
+    def __init__(self, course_id: str, usage_id: str, storage: Storage | None = None):
+        self.course_id = str(course_id)
+        self.usage_id = str(usage_id)
+        self.storage = storage or get_storage("LEDGER_STORAGE")
+
+    @classmethod
+    def from_block(cls, block) -> StorageLedger:
+        """
+        Create the ledger of the given block.
+        """
+        return cls(block.course_id, block.scope_ids.usage_id)
+
+    @property
+    def root(self) -> str:
+        """
+        Get the directory of the ledger in the storage.
+        """
+        return f"{self.ROOT_DIRECTORY}/{self.course_id}/{self.usage_id}"
+
+    @property
+    def records_directory(self) -> str:
+        """
+        Get the directory of the records in the storage.
+        """
+        return f"{self.root}/records"
+
+    @classmethod
+    def get_shard(cls, anonymous_user_id: str) -> str:
+        """
+        Get the shard of the given anonymous user ID.
+
+        Args:
+            anonymous_user_id (str): The anonymous user ID of the learner.
+
+        Returns:
+            str: The shard name.
+        """
+        return hashlib.sha1(anonymous_user_id.encode("utf8")).hexdigest()[: cls.SHARD_PREFIX_LENGTH]
+
+    def get_record_path(self, anonymous_user_id: str) -> str:
+        """
+        Get the path of the record of the given anonymous user ID.
+
+        Args:
+            anonymous_user_id (str): The anonymous user ID of the learner.
+
+        Returns:
+            str: The path of the record in the storage.
+        """
+        return f"{self.records_directory}/{self.get_shard(anonymous_user_id)}/{anonymous_user_id}.json"
+
+    @property
+    def index_directory(self) -> str:
+        """
+        Get the directory of the index by acceptance datetime in the storage.
+        """
+        return f"{self.root}/index"
+
+    @staticmethod
+    def get_index_key(acceptance_datetime: datetime, anonymous_user_id: str = "") -> str:
+        """
+        Get the key of a record in the index by acceptance datetime.
+
+        The keys sort in the order of the acceptance datetimes.
+
+        Args:
+            acceptance_datetime (datetime): The acceptance datetime in UTC.
+            anonymous_user_id (str, optional): The anonymous user ID of the learner.
+
+        Returns:
+            str: The key of the record, relative to the index directory.
+        """
+        return f"{acceptance_datetime:%Y%m%d}/{acceptance_datetime:%Y%m%dT%H%M%S%f}_{anonymous_user_id}"
+
+    def _write_index_entry(self, record: dict) -> None:
+        """
+        Write the entry of the record in the index by acceptance datetime.
+        """
+        key = self.get_index_key(parse_record_datetime(record), record["anonymous_user_id"])
+        self.storage.save(f"{self.index_directory}/{key}", ContentFile(b""))
+
+    def append(self, record: dict) -> None:
+        """
+        Write the record in its own file in the storage.
+        """
+        path = self.get_record_path(record["anonymous_user_id"])
+        self.storage.save(path, ContentFile(json.dumps(record).encode("utf8")))
+        self._write_index_entry(record)
+
+    def add(self, record: dict) -> bool:
+        """
+        Write the record unless the learner already has one.
+
+        The existence check is a single lookup of the record path. When two
+        requests of the same learner race, the storage saves the second file
+        with an alternative name, which is deleted so only the first record is
+        kept. This requires a storage that never overwrites existing files,
+        e.g. `S3Boto3Storage` with `AWS_S3_FILE_OVERWRITE = False`; with an
+        overwriting storage the last of the racing records is kept instead,
+        and both write an index entry, so `get_records_since` returns the
+        learner twice.
+        """
+        path = self.get_record_path(record["anonymous_user_id"])
+        if self.storage.exists(path):
+            return False
+        saved_path = self.storage.save(path, ContentFile(json.dumps(record).encode("utf8")))
+        if saved_path != path:
+            self.storage.delete(saved_path)
+            return False
+        self._write_index_entry(record)
+        return True
+
+    def get(self, anonymous_user_id: str) -> dict | None:
+        """
+        Read the record of the given anonymous user ID from the storage.
+        """
+        path = self.get_record_path(anonymous_user_id)
+        if not self.storage.exists(path):
+            return None
+        return self.read_record(path)
+
+    def __contains__(self, anonymous_user_id: str) -> bool:
+        """
+        Check if the record of the given anonymous user ID exists without reading it.
+        """
+        return self.storage.exists(self.get_record_path(anonymous_user_id))
+
+    def _listdir(self, path: str) -> tuple[list[str], list[str]]:
+        """
+        List a directory of the storage, treating a missing directory as empty.
+        """
+        try:
+            return self.storage.listdir(path)
+        except FileNotFoundError:
+            return [], []
+
+    def iter_record_paths(self) -> Iterator[str]:
+        """
+        Iterate over the paths of the records in the storage, shard by shard.
+        """
+        shards, _ = self._listdir(self.records_directory)
+        for shard in sorted(shards):
+            _, filenames = self._listdir(f"{self.records_directory}/{shard}")
+            for filename in sorted(filenames):
+                yield f"{self.records_directory}/{shard}/{filename}"
+
+    def read_record(self, path: str) -> dict:
+        """
+        Read the record stored in the given path.
+
+        Args:
+            path (str): The path of the record in the storage.
+
+        Returns:
+            dict: The late submission record.
+        """
+        with self.storage.open(path) as file:
+            return json.loads(file.read())
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Iterate over the records stored in the storage.
+        """
+        for path in self.iter_record_paths():
+            yield self.read_record(path)
+
+    def __len__(self) -> int:
+        """
+        Get the number of records without reading them.
+        """
+        return sum(1 for _ in self.iter_record_paths())
+
+    def iter_index_keys(self, after: str = "") -> Iterator[str]:
+        """
+        Iterate over the keys of the index after the given one, in order.
+
+        Only the days after the one of the given key are listed.
+
+        Args:
+            after (str, optional): The key to start after.
+
+        Yields:
+            str: The keys of the index.
+        """
+        after_day = after.split("/", 1)[0]
+        days, _ = self._listdir(self.index_directory)
+        for day in sorted(days):
+            if day < after_day:
+                continue
+            _, names = self._listdir(f"{self.index_directory}/{day}")
+            for name in sorted(names):
+                key = f"{day}/{name}"
+                if key > after:
+                    yield key
+
+    def get_records_since(
+        self,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[dict], str]:
+        """
+        Get the records after a key of the index by acceptance datetime.
+
+        Only the index entries of the days after the cursor are listed and only
+        the new records are read. The keys of the index are taken from the
+        acceptance datetime, before the record is written, so the records
+        accepted in the last `DELTA_EXPORT_LAG_SECONDS` seconds (an XBlock
+        setting) are left for a later call. Otherwise, a record still being
+        written when the cursor moves past its key would never be returned.
+        """
+        validate_limit(limit)
+        lag = get_xblock_settings().get("DELTA_EXPORT_LAG_SECONDS", DELTA_EXPORT_LAG_SECONDS)
+        horizon = self.get_index_key(datetime.now(timezone.utc) - timedelta(seconds=lag))
+        if cursor:
+            after = decode_cursor(cursor)
+            if after and "/" not in after:
+                raise ValueError(f"Invalid cursor: {cursor}")
+        elif since:
+            after = self.get_index_key(since.astimezone(timezone.utc), "~")
+        else:
+            after = ""
+
+        records = []
+        for key in self.iter_index_keys(after):
+            if key >= horizon or (limit is not None and len(records) >= limit):
+                break
+            anonymous_user_id = key.split("/", 1)[1].split("_", 1)[1]
+            records.append(self.read_record(self.get_record_path(anonymous_user_id)))
+            after = key
+        return records, encode_cursor(after)
+
+    def version(self) -> str:
+        """
+        Get a hash of the paths of the records without reading them.
+
+        The records are never rewritten, so their paths identify the content of the ledger.
+        """
+        digest = hashlib.sha256()
+        for path in self.iter_record_paths():
+            digest.update(path.encode("utf8"))
+        return digest.hexdigest()[:LEDGER_VERSION_LENGTH]
+
+
+def get_ledger(block) -> LateSubmissionLedger:
+    """
+    Get the ledger of the given block according to the `LEDGER_BACKEND` setting.
+
+    Args:
+        block (XBlockExtemporaneousGrading): The block that owns the ledger.
+
+    Returns:
+        LateSubmissionLedger: The ledger of the block.
+    """
+    backend = get_xblock_settings().get("LEDGER_BACKEND", DEFAULT_LEDGER_BACKEND)
+    ledger_class = import_string(LEDGER_BACKENDS.get(backend, backend))
+    return ledger_class.from_block(block)
+
+
+def iter_late_submissions(block) -> Iterator[dict]:
+    """
+    Iterate over all the late submissions of the given block.
+
+    This is the compatibility reader for the legacy `late_submissions` field:
+    the records that have not been migrated to the ledger yet are returned
+    first, followed by the records of the ledger. Only the first record of
+    each learner is returned.
+
+    Args:
+        block (XBlockExtemporaneousGrading): The block that owns the submissions.
+
+    Yields:
+        dict: The late submission records.
+    """
+    ledger = get_ledger(block)
+    if isinstance(ledger, FieldLedger):
+        seen = set()
+        for record in ledger:
+            if record["anonymous_user_id"] not in seen:
+                seen.add(record["anonymous_user_id"])
+                yield record
+        return
+
+    seen = set()
+    for record in block.late_submissions:
+        anonymous_user_id = record["anonymous_user_id"]
+        if anonymous_user_id not in seen and anonymous_user_id not in ledger:
+            seen.add(anonymous_user_id)
+            yield record
+    yield from ledger
+
+
+def count_late_submissions(block) -> int:
+    """
+    Count the late submissions returned by `iter_late_submissions` without reading the ledger records.
+
+    Args:
+        block (XBlockExtemporaneousGrading): The block that owns the submissions.
+
+    Returns:
+        int: The number of late submissions.
+    """
+    ledger = get_ledger(block)
+    if isinstance(ledger, FieldLedger):
+        return len(ledger.index)
+    legacy_user_ids = {record["anonymous_user_id"] for record in block.late_submissions}
+    return len(ledger) + sum(1 for anonymous_user_id in legacy_user_ids if anonymous_user_id not in ledger)
+
+
+def migrate_late_submissions(block) -> int:
+    """
+    Move the records of the legacy `late_submissions` field to the ledger.
+
+    Duplicated records of a learner are dropped, keeping the first one.
+
+    Args:
+        block (XBlockExtemporaneousGrading): The block that owns the submissions.
+
+    Returns:
+        int: The number of migrated records.
+    """
+    ledger = get_ledger(block)
+    if isinstance(ledger, FieldLedger) or not block.late_submissions:
+        return 0
+    migrated = ledger.extend(block.late_submissions)
+    block.late_submissions = []
+    log.info("Migrated %s late submissions of %s to the ledger.", migrated, block.scope_ids.usage_id)
+    return migrated
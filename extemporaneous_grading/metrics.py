@@ -0,0 +1,279 @@
+"""
+Metrics of the Extemporaneous Grading XBlock.
+
+The block reports timers of the phases of its views, counters of the late
+submissions and exports, and gauges of the size of the ledgers to a metrics
+sink, configured with the `METRICS_SINK` XBlock setting. The value is one of the
+aliases in `METRICS_SINKS` or the dotted path of a subclass of `MetricsSink`,
+and the `METRICS_OPTIONS` XBlock setting has the keyword arguments of the sink,
+e.g. `{"host": "statsd", "port": 8125}` for the `statsd` sink.
+
+The default `noop` sink discards the metrics, so the instrumentation costs a
+settings lookup when the metrics are disabled.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from typing import ContextManager, Iterable, Iterator
+
+from django.utils.module_loading import import_string
+
+from extemporaneous_grading.utils import get_xblock_settings
+
+METRICS_SINKS = {
+    "noop": "extemporaneous_grading.metrics.NoopMetricsSink",
+    "statsd": "extemporaneous_grading.metrics.StatsdMetricsSink",
+    "memory": "extemporaneous_grading.metrics.InMemoryMetricsSink",
+}
+DEFAULT_METRICS_SINK = "noop"
+METRICS_PREFIX = "extemporaneous_grading"
+
+
+class MetricsSink:
+    """
+    Base class for the sinks of the metrics.
+
+    Subclasses implement `timing`, `increment` and `gauge`. The `enabled`
+    attribute is False for sinks that discard the metrics, so the callers can
+    skip computing the values of the metrics.
+    """
+
+    enabled = True
+
+    def timing(self, name: str, milliseconds: float) -> None:
+        """
+        Report the duration of an operation.
+
+        Args:
+            name (str): The name of the metric.
+            milliseconds (float): The duration in milliseconds.
+        """
+        raise NotImplementedError
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name (str): The name of the metric.
+            value (int, optional): The amount to add to the counter.
+        """
+        raise NotImplementedError
+
+    def gauge(self, name: str, value: float) -> None:
+        """
+        Report the current value of a quantity.
+
+        Args:
+            name (str): The name of the metric.
+            value (float): The value.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Report the duration of the block of the context manager.
+
+        Args:
+            name (str): The name of the metric.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing(name, (time.perf_counter() - start) * 1000)
+
+
+class NoopMetricsSink(MetricsSink):
+    """
+    Sink that discards the metrics.
+    """
+
+    enabled = False
+    _null_timer = nullcontext()
+
+    def timing(self, name: str, milliseconds: float) -> None:
+        """
+        Discard the duration.
+        """
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Discard the increment.
+        """
+
+    def gauge(self, name: str, value: float) -> None:
+        """
+        Discard the value.
+        """
+
+    def timer(self, name: str) -> ContextManager[None]:
+        """
+        Get a context manager that does not measure its block.
+        """
+        return self._null_timer
+
+
+class StatsdMetricsSink(MetricsSink):
+    """
+    Sink that sends the metrics to a statsd server over UDP.
+
+    Each metric is sent in its own datagram, prefixed with `prefix`. The
+    datagrams are sent without waiting for the server, and the errors to send
+    them are ignored, so the metrics never fail a request.
+
+    Args:
+        host (str, optional): The host of the statsd server.
+        port (int, optional): The UDP port of the statsd server.
+        prefix (str, optional): The prefix of the names of the metrics.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 8125, prefix: str = METRICS_PREFIX):
+        self.address = (host, port)
+        self.prefix = f"{prefix}." if prefix else ""
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def send(self, name: str, value: float, metric_type: str) -> None:
+        """
+        Send a metric in the statsd format.
+
+        Args:
+            name (str): The name of the metric.
+            value (float): The value of the metric.
+            metric_type (str): The statsd type of the metric: `ms`, `c` or `g`.
+        """
+        try:
+            self.socket.sendto(f"{self.prefix}{name}:{value:g}|{metric_type}".encode("utf8"), self.address)
+        except OSError:
+            pass
+
+    def timing(self, name: str, milliseconds: float) -> None:
+        """
+        Send the duration as a statsd timer.
+        """
+        self.send(name, round(milliseconds, 3), "ms")
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Send the increment as a statsd counter.
+        """
+        self.send(name, value, "c")
+
+    def gauge(self, name: str, value: float) -> None:
+        """
+        Send the value as a statsd gauge.
+        """
+        self.send(name, value, "g")
+
+
+class InMemoryMetricsSink(MetricsSink):
+    """
+    Sink that keeps the metrics in memory, e.g. to check them in tests.
+
+    The durations of each timer are kept in order, the counters are summed and
+    the gauges keep their last value.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.counters = Counter()
+        self.gauges = {}
+
+    def timing(self, name: str, milliseconds: float) -> None:
+        """
+        Keep the duration.
+        """
+        with self.lock:
+            self.timings[name].append(milliseconds)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Add the increment to the counter.
+        """
+        with self.lock:
+            self.counters[name] += value
+
+    def gauge(self, name: str, value: float) -> None:
+        """
+        Keep the value of the gauge.
+        """
+        with self.lock:
+            self.gauges[name] = value
+
+    def reset(self) -> None:
+        """
+        Discard the metrics kept.
+        """
+        with self.lock:
+            self.timings.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+
+NOOP_METRICS_SINK = NoopMetricsSink()
+
+
+@lru_cache(maxsize=None)
+def load_metrics_sink(sink: str, options: str) -> MetricsSink:
+    """
+    Create the metrics sink of the given alias or dotted path, once per process.
+
+    Args:
+        sink (str): The alias or dotted path of the sink.
+        options (str): The keyword arguments of the sink as JSON.
+
+    Returns:
+        MetricsSink: The metrics sink.
+    """
+    return import_string(METRICS_SINKS.get(sink, sink))(**json.loads(options))
+
+
+def get_metrics_sink() -> MetricsSink:
+    """
+    Get the metrics sink according to the `METRICS_SINK` and `METRICS_OPTIONS` settings.
+
+    Returns:
+        MetricsSink: The metrics sink, shared by all the calls with the same settings.
+    """
+    xblock_settings = get_xblock_settings()
+    sink = xblock_settings.get("METRICS_SINK", DEFAULT_METRICS_SINK)
+    if sink == DEFAULT_METRICS_SINK:
+        return NOOP_METRICS_SINK
+    return load_metrics_sink(sink, json.dumps(xblock_settings.get("METRICS_OPTIONS", {}), sort_keys=True))
+
+
+def iter_counted_rows(records: Iterable[dict], ledger_size: bool = False) -> Iterable[dict]:
+    """
+    Count the records of an export in the `exports.rows` counter once they are all read.
+
+    Args:
+        records (Iterable[dict]): The records of the export.
+        ledger_size (bool, optional): Whether the records are the whole ledger
+            of a block, so their number is also reported in the `ledger.size` gauge.
+
+    Returns:
+        Iterable[dict]: The records.
+    """
+    metrics = get_metrics_sink()
+    if not metrics.enabled:
+        return records
+
+    def count() -> Iterator[dict]:
+        rows = 0
+        for rows, record in enumerate(records, start=1):
+            yield record
+        metrics.increment("exports.rows", rows)
+        if ledger_size:
+            metrics.gauge("ledger.size", rows)
+
+    return count()
@@ -0,0 +1,139 @@
+"""
+On-demand profiling of the Extemporaneous Grading XBlock.
+
+A fraction of the calls of the student view and of the `set_late_submission`
+and `download_csv` handlers, set with the `PROFILING_SAMPLE_RATE` XBlock
+setting, is run under `cProfile`. The course team can also force the profile
+of a request by adding the `PROFILE_REQUEST_PARAM` query parameter to its URL,
+which requires `django-crum` to find the current request.
+
+Each profile is written in the `pstats` format to the storage configured with
+the `PROFILING_STORAGE` XBlock setting, under the course, usage ID, operation
+and deadline phase of the call, so it can be read with
+`python -m pstats <file>`. Only the thread of the call is profiled, e.g. the
+children rendered in parallel are not part of the profile.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import logging
+import marshal
+import random
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from extemporaneous_grading.utils import get_storage, get_xblock_settings
+
+try:
+    from crum import get_current_request
+except ImportError:  # pragma: no cover
+    get_current_request = None
+
+log = logging.getLogger(__name__)
+
+PROFILES_DIRECTORY = "extemporaneous_grading/profiles"
+PROFILE_REQUEST_PARAM = "profile_extemporaneous_grading"
+PROFILING_SAMPLE_RATE = 0
+
+
+def is_profile_requested() -> bool:
+    """
+    Check if the current request asks for a profile with the `PROFILE_REQUEST_PARAM` query parameter.
+
+    Returns:
+        bool: True if the parameter is set, False if it is not or the current
+            request is not available.
+    """
+    if get_current_request is None:
+        return False
+    request = get_current_request()
+    return request is not None and bool(request.GET.get(PROFILE_REQUEST_PARAM))
+
+
+def should_profile(forced: bool = False) -> bool:
+    """
+    Decide if a call is profiled according to the `PROFILING_SAMPLE_RATE` setting.
+
+    Args:
+        forced (bool, optional): Whether the profile was requested for the call.
+
+    Returns:
+        bool: True if the call must be profiled.
+    """
+    if forced:
+        return True
+    sample_rate = get_xblock_settings().get("PROFILING_SAMPLE_RATE", PROFILING_SAMPLE_RATE)
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def get_profile_path(course_id: str, usage_id: str, operation: str, phase: str) -> str:
+    """
+    Get the path in the storage of a new profile.
+
+    Args:
+        course_id (str): The course ID of the block.
+        usage_id (str): The usage ID of the block.
+        operation (str): The profiled view or handler.
+        phase (str): The deadline phase of the block.
+
+    Returns:
+        str: The path of the profile.
+    """
+    name = f"{timezone.now():%Y%m%dT%H%M%S%f}_{phase}_{uuid.uuid4().hex[:8]}.prof"
+    return f"{PROFILES_DIRECTORY}/{course_id}/{usage_id}/{operation}/{name}"
+
+
+def save_profile(profiler: cProfile.Profile, path: str) -> str | None:
+    """
+    Write the statistics of a profiler to the profiling storage.
+
+    The errors are logged instead of raised, so a profile never fails the call.
+
+    Args:
+        profiler (cProfile.Profile): The disabled profiler.
+        path (str): The path of the profile in the storage.
+
+    Returns:
+        str | None: The path where the profile was saved, or None if it failed.
+    """
+    try:
+        profiler.create_stats()
+        saved_path = get_storage("PROFILING_STORAGE").save(path, ContentFile(marshal.dumps(profiler.stats)))
+    except Exception:  # pylint: disable=broad-exception-caught
+        log.exception("The profile %s could not be saved.", path)
+        return None
+    log.info("Saved the profile %s.", saved_path)
+    return saved_path
+
+
+@contextmanager
+def profile(course_id: str, usage_id: str, operation: str, phase: str) -> Iterator[None]:
+    """
+    Profile the block of the context manager and save the profile.
+
+    If another profiler is active in the thread, the block is run without
+    being profiled.
+
+    Args:
+        course_id (str): The course ID of the block.
+        usage_id (str): The usage ID of the block.
+        operation (str): The profiled view or handler.
+        phase (str): The deadline phase of the block.
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        log.warning("Another profiler is active, %s of %s is not profiled.", operation, usage_id)
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        save_profile(profiler, get_profile_path(course_id, usage_id, operation, phase))
@@ -0,0 +1,152 @@
+"""
+Course-wide reports of the late submissions of the Extemporaneous Grading XBlock.
+
+The report walks all the Extemporaneous Grading blocks of a course and merges
+the records of their storage ledgers in one pass. The blocks are loaded from the
+modulestore, outside of the request of a block, so they are not bound to the
+field data of the LMS: the records of the `field` ledger and of the legacy
+`late_submissions` field cannot be read and are only included in the export of
+each component.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, NamedTuple
+
+from extemporaneous_grading.exports import LATE_SUBMISSION_SCHEMA, STRING, Schema
+from extemporaneous_grading.ledger import LEDGER_VERSION_LENGTH, StorageLedger
+from extemporaneous_grading.utils import get_xblock_settings
+
+try:
+    from opaque_keys.edx.keys import CourseKey
+    from xmodule.modulestore.django import modulestore
+except ImportError:  # pragma: no cover
+    CourseKey = None
+    modulestore = None
+
+COURSE_REPORT_SCHEMA: Schema = (("usage_id", STRING), ("display_name", STRING)) + tuple(LATE_SUBMISSION_SCHEMA)
+COURSE_REPORT_BATCH_SIZE = 20
+COURSE_REPORT_WORKERS = 4
+
+
+class CourseBlock(NamedTuple):
+    """
+    Extemporaneous Grading block included in a course report.
+    """
+
+    usage_id: str
+    display_name: str
+    block: Any
+
+
+def get_course_blocks(course_id: str, category: str) -> list[CourseBlock]:
+    """
+    Get the blocks of the given category in a course from the modulestore.
+
+    Args:
+        course_id (str): The course ID.
+        category (str): The category of the blocks.
+
+    Raises:
+        RuntimeError: If the modulestore is not available.
+
+    Returns:
+        list[CourseBlock]: The blocks of the course.
+    """
+    if modulestore is None:
+        raise RuntimeError("The modulestore is required to build course reports.")
+    items = modulestore().get_items(CourseKey.from_string(str(course_id)), qualifiers={"category": category})
+    return [CourseBlock(str(item.location), item.display_name, item) for item in items]
+
+
+def _batched(blocks: Iterable[CourseBlock], batch_size: int) -> Iterator[list[CourseBlock]]:
+    """
+    Split the blocks in lists of `batch_size` blocks.
+    """
+    iterator = iter(blocks)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def get_course_block_ledger(block: CourseBlock) -> StorageLedger:
+    """
+    Get the storage ledger of a block of the course.
+
+    Args:
+        block (CourseBlock): The block of the course.
+
+    Returns:
+        StorageLedger: The ledger of the block.
+    """
+    return StorageLedger.from_block(block.block)
+
+
+def count_course_late_submissions(blocks: Iterable[CourseBlock]) -> int:
+    """
+    Count the late submissions in the storage ledgers of the given blocks.
+
+    Args:
+        blocks (Iterable[CourseBlock]): The blocks of the course.
+
+    Returns:
+        int: The number of records.
+    """
+    workers = get_xblock_settings().get("COURSE_REPORT_WORKERS", COURSE_REPORT_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(lambda block: len(get_course_block_ledger(block)), blocks))
+
+
+def get_course_report_version(blocks: Iterable[CourseBlock]) -> str:
+    """
+    Get a hash of the content of the report of the given blocks.
+
+    The version combines the version of the storage ledger of each block, so
+    it changes whenever a late submission is added to any of them.
+
+    Args:
+        blocks (Iterable[CourseBlock]): The blocks of the course.
+
+    Returns:
+        str: The version of the report.
+    """
+
+    def get_block_version(block: CourseBlock) -> str:
+        return f"{block.usage_id}\n{block.display_name}\n{get_course_block_ledger(block).version()}\n"
+
+    digest = hashlib.sha256()
+    workers = get_xblock_settings().get("COURSE_REPORT_WORKERS", COURSE_REPORT_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for block_version in pool.map(get_block_version, blocks):
+            digest.update(block_version.encode("utf8"))
+    return digest.hexdigest()[:LEDGER_VERSION_LENGTH]
+
+
+def iter_course_late_submissions(
+    blocks: Iterable[CourseBlock],
+    batch_size: int = COURSE_REPORT_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Iterate over the late submissions in the storage ledgers of all the given blocks.
+
+    The ledgers are read in batches of `batch_size` blocks, fanning out each
+    batch over a pool of `COURSE_REPORT_WORKERS` threads. The records are
+    returned block by block, in the order of the blocks, with the `usage_id`
+    and `display_name` of their block.
+
+    Args:
+        blocks (Iterable[CourseBlock]): The blocks of the course.
+        batch_size (int, optional): The number of ledgers read at the same time.
+
+    Yields:
+        dict: The late submission records with the block information.
+    """
+    workers = get_xblock_settings().get("COURSE_REPORT_WORKERS", COURSE_REPORT_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in _batched(blocks, batch_size):
+            ledgers = pool.map(lambda block: list(get_course_block_ledger(block)), batch)
+            for block, records in zip(batch, ledgers):
+                for record in records:
+                    yield {"usage_id": block.usage_id, "display_name": block.display_name, **record}
@@ -0,0 +1,241 @@
+"""
+Static assets and translations of the Extemporaneous Grading XBlock.
+
+The assets are read from the package once per process and the same strings are
+returned afterwards. They can also be served with `local_resource_url` under a
+fingerprinted URI, `public/assets/{digest}/{path}`, so the URL of an asset
+changes with its content and can be cached for as long as the runtime allows.
+
+The JavaScript translation files are indexed by locale the first time they are
+needed, so resolving the file of a language does not touch the filesystem.
+
+The Django templates are compiled once per process. They are translated when
+they are rendered, so the same compiled template serves every language. The
+`trans` nodes of XBlock keep the translation they restore after merging the
+catalog of the block, so they are reset before each render, which is done
+under a lock since the nodes are shared by the threads of the process.
+
+The resources are read with `importlib.resources` instead of `pkg_resources`,
+which scans every installed distribution when it is imported.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from django.template import Context, Engine, Template
+from django.template.backends.django import get_installed_libraries
+from django.utils import translation
+from xblock.utils.templatetags.i18n import ProxyTransNode
+
+try:
+    from importlib.resources import files
+except ImportError:  # pragma: no cover
+    files = None
+
+ASSETS_URI_PREFIX = "public/assets/"
+ASSET_DIGEST_LENGTH = 12
+STATIC_CSS = ("static/css/extemporaneous_grading.css",)
+STATIC_JS = (
+    "static/js/src/extemporaneous_grading.js",
+    "static/js/src/resize_iframe.js",
+)
+STATIC_ASSETS = STATIC_CSS + STATIC_JS
+TRANSLATIONS_DIR = "public/js/translations"
+TRANSLATIONS_JS = "text.js"
+FALLBACK_LOCALE = "en"
+TEMPLATE_LIBRARIES = {"i18n": "xblock.utils.templatetags.i18n"}
+TEMPLATE_RENDER_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_package_root():
+    """
+    Get the root directory of the resources of the package.
+
+    On Python 3.8, where `importlib.resources.files` is not available, the
+    directory of the package is used, since it is installed unzipped.
+
+    Returns:
+        Traversable: The root directory of the package.
+    """
+    if files is None:  # pragma: no cover
+        return Path(__file__).parent
+    return files(__package__)
+
+
+@lru_cache(maxsize=None)
+def get_resource(path: str) -> str:
+    """
+    Get a resource of the package as a string, reading it only once per process.
+
+    Args:
+        path (str): The path of the resource in the package.
+
+    Returns:
+        str: The content of the resource.
+    """
+    return get_package_root().joinpath(path).read_text(encoding="utf8")
+
+
+@lru_cache(maxsize=None)
+def get_asset_digest(path: str) -> str:
+    """
+    Get the fingerprint of the content of a static asset.
+
+    Args:
+        path (str): The path of the asset in the package.
+
+    Returns:
+        str: The fingerprint of the asset.
+    """
+    return hashlib.sha256(get_resource(path).encode("utf8")).hexdigest()[:ASSET_DIGEST_LENGTH]
+
+
+def get_asset_uri(path: str) -> str:
+    """
+    Get the fingerprinted URI of a static asset to be passed to `local_resource_url`.
+
+    Args:
+        path (str): The path of the asset in the package.
+
+    Returns:
+        str: The URI of the asset.
+    """
+    return f"{ASSETS_URI_PREFIX}{get_asset_digest(path)}/{path}"
+
+
+def open_asset(uri: str) -> io.BytesIO | None:
+    """
+    Open the static asset of the given fingerprinted URI.
+
+    Only the `STATIC_ASSETS` are served, and only with the fingerprint of their
+    current content.
+
+    Args:
+        uri (str): The URI of the asset.
+
+    Returns:
+        io.BytesIO | None: The content of the asset, or None if the URI is not
+            the URI of a static asset.
+    """
+    if not uri.startswith(ASSETS_URI_PREFIX):
+        return None
+    digest, _, path = uri[len(ASSETS_URI_PREFIX) :].partition("/")
+    if path not in STATIC_ASSETS or digest != get_asset_digest(path):
+        return None
+    return io.BytesIO(get_resource(path).encode("utf8"))
+
+
+@lru_cache(maxsize=None)
+def get_translations_index() -> dict[str, str]:
+    """
+    Get the JavaScript translation files of the package by locale.
+
+    The translations directory is scanned once per process.
+
+    Returns:
+        dict[str, str]: The path of the `text.js` file of each locale.
+    """
+    translations_dir = get_package_root().joinpath(TRANSLATIONS_DIR)
+    if not translations_dir.is_dir():
+        return {}
+    index = {}
+    for locale_dir in translations_dir.iterdir():
+        if locale_dir.joinpath(TRANSLATIONS_JS).is_file():
+            index[locale_dir.name] = f"{TRANSLATIONS_DIR}/{locale_dir.name}/{TRANSLATIONS_JS}"
+    return index
+
+
+@lru_cache(maxsize=None)
+def get_translations_js(language: str) -> str | None:
+    """
+    Get the JavaScript translation file of a language.
+
+    The file of the full locale is preferred, then the file of the language code
+    and then the file of the fallback locale.
+
+    Args:
+        language (str): The language, e.g. `es-419`.
+
+    Returns:
+        str | None: The path of the translation file, or None if there is none.
+    """
+    index = get_translations_index()
+    for locale in (translation.to_locale(language), language.split("-")[0], FALLBACK_LOCALE):
+        if locale in index:
+            return index[locale]
+    return None
+
+
+@lru_cache(maxsize=None)
+def get_template_engine() -> Engine:
+    """
+    Get the Django template engine of the templates of the package.
+
+    The engine has the installed template tag libraries, with the `i18n` library
+    replaced by the one of XBlock, which translates with the i18n service of
+    the block. It is created once per process.
+
+    Returns:
+        Engine: The template engine.
+    """
+    return Engine(libraries={**get_installed_libraries(), **TEMPLATE_LIBRARIES})
+
+
+@lru_cache(maxsize=None)
+def get_template(path: str) -> Template:
+    """
+    Get a Django template of the package, compiling it only once per process.
+
+    Args:
+        path (str): The path of the template in the package.
+
+    Returns:
+        Template: The compiled template.
+    """
+    return Template(get_resource(path), engine=get_template_engine())
+
+
+@lru_cache(maxsize=None)
+def get_translation_nodes(path: str) -> list[ProxyTransNode]:
+    """
+    Get the XBlock `trans` and `blocktrans` nodes of a compiled template.
+
+    Args:
+        path (str): The path of the template in the package.
+
+    Returns:
+        list[ProxyTransNode]: The translation nodes of the template.
+    """
+    return get_template(path).nodelist.get_nodes_by_type(ProxyTransNode)
+
+
+def render_template(path: str, context: dict | None = None, i18n_service=None) -> str:
+    """
+    Render a Django template of the package with the given context.
+
+    Each `ProxyTransNode` caches the Django translation that it restores after
+    merging the catalog of the i18n service into the active translation. When
+    the node is reused, that cached translation is the one that receives the
+    merge, so the catalog of the block would leak into the translations of the
+    whole process. The caches are cleared before each render, as if the
+    template had just been compiled.
+
+    Args:
+        path (str): The path of the template in the package.
+        context (dict, optional): The context to render in the template.
+        i18n_service (optional): The i18n service used to translate the template.
+
+    Returns:
+        str: The rendered template.
+    """
+    template = get_template(path)
+    with TEMPLATE_RENDER_LOCK:
+        for node in get_translation_nodes(path):
+            node._translations.clear()  # pylint: disable=protected-access
+        return template.render(Context({**(context or {}), "_i18n_service": i18n_service}))
@@ -1,31 +1,162 @@
 /* Javascript for XBlockExtemporaneousGrading. */
-function XBlockExtemporaneousGrading(runtime, element) {
+function XBlockExtemporaneousGrading(runtime, element, initArgs) {
   const setLateSubmission = runtime.handlerUrl(element, "set_late_submission");
-  const downloadCSV = runtime.handlerUrl(element, "download_csv");
+  const startExport = runtime.handlerUrl(element, "start_export");
+  const startCourseExport = runtime.handlerUrl(element, "start_course_export");
+  const exportStatus = runtime.handlerUrl(element, "export_status");
+  const childrenFragment = runtime.handlerUrl(element, "children_fragment");
+  const viewFragment = runtime.handlerUrl(element, "view_fragment");
+  const deadlineEvents = runtime.handlerUrl(element, "deadline_events");
+  // Longest delay accepted by setTimeout.
+  const MAX_TIMEOUT = 2147483647;
+  const loadedResources = new Set();
+  let transitionArgs = initArgs || {};
+  let transitionTimer = null;
+  let eventSource = null;
+  const EXPORT_POLLING_INTERVAL = 2000;
 
-  $(element)
-    .find(`#late_submission`)
-    .click(function () {
-      const data = {};
-      $.post(setLateSubmission, JSON.stringify(data))
-        .done(function (response) {
-          window.location.reload(false);
-        })
-        .fail(function () {
-          console.log("Error to accept late submission");
-        });
+  function pollExportStatus(jobId, button) {
+    $.post(exportStatus, JSON.stringify({ job_id: jobId }))
+      .done(function (response) {
+        if (response.status === "succeeded") {
+          button.prop("disabled", false);
+          window.location.href = response.download_url;
+        } else if (response.status === "failed") {
+          button.prop("disabled", false);
+          console.log("Error to export CSV: " + response.error);
+        } else {
+          setTimeout(function () {
+            pollExportStatus(jobId, button);
+          }, EXPORT_POLLING_INTERVAL);
+        }
+      })
+      .fail(function () {
+        button.prop("disabled", false);
+        console.log("Error to get the CSV export status");
+      });
+  }
+
+  function addFragmentResources(resources) {
+    resources.forEach(function (resource) {
+      if (resource.kind === "url") {
+        if (loadedResources.has(resource.data)) {
+          return;
+        }
+        loadedResources.add(resource.data);
+      }
+      if (resource.mimetype === "text/css") {
+        if (resource.kind === "url") {
+          $("head").append($("<link>", { rel: "stylesheet", href: resource.data }));
+        } else {
+          $("head").append($("<style>").text(resource.data));
+        }
+      } else if (resource.mimetype === "application/javascript") {
+        if (resource.kind === "url") {
+          $.ajax({ url: resource.data, dataType: "script", cache: true, async: false });
+        } else {
+          $.globalEval(resource.data);
+        }
+      } else if (resource.kind === "text") {
+        $("head").append(resource.data);
+      }
     });
+  }
+
+  function replaceView(fragment) {
+    transitionArgs = fragment.json_init_args || {};
+    addFragmentResources(fragment.resources);
+    const content = $($.parseHTML($.trim(fragment.content), document, true));
+    $(element).find(".extemporaneous_grading_block").replaceWith(content);
+    if (typeof XBlock !== "undefined" && XBlock.initializeBlocks) {
+      XBlock.initializeBlocks(content);
+    }
+    scheduleTransition();
+  }
+
+  // Replace the current view with the fragment rendered by the handler instead of reloading the page.
+  function loadView(handlerUrl) {
+    $.post(handlerUrl, JSON.stringify({}))
+      .done(replaceView)
+      .fail(function () {
+        window.location.reload(false);
+      });
+  }
+
+  function waitForTransition(delay) {
+    transitionTimer = setTimeout(function () {
+      if (delay > MAX_TIMEOUT) {
+        waitForTransition(delay - MAX_TIMEOUT);
+      } else {
+        loadView(viewFragment);
+      }
+    }, Math.min(Math.max(delay, 0), MAX_TIMEOUT));
+  }
+
+  // Refresh the view once, when the next deadline passes plus the jitter sent by the server,
+  // or when the server notifies the transition if the deadline events are enabled.
+  function scheduleTransition() {
+    clearTimeout(transitionTimer);
+    if (eventSource) {
+      eventSource.close();
+      eventSource = null;
+    }
 
-  $(element)
-    .find(`#download_csv`)
-    .click(function () {
-      const data = {};
-      $.post(downloadCSV, JSON.stringify(data))
+    const block = $(element).find(".extemporaneous_grading_block");
+    const nextTransition = block.data("next-transition");
+    if (!nextTransition) {
+      return;
+    }
+
+    if (block.data("deadline-events") && window.EventSource) {
+      eventSource = new EventSource(deadlineEvents);
+      eventSource.addEventListener("transition", function () {
+        eventSource.close();
+        eventSource = null;
+        loadView(viewFragment);
+      });
+      return;
+    }
+
+    const serverNow = Date.parse(transitionArgs.server_now) || Date.now();
+    const delay = Date.parse(nextTransition) - serverNow + (transitionArgs.transition_jitter_ms || 0);
+    waitForTransition(delay);
+  }
+
+  $(element).on("click", "#late_submission", function () {
+    const data = {};
+    $.post(setLateSubmission, JSON.stringify(data))
+      .done(function (response) {
+        loadView(childrenFragment);
+      })
+      .fail(function () {
+        console.log("Error to accept late submission");
+      });
+  });
+
+  function exportCSV(startUrl) {
+    return function () {
+      const button = $(this);
+      button.prop("disabled", true);
+      $.post(startUrl, JSON.stringify({}))
         .done(function (response) {
-          window.location.href = response.download_url;
+          // Without a job, the export is downloaded from the URL in the response.
+          if (!response.job_id) {
+            button.prop("disabled", false);
+            window.location.href = response.download_url;
+            return;
+          }
+          pollExportStatus(response.job_id, button);
         })
         .fail(function () {
+          button.prop("disabled", false);
           console.log("Error to download CSV");
         });
-    });
+    };
+  }
+
+  $(element).on("click", "#download_csv", exportCSV(startExport));
+
+  $(element).on("click", "#download_course_csv", exportCSV(startCourseExport));
+
+  scheduleTransition();
 }
@@ -0,0 +1,80 @@
+"""
+Tests for the deadline transitions of the Extemporaneous Grading XBlock.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from extemporaneous_grading.deadlines import (
+    SleepDeadlineEvents,
+    format_event,
+    get_deadline_events,
+    get_transition_jitter,
+)
+from test_utils import ImmediateDeadlineEvents
+
+
+class TestDeadlines(TestCase):
+    """Tests for the deadline transitions."""
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"DEADLINE_JITTER_SECONDS": 5}})
+    def test_get_transition_jitter(self):
+        """
+        Test the jitter is bounded by the `DEADLINE_JITTER_SECONDS` setting.
+
+        Expected result: a delay between 0 and 5 seconds.
+        """
+        for _ in range(100):
+            self.assertTrue(0 <= get_transition_jitter() <= 5)
+
+    def test_format_event(self):
+        """
+        Test formatting a server-sent event.
+
+        Expected result: the event name and its JSON data, ended by a blank line.
+        """
+        self.assertEqual(format_event("transition", {"a": 1}), b'event: transition\ndata: {"a": 1}\n\n')
+
+    def test_sleep_events_past_transition(self):
+        """
+        Test the stream of a transition that already passed.
+
+        Expected result: the transition event is sent without waiting.
+        """
+        transition = timezone.now() - timedelta(seconds=1)
+
+        with patch("extemporaneous_grading.deadlines.time.sleep") as sleep:
+            events = list(SleepDeadlineEvents(transition, 0))
+
+        sleep.assert_not_called()
+        self.assertEqual(json.loads(events[-1].split(b"data: ")[1]), {"transition": transition.isoformat()})
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"DEADLINE_EVENTS_TIMEOUT": 0.05}})
+    def test_sleep_events_timeout(self):
+        """
+        Test the stream of a transition later than the timeout.
+
+        Expected result: the stream is closed without the transition event.
+        """
+        events = list(SleepDeadlineEvents(timezone.now() + timedelta(hours=1), 0))
+
+        self.assertEqual(events, [b": connected\n\n"])
+
+    @override_settings(
+        XBLOCK_SETTINGS={"extemporaneous_grading": {"DEADLINE_EVENTS_BACKEND": "test_utils.ImmediateDeadlineEvents"}}
+    )
+    def test_get_deadline_events(self):
+        """
+        Test getting the events stream of the configured backend.
+
+        Expected result: the stream of the backend set with a dotted path.
+        """
+        self.assertIsInstance(get_deadline_events(timezone.now(), 0), ImmediateDeadlineEvents)
+        with override_settings(XBLOCK_SETTINGS={}):
+            self.assertIsInstance(get_deadline_events(timezone.now(), 0), SleepDeadlineEvents)
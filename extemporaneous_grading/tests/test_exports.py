@@ -0,0 +1,191 @@
+"""
+Tests for the late submissions exports.
+"""
+
+import io
+import json
+from datetime import datetime, timezone
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase, override_settings
+
+from extemporaneous_grading.exports import (
+    get_export_format,
+    is_parquet_available,
+    iter_csv,
+    iter_ndjson,
+    iter_parquet,
+    save_export,
+)
+
+
+def make_records(count: int) -> list[dict]:
+    """Build late submission records with the fields in a different order than the schema."""
+    return [
+        {
+            "datetime": f"2024-01-0{index}T00:00:00+00:00",
+            "email": f"user_{index}@example.com",
+            "username": f"user_{index}",
+            "anonymous_user_id": f"anonymous_{index}",
+        }
+        for index in range(1, count + 1)
+    ]
+
+
+class TestIterCSV(TestCase):
+    """Tests for iter_csv"""
+
+    def test_iter_csv(self):
+        """
+        Test formatting the records as CSV in chunks.
+
+        Expected result: the header in the first chunk and the rows grouped by the chunk size.
+        """
+        chunks = list(iter_csv(make_records(5), chunk_size=2))
+
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[0], b"anonymous_user_id,username,email,datetime\r\n")
+        self.assertEqual(
+            chunks[1],
+            b"anonymous_1,user_1,user_1@example.com,2024-01-01T00:00:00+00:00\r\n"
+            b"anonymous_2,user_2,user_2@example.com,2024-01-02T00:00:00+00:00\r\n",
+        )
+        self.assertEqual(chunks[3], b"anonymous_5,user_5,user_5@example.com,2024-01-05T00:00:00+00:00\r\n")
+
+    def test_iter_csv_without_records(self):
+        """
+        Test formatting an empty list of records.
+
+        Expected result: only the header.
+        """
+        self.assertEqual(list(iter_csv([])), [b"anonymous_user_id,username,email,datetime\r\n"])
+
+
+class TestIterNDJSON(TestCase):
+    """Tests for iter_ndjson"""
+
+    def test_iter_ndjson(self):
+        """
+        Test formatting the records as NDJSON in chunks.
+
+        Expected result: one object per line with the fields in the order of the schema.
+        """
+        chunks = list(iter_ndjson(make_records(3), chunk_size=2))
+
+        lines = b"".join(chunks).decode("utf8").splitlines()
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(list(json.loads(lines[0])), ["anonymous_user_id", "username", "email", "datetime"])
+        self.assertEqual(json.loads(lines[0])["datetime"], "2024-01-01T00:00:00+00:00")
+
+
+@skipIf(not is_parquet_available(), "pyarrow is not installed")
+class TestIterParquet(TestCase):
+    """Tests for iter_parquet"""
+
+    def test_iter_parquet(self):
+        """
+        Test formatting the records as a Parquet file with a row group per chunk.
+
+        Expected result: a Parquet file with the typed columns of the schema.
+        """
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+        content = b"".join(iter_parquet(make_records(5), chunk_size=2))
+
+        parquet_file = pq.ParquetFile(io.BytesIO(content))
+        table = parquet_file.read()
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        self.assertEqual(table.column_names, ["anonymous_user_id", "username", "email", "datetime"])
+        self.assertEqual(table.column("datetime")[0].as_py(), datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+
+class TestGetExportFormat(TestCase):
+    """Tests for get_export_format"""
+
+    def test_get_export_format(self):
+        """
+        Test getting the export formats by name.
+
+        Expected result: CSV by default and an error for unknown formats.
+        """
+        self.assertEqual(get_export_format(None).extension, "csv")
+        self.assertEqual(get_export_format("ndjson").content_type, "application/x-ndjson")
+        with self.assertRaises(ValueError):
+            get_export_format("xlsx")
+
+    def test_get_export_format_without_pyarrow(self):
+        """
+        Test getting the Parquet format when `pyarrow` is not installed.
+
+        Expected result: an error, while the other formats are available.
+        """
+        with patch("extemporaneous_grading.exports.importlib.util.find_spec", return_value=None):
+            self.assertEqual(get_export_format("csv").extension, "csv")
+            with self.assertRaises(ValueError):
+                get_export_format("parquet")
+
+
+class TestSaveExport(TestCase):
+    """Tests for save_export"""
+
+    def setUp(self) -> None:
+        """Set up the test suite."""
+        self.storage = InMemoryStorage()
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"EXPORT_RETENTION_SECONDS": 0}})
+    def test_save_export(self):
+        """
+        Test saving a new version of an export.
+
+        Expected result: the export is saved from the chunks and the older
+        version of the same format is deleted, but not the exports of other formats.
+        """
+        save_export(self.storage, "exports/v1.csv", [b"a,b\r\n"])
+        save_export(self.storage, "exports/v1.ndjson", [b"{}\n"])
+
+        path = save_export(self.storage, "exports/v2.csv", [b"a,b\r\n", b"1,2\r\n"])
+
+        self.assertEqual(path, "exports/v2.csv")
+        self.assertEqual(sorted(self.storage.listdir("exports")[1]), ["v1.ndjson", "v2.csv"])
+        with self.storage.open(path) as file:
+            self.assertEqual(file.read(), b"a,b\r\n1,2\r\n")
+
+    def test_save_export_keeps_recent_versions(self):
+        """
+        Test saving a new version of an export while an older one is recent.
+
+        Expected result: the older version is kept, since its URL may have just been returned.
+        """
+        save_export(self.storage, "exports/v1.csv", [b"a,b\r\n"])
+
+        save_export(self.storage, "exports/v2.csv", [b"a,b\r\n", b"1,2\r\n"])
+
+        self.assertEqual(sorted(self.storage.listdir("exports")[1]), ["v1.csv", "v2.csv"])
+
+    def test_save_existing_export(self):
+        """
+        Test saving an export that already exists.
+
+        Expected result: the chunks are not generated.
+        """
+        save_export(self.storage, "exports/v1.csv", [b"a,b\r\n"])
+
+        path = save_export(self.storage, "exports/v1.csv", iter(self.fail, None))
+
+        self.assertEqual(path, "exports/v1.csv")
+
+    def test_save_export_race(self):
+        """
+        Test saving an export while another request saves the same one.
+
+        Expected result: the file saved with an alternative name is deleted.
+        """
+        save_export(self.storage, "exports/v1.csv", [b"a,b\r\n"])
+
+        with patch.object(self.storage, "exists", side_effect=[False, True, False]):
+            save_export(self.storage, "exports/v1.csv", [b"a,b\r\n"])
+
+        self.assertEqual(self.storage.listdir("exports"), ([], ["v1.csv"]))
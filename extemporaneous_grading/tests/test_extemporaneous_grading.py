@@ -5,18 +5,31 @@ Tests for XBlockExtemporaneousGrading
 from __future__ import annotations
 
 import json
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
-from unittest.mock import Mock
+from unittest import skipIf
+from unittest.mock import Mock, PropertyMock, patch
 
 from ddt import data, ddt, unpack
-from django.test import TestCase
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase, override_settings
+from web_fragments.fragment import Fragment
 from xblock.exceptions import JsonHandlerError
 from xblock.fields import ScopeIds
 from xblock.test.toy_runtime import ToyRuntime
 
 from extemporaneous_grading import XBlockExtemporaneousGrading
-from extemporaneous_grading.constants import ATTR_ANONYMOUS_USER_ID, ATTR_USER_USERNAME
+from extemporaneous_grading.constants import ATTR_ANONYMOUS_USER_ID, ATTR_KEY_USER_ROLE, ATTR_USER_USERNAME
+from extemporaneous_grading.fragment_cache import local_fragment_cache
+from extemporaneous_grading.jobs import CeleryJobExecutor, run_course_export_job
+from extemporaneous_grading.ledger import get_ledger
+from extemporaneous_grading.metrics import get_metrics_sink
+from extemporaneous_grading.profiling import PROFILES_DIRECTORY
+from extemporaneous_grading.resources import get_asset_uri, get_resource
+from extemporaneous_grading.utils import RequestCache
+from test_utils import InMemoryTracer, StubTask, TracerProvider
 
 
 @ddt
@@ -40,6 +53,14 @@ class TestXBlockExtemporaneousGrading(TestCase):
             field_data={},
             scope_ids=ScopeIds("1", "2", "3", "4"),
         )
+        self.block.course_id = "course-v1:test+test+test"
+        storage_patcher = patch("extemporaneous_grading.ledger.get_storage", return_value=InMemoryStorage())
+        storage_patcher.start()
+        self.addCleanup(storage_patcher.stop)
+        local_fragment_cache.clear()
+        if RequestCache is not None:
+            # Each test is a request, the middleware of the platform clears the cache after each one.
+            self.addCleanup(RequestCache.clear_all_namespaces)
         self.current_datetime = datetime.now()
         self.block.late_submission = False
         self.block.late_submissions = []
@@ -87,6 +108,37 @@ class TestXBlockExtemporaneousGrading(TestCase):
 
         self.assertIn(self.content, fragment.content)
 
+    @override_settings(
+        XBLOCK_SETTINGS={
+            "extemporaneous_grading": {"PARALLEL_CHILDREN_RENDERING": True, "CHILDREN_RENDER_WORKERS": 2}
+        }
+    )
+    def test_student_view_renders_children_in_parallel(self):
+        """Render the student view with parallel rendering of the children enabled.
+
+        Expected result: the children are rendered in at most 2 threads other than
+        the current one and their contents keep the order of the children.
+        """
+        render_threads = set()
+
+        def get_block(child_id):
+            def render(view, context):
+                render_threads.add(threading.get_ident())
+                time.sleep(0.01)
+                return Mock(content=f"<p>Content of {child_id}</p>", resources=[])
+
+            return Mock(render=Mock(side_effect=render))
+
+        self.block.children = ["child1", "child2", "child3", "child4"]
+        self.runtime.get_block = Mock(side_effect=get_block)
+
+        fragment = self.block.student_view({})
+
+        positions = [fragment.content.index(f"Content of {child_id}") for child_id in self.block.children]
+        self.assertEqual(positions, sorted(positions))
+        self.assertLessEqual(len(render_threads), 2)
+        self.assertNotIn(threading.get_ident(), render_threads)
+
     def test_student_view_with_due_datetime(self):
         """Render the student view when the due date is passed.
 
@@ -111,6 +163,119 @@ class TestXBlockExtemporaneousGrading(TestCase):
         self.assertIn(self.block.late_due_date_explanation_text, fragment.content)
         self.assertNotIn(self.content, fragment.content)
 
+    def test_student_view_inlines_static_assets(self):
+        """Render the student view with the default settings.
+
+        Expected result: the CSS and JavaScript are inlined in the fragment.
+        """
+        fragment = self.block.student_view({})
+
+        inline_resources = [resource.data for resource in fragment.resources if resource.kind == "text"]
+        self.assertIn(get_resource("static/css/extemporaneous_grading.css"), inline_resources)
+        self.assertIn(get_resource("static/js/src/extemporaneous_grading.js"), inline_resources)
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"SERVE_STATIC_ASSETS": True}})
+    def test_student_view_serves_static_assets(self):
+        """Render the student view serving the static assets as local resources.
+
+        Expected result: the assets are linked with fingerprinted URLs that the block can open.
+        """
+        uri = get_asset_uri("static/js/src/extemporaneous_grading.js")
+
+        fragment = self.block.student_view({})
+
+        urls = [resource.data for resource in fragment.resources if resource.kind == "url"]
+        self.assertIn(self.runtime.local_resource_url(self.block, uri), urls)
+        self.assertNotIn("text", [resource.kind for resource in fragment.resources])
+        self.assertEqual(
+            XBlockExtemporaneousGrading.open_local_resource(uri).read().decode("utf8"),
+            get_resource("static/js/src/extemporaneous_grading.js"),
+        )
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"METRICS_SINK": "memory"}})
+    def test_student_view_metrics(self):
+        """Render the student view with children and the in-memory metrics sink.
+
+        Expected result: the view and each of its phases are timed once.
+        """
+        metrics = get_metrics_sink()
+        metrics.reset()
+        self.block.children = ["child1"]
+        self.runtime.get_block = Mock(return_value=self.child_block)
+
+        self.block.student_view({})
+
+        self.assertEqual(
+            {name: len(timings) for name, timings in metrics.timings.items()},
+            {"student_view": 1, "children.fetch": 1, "children.render": 1, "template.render": 1, "assets.load": 1},
+        )
+
+    @skipIf(TracerProvider is None, "opentelemetry-sdk is not installed")
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"PARALLEL_CHILDREN_RENDERING": True}})
+    def test_student_view_spans(self):
+        """Render the student view with children rendered in parallel and a tracer.
+
+        Expected result: the spans of the children and the template are nested in the span of the view.
+        """
+        tracer = InMemoryTracer()
+        self.block.children = ["child1", "child2"]
+        self.runtime.get_block = Mock(return_value=self.child_block)
+
+        with patch("extemporaneous_grading.tracing.tracer", tracer.tracer):
+            self.block.student_view({})
+
+        spans = {span.name: span for span in tracer.get_finished_spans()}
+        view_span = spans["extemporaneous_grading.student_view"]
+        self.assertEqual(view_span.attributes["extemporaneous_grading.phase"], "children")
+        self.assertEqual(view_span.attributes["extemporaneous_grading.children"], 2)
+        child_spans = [span for span in tracer.get_finished_spans() if span.name.endswith("render_child")]
+        self.assertEqual(len(child_spans), 2)
+        for span in [*child_spans, spans["extemporaneous_grading.render_template"]]:
+            self.assertEqual(span.parent.span_id, view_span.context.span_id)
+
+    @data((True, True), (False, False))
+    @unpack
+    def test_student_view_profile_requested(self, is_course_team: bool, profiled: bool):
+        """Render the student view when the profile is requested in the query string.
+
+        Expected result: the view is profiled only for the course team.
+        """
+        storage = InMemoryStorage()
+
+        with patch("extemporaneous_grading.profiling.get_storage", return_value=storage), patch(
+            "extemporaneous_grading.extemporaneous_grading.is_profile_requested", return_value=True
+        ), patch.object(
+            XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=is_course_team
+        ):
+            self.block.student_view({})
+
+        directory = f"{PROFILES_DIRECTORY}/{self.block.course_id}/{self.block.scope_ids.usage_id}/student_view"
+        self.assertEqual(storage.exists(directory), profiled)
+
+    def test_current_user_resolved_once(self):
+        """Render the student view and accept the late submission in the same request.
+
+        Expected result: the user service is called once and the role is resolved once.
+        """
+        user = self.block.get_current_user.return_value
+        user.opt_attrs[ATTR_KEY_USER_ROLE] = "instructor"
+        user_service = Mock(get_current_user=Mock(return_value=user))
+        del self.block.get_current_user
+        service = self.runtime.service
+        self.runtime.service = Mock(
+            side_effect=lambda block, name: user_service if name == "user" else service(block, name)
+        )
+        self.block.due_date -= timedelta(days=2)
+
+        self.block.student_view({})
+        self.block.set_late_submission(self.request)
+        is_course_team = self.block.is_course_team
+        user.opt_attrs[ATTR_KEY_USER_ROLE] = "student"
+
+        self.assertTrue(is_course_team)
+        self.assertTrue(self.block.is_course_team)
+        user_service.get_current_user.assert_called_once_with()
+
     def test_author_view_root(self):
         """Render the author view with the root block.
 
@@ -134,6 +299,39 @@ class TestXBlockExtemporaneousGrading(TestCase):
             f'<divclass="content_restrictions_block">{self.content.replace(" ", "")}</div>',
         )
 
+    def test_student_view_loads_children_in_bulk(self):
+        """Render the student view with a runtime that loads blocks in bulk.
+
+        Expected result: the children are loaded in a single call.
+        """
+        self.block.children = ["child1", "child2"]
+        self.runtime.get_block = Mock()
+        self.runtime.get_blocks = Mock(return_value=[self.child_block, self.child_block])
+
+        fragment = self.block.student_view({})
+
+        self.runtime.get_blocks.assert_called_once_with(["child1", "child2"])
+        self.runtime.get_block.assert_not_called()
+        self.assertEqual(fragment.content.count(self.content), 2)
+
+    def test_author_view_root_loads_children_in_bulk(self):
+        """Render the author view of the root block with a runtime that loads blocks in bulk.
+
+        Expected result: the children are loaded in a single call and listed in the template context.
+        """
+        self.block.location = "root"
+        self.block.children = ["child1", "child2"]
+        self.runtime.get_block = Mock()
+        self.runtime.get_blocks = Mock(return_value=[self.child_block, self.child_block])
+        mako_service = Mock(render_template=Mock(return_value=""))
+        self.runtime.service = Mock(return_value=mako_service)
+
+        self.block.author_view({"root_xblock": self.block})
+
+        self.runtime.get_blocks.assert_called_once_with(["child1", "child2"])
+        self.runtime.get_block.assert_not_called()
+        self.assertEqual(len(mako_service.render_template.call_args.args[1]["items"]), 2)
+
     def test_author_view(self):
         """Render the author view without the root block.
 
@@ -185,6 +383,23 @@ class TestXBlockExtemporaneousGrading(TestCase):
         """
         self.assertEqual(self.block.parse_datetime(date, time), expected_datetime)
 
+    def test_deadlines_cached(self):
+        """
+        Test the deadlines are parsed once and parsed again when their fields change.
+
+        Expected result: `parse_datetime` is only called when the date or time changes.
+        """
+        with patch.object(
+            XBlockExtemporaneousGrading, "parse_datetime", wraps=XBlockExtemporaneousGrading.parse_datetime
+        ) as parse_datetime:
+            due_datetime = self.block.due_datetime
+            self.block.student_view({})
+            self.block.due_time = "12:00"
+            new_due_datetime = self.block.due_datetime
+
+        self.assertEqual(new_due_datetime - due_datetime, timedelta(hours=12))
+        self.assertEqual(parse_datetime.call_count, 3)
+
     @data(
         ("12:00", None),
         ("00:00", None),
@@ -250,3 +465,670 @@ class TestXBlockExtemporaneousGrading(TestCase):
         self.assertEqual(self.block.late_submission, True)
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertEqual(response.json, {"success": True})  # pylint: disable=no-member
+
+    def test_children_fragment_after_late_submission(self):
+        """
+        Test `children_fragment` handler after accepting the late submission.
+
+        Expected result: The fragment with the children content and their resources.
+        """
+        self.block.due_date -= timedelta(days=2)
+        self.block.children = ["child1"]
+        self.child_block.render.return_value = Fragment(self.content)
+        self.child_block.render.return_value.add_css_url("https://example.com/child.css")
+        self.runtime.get_block = Mock(return_value=self.child_block)
+        self.block.set_late_submission(self.request)
+
+        response = self.block.children_fragment(self.request)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(self.content, response.json["content"])  # pylint: disable=no-member
+        self.assertEqual(
+            [resource["data"] for resource in response.json["resources"]],  # pylint: disable=no-member
+            ["https://example.com/child.css"],
+        )
+
+    def test_children_fragment_locked(self):
+        """
+        Test `children_fragment` handler before accepting the late submission.
+
+        Expected result: The request is forbidden and the children are not rendered.
+        """
+        self.block.due_date -= timedelta(days=2)
+        self.block.children = ["child1"]
+        self.runtime.get_block = Mock(return_value=self.child_block)
+
+        response = self.block.children_fragment(self.request)
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.runtime.get_block.assert_not_called()
+
+    @data(
+        ({"due_date": 1, "late_due_date": 2, "late_submission": False}, "due_datetime"),
+        ({"due_date": 1, "late_due_date": 2, "late_submission": True}, "late_due_datetime"),
+        ({"due_date": -1, "late_due_date": 1, "late_submission": False}, "late_due_datetime"),
+        ({"due_date": -2, "late_due_date": -1, "late_submission": False}, None),
+    )
+    @unpack
+    def test_get_next_transition(self, case_data: dict, expected_deadline: str | None):
+        """
+        Test `get_next_transition` method.
+
+        Expected result: the next deadline that changes the template for the user.
+        """
+        self.block.due_date = self.current_datetime + timedelta(days=case_data["due_date"])
+        self.block.late_due_date = self.current_datetime + timedelta(days=case_data["late_due_date"])
+        self.block.late_submission = case_data["late_submission"]
+
+        next_transition = self.block.get_next_transition()
+
+        self.assertEqual(next_transition, getattr(self.block, expected_deadline) if expected_deadline else None)
+
+    def test_student_view_next_transition(self):
+        """
+        Test the student view sends the next transition to the client instead of polling.
+
+        Expected result: the data attributes of the transition and no reload interval.
+        """
+        fragment = self.block.student_view({})
+
+        self.assertIn(f'data-next-transition="{self.block.due_datetime.isoformat()}"', fragment.content)
+        self.assertEqual(set(fragment.json_init_args), {"server_now", "transition_jitter_ms"})
+        self.assertNotIn("setInterval", fragment.content)
+
+    def test_student_view_caches_locked_view(self):
+        """
+        Test the locked views are rendered once and then served from the fragment cache.
+
+        Expected result: the template is rendered once, and again after the settings change.
+        """
+        self.block.due_date -= timedelta(days=2)
+
+        with patch.object(
+            XBlockExtemporaneousGrading, "render_template", wraps=self.block.render_template
+        ) as render_template:
+            first_fragment = self.block.student_view({})
+            second_fragment = self.block.student_view({})
+            self.block.due_date_explanation_text = "New explanation text"
+            third_fragment = self.block.student_view({})
+
+        self.assertEqual(render_template.call_count, 2)
+        self.assertEqual(first_fragment.content, second_fragment.content)
+        self.assertIn("New explanation text", third_fragment.content)
+
+    def test_student_view_does_not_cache_children(self):
+        """
+        Test the children view is not cached since it depends on the learner.
+
+        Expected result: the template is rendered on every request.
+        """
+        with patch.object(
+            XBlockExtemporaneousGrading, "render_template", wraps=self.block.render_template
+        ) as render_template:
+            self.block.student_view({})
+            self.block.student_view({})
+
+        self.assertEqual(render_template.call_count, 2)
+
+    def test_student_view_cache_expires_at_next_deadline(self):
+        """
+        Test the locked views are cached until the next deadline of the block.
+
+        Expected result: the timeout of the entry is the time left until the late due date.
+        """
+        self.block.due_date -= timedelta(days=2)
+        self.block.late_due_date = datetime.now(timezone.utc) + timedelta(minutes=10)
+        self.block.late_due_time = self.block.late_due_date.strftime("%H:%M")
+
+        with patch.object(local_fragment_cache, "set", wraps=local_fragment_cache.set) as cache_set:
+            self.block.student_view({})
+
+        time_left = (self.block.late_due_datetime - datetime.now(timezone.utc)).total_seconds()
+        self.assertAlmostEqual(cache_set.call_args.args[2], time_left, delta=1)
+
+    def test_view_fragment(self):
+        """
+        Test `view_fragment` handler after the due date passes.
+
+        Expected result: the fragment of the locked view.
+        """
+        self.block.due_date -= timedelta(days=2)
+
+        response = self.block.view_fragment(self.request)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(self.block.due_date_explanation_text, response.json["content"])  # pylint: disable=no-member
+
+    def test_deadline_events_disabled(self):
+        """
+        Test `deadline_events` handler with the deadline events disabled.
+
+        Expected result: the handler is not found.
+        """
+        response = self.block.deadline_events(Mock(method="GET"))
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(
+        XBLOCK_SETTINGS={
+            "extemporaneous_grading": {
+                "DEADLINE_EVENTS": True,
+                "DEADLINE_EVENTS_BACKEND": "test_utils.ImmediateDeadlineEvents",
+            }
+        }
+    )
+    def test_deadline_events(self):
+        """
+        Test `deadline_events` handler with a local stand-in of the events backend.
+
+        Expected result: the stream notifies the next transition, and is empty when there is none.
+        """
+        response = self.block.deadline_events(Mock(method="GET"))
+
+        self.assertEqual(response.content_type, "text/event-stream")
+        self.assertIn(b"event: transition", response.body)
+        self.assertIn(self.block.due_datetime.isoformat().encode(), response.body)
+
+        self.block.late_due_date -= timedelta(days=3)
+        self.block.due_date -= timedelta(days=3)
+        self.assertEqual(self.block.deadline_events(Mock(method="GET")).status_code, HTTPStatus.NO_CONTENT)
+
+    def test_set_late_submissions(self):
+        """
+        Test `set_late_submissions` handler with learners identified in both ways.
+
+        Expected result: the learners found are recorded and each one has its result.
+        """
+        users = {
+            "anonymous_1": Mock(username="learner_1", email="learner_1@example.com"),
+            "anonymous_2": Mock(username="learner_2", email=""),
+        }
+        anonymous_user_ids = {"learner_2": "anonymous_2"}
+        user_service = Mock(
+            get_anonymous_user_id=Mock(side_effect=lambda username, course_id: anonymous_user_ids.get(username)),
+            get_user_by_anonymous_id=Mock(side_effect=users.get),
+        )
+        self.block.late_submission_grants = ""
+        self.runtime.service = Mock(return_value=user_service)
+        get_ledger(self.block).add({"anonymous_user_id": "anonymous_1", "datetime": "2024-01-01T00:00:00+00:00"})
+        request = Mock(
+            body=json.dumps(
+                {"anonymous_user_ids": ["anonymous_1", "anonymous_3"], "usernames": ["learner_2", "unknown"]}
+            ).encode("utf-8"),
+            method="POST",
+        )
+
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            response = self.block.set_late_submissions(request)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.json["results"],  # pylint: disable=no-member
+            [
+                {"anonymous_user_id": "anonymous_1", "status": "already_recorded"},
+                {"anonymous_user_id": "anonymous_3", "status": "not_found"},
+                {"username": "learner_2", "anonymous_user_id": "anonymous_2", "status": "recorded"},
+                {"username": "unknown", "status": "not_found"},
+            ],
+        )
+        record = get_ledger(self.block).get("anonymous_2")
+        self.assertEqual((record["username"], record["email"]), ("learner_2", ""))
+        self.assertNotEqual(self.block.late_submission_grants, "")
+        user_service.get_anonymous_user_id.assert_any_call("learner_2", self.block.course_id)
+
+    @data(
+        {"usernames": "learner_1"},
+        {"anonymous_user_ids": [1]},
+        {"anonymous_user_ids": ["anonymous"] * 1001},
+    )
+    def test_set_late_submissions_invalid(self, request_data: dict):
+        """
+        Test `set_late_submissions` handler with invalid or too many learners.
+
+        Expected result: The request is rejected.
+        """
+        request = Mock(body=json.dumps(request_data).encode("utf-8"), method="POST")
+
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            response = self.block.set_late_submissions(request)
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_set_late_submissions_forbidden(self):
+        """
+        Test `set_late_submissions` handler for a learner.
+
+        Expected result: The request is forbidden.
+        """
+        request = Mock(body=json.dumps({"anonymous_user_ids": ["anonymous_1"]}).encode("utf-8"), method="POST")
+
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=False):
+            response = self.block.set_late_submissions(request)
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_get_template_with_recorded_late_submission(self):
+        """
+        Test `get_template` for a learner whose late submission was recorded by the course team.
+
+        Expected result: the children template, and the `late_submission` field is set.
+        """
+        self.block.due_date -= timedelta(days=2)
+        get_ledger(self.block).add({"anonymous_user_id": "test_anonymous_user_id", "datetime": "2024-01-01T00:00:00"})
+        self.block.late_submission_grants = "grants"
+
+        self.assertEqual(self.block.get_template(), "children")
+        self.assertTrue(self.block.late_submission)
+
+    def test_get_template_reads_ledger_once_per_grant(self):
+        """
+        Test `get_template` for a learner who did not accept the late submission.
+
+        Expected result: the locked template, reading the ledger only once for
+        each token of the late submission grants.
+        """
+        self.block.due_date -= timedelta(days=2)
+
+        with patch("extemporaneous_grading.extemporaneous_grading.get_ledger", wraps=get_ledger) as get_ledger_mock:
+            templates = [self.block.get_template()]
+            self.block.late_submission_grants = "first_grants"
+            templates += [self.block.get_template(), self.block.get_template()]
+            self.block.late_submission_grants = "second_grants"
+            templates.append(self.block.get_template())
+
+        self.assertEqual(templates, ["due_datetime"] * 4)
+        self.assertEqual(get_ledger_mock.call_count, 2)
+        self.assertFalse(self.block.late_submission)
+
+    def test_set_late_submissions_retry(self):
+        """
+        Test retrying `set_late_submissions` after a failure that left the learners recorded but locked.
+
+        Expected result: the retry reports the learners as already recorded and unlocks their view.
+        """
+        self.block.due_date -= timedelta(days=2)
+        get_ledger(self.block).add({"anonymous_user_id": "test_anonymous_user_id", "datetime": "2024-01-01T00:00:00"})
+        self.assertEqual(self.block.get_template(), "due_datetime")
+        self.block.get_learner = Mock(return_value={"anonymous_user_id": "test_anonymous_user_id"})
+        request = Mock(
+            body=json.dumps({"anonymous_user_ids": ["test_anonymous_user_id"]}).encode("utf-8"), method="POST"
+        )
+
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            response = self.block.set_late_submissions(request)
+
+        self.assertEqual(response.json["results"][0]["status"], "already_recorded")  # pylint: disable=no-member
+        self.assertEqual(self.block.get_template(), "children")
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"LEDGER_BACKEND": "storage"}})
+    def test_late_submission_ledger(self):
+        """
+        Test `set_late_submission` handler records the submission in the ledger.
+
+        Expected result: The ledger contains the submission and the legacy field is untouched.
+        """
+        self.block.set_late_submission(self.request)
+
+        records = list(get_ledger(self.block))
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["anonymous_user_id"], "test_anonymous_user_id")
+        self.assertEqual(records[0]["username"], "test_user")
+        self.assertEqual(self.block.late_submissions, [])
+
+    def test_late_submission_idempotent(self):
+        """
+        Test calling `set_late_submission` handler several times.
+
+        Expected result: A single record with the first datetime and the attempts are counted.
+        """
+        self.block.set_late_submission(self.request)
+        first_record = get_ledger(self.block).get("test_anonymous_user_id")
+
+        self.block.set_late_submission(self.request)
+        self.block.set_late_submission(self.request)
+
+        self.assertEqual(list(get_ledger(self.block)), [first_record])
+        self.assertEqual(self.block.late_submission_attempts, 3)
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"LEDGER_BACKEND": "storage"}})
+    def test_late_submission_legacy_record(self):
+        """
+        Test accepting the late submission of learners recorded only in the legacy field.
+
+        Expected result: the legacy records are migrated and keep their original datetime.
+        """
+        legacy_records = [
+            {"anonymous_user_id": "test_anonymous_user_id", "datetime": "2024-01-01T00:00:00+00:00"},
+            {"anonymous_user_id": "anonymous_1", "datetime": "2024-01-02T00:00:00+00:00"},
+        ]
+        self.block.late_submissions = list(legacy_records)
+        request = Mock(body=json.dumps({"anonymous_user_ids": ["anonymous_1"]}).encode("utf-8"), method="POST")
+
+        self.block.set_late_submission(self.request)
+        self.block.late_submissions = legacy_records[1:]
+        self.runtime.service = Mock(
+            return_value=Mock(get_user_by_anonymous_id=Mock(return_value=Mock(username="learner_1", email="")))
+        )
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            response = self.block.set_late_submissions(request)
+
+        self.assertEqual(response.json["results"][0]["status"], "already_recorded")  # pylint: disable=no-member
+        self.assertEqual(self.block.late_submissions, [])
+        self.assertEqual(sorted(get_ledger(self.block), key=lambda record: record["datetime"]), legacy_records)
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"PROFILING_SAMPLE_RATE": 1}})
+    def test_late_submission_profile_sampled(self):
+        """
+        Test `set_late_submission` handler with every call sampled for profiling.
+
+        Expected result: The profile is saved with the deadline phase of the block.
+        """
+        storage = InMemoryStorage()
+        self.block.due_date = self.current_datetime - timedelta(days=1)
+
+        with patch("extemporaneous_grading.profiling.get_storage", return_value=storage):
+            self.block.set_late_submission(self.request)
+
+        directory = f"{PROFILES_DIRECTORY}/{self.block.course_id}/{self.block.scope_ids.usage_id}/set_late_submission"
+        _, filenames = storage.listdir(directory)
+        self.assertEqual(len(filenames), 1)
+        self.assertIn("_due_datetime_", filenames[0])
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"METRICS_SINK": "memory"}})
+    def test_late_submission_metrics(self):
+        """
+        Test the metrics of several calls to `set_late_submission` handler.
+
+        Expected result: The first acceptance and the duplicate ones are counted apart.
+        """
+        metrics = get_metrics_sink()
+        metrics.reset()
+
+        for _ in range(3):
+            self.block.set_late_submission(self.request)
+
+        self.assertEqual(metrics.counters["late_submission.accepted"], 1)
+        self.assertEqual(metrics.counters["late_submission.duplicate"], 2)
+
+    def test_stream_export(self):
+        """
+        Test `stream_export` handler for a member of the course team.
+
+        Expected result: The CSV is streamed with the late submissions.
+        """
+        self.block.set_late_submission(self.request)
+
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            response = self.block.stream_export(Mock(method="GET", GET={}))
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.content_type, "text/csv")
+        self.assertIn("attachment", response.content_disposition)
+        self.assertEqual(
+            response.body.decode("utf8").splitlines()[1].split(",")[:3],
+            ["test_anonymous_user_id", "test_user", "test_email"],
+        )
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"METRICS_SINK": "memory"}})
+    def test_stream_export_metrics(self):
+        """
+        Test the metrics of `stream_export` handler.
+
+        Expected result: The export, its rows and the size of the ledger are reported.
+        """
+        metrics = get_metrics_sink()
+        metrics.reset()
+        self.block.set_late_submission(self.request)
+
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            self.block.stream_export(Mock(method="GET", GET={})).body  # pylint: disable=expression-not-assigned
+
+        self.assertEqual(metrics.counters["exports.csv"], 1)
+        self.assertEqual(metrics.counters["exports.rows"], 1)
+        self.assertEqual(metrics.gauges["ledger.size"], 1)
+
+    def test_stream_export_ndjson(self):
+        """
+        Test `stream_export` handler with the NDJSON format.
+
+        Expected result: One JSON object per late submission.
+        """
+        self.block.set_late_submission(self.request)
+
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            response = self.block.stream_export(Mock(method="GET", GET={"format": "ndjson"}))
+
+        self.assertEqual(response.content_type, "application/x-ndjson")
+        self.assertEqual(json.loads(response.body)["username"], "test_user")
+
+    def test_stream_export_unknown_format(self):
+        """
+        Test `stream_export` handler with a format that does not exist.
+
+        Expected result: The request is rejected.
+        """
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            response = self.block.stream_export(Mock(method="GET", GET={"format": "xlsx"}))
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_stream_export_forbidden(self):
+        """
+        Test `stream_export` handler for a learner.
+
+        Expected result: The request is forbidden.
+        """
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=False):
+            response = self.block.stream_export(Mock(method="GET", GET={}))
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"LEDGER_BACKEND": "storage"}})
+    def test_start_export_and_status(self):
+        """
+        Test `start_export` and `export_status` handlers with a local task executor.
+
+        Expected result: The job is started and its status has the download URL.
+        """
+        self.block.set_late_submission(self.request)
+        storage = InMemoryStorage(base_url="/media/")
+
+        with patch.object(
+            XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True
+        ), patch(
+            "extemporaneous_grading.extemporaneous_grading.get_job_executor",
+            return_value=CeleryJobExecutor(task=StubTask()),
+        ), patch(
+            "extemporaneous_grading.jobs.get_storage", return_value=storage
+        ), patch(
+            "extemporaneous_grading.extemporaneous_grading.get_storage", return_value=storage
+        ):
+            start_response = self.block.start_export(self.request)
+            job_id = start_response.json["job_id"]  # pylint: disable=no-member
+            status_response = self.block.export_status(
+                Mock(body=json.dumps({"job_id": job_id}).encode("utf-8"), method="POST")
+            )
+
+        self.assertEqual(start_response.status_code, HTTPStatus.OK)
+        self.assertEqual(status_response.json["status"], "succeeded")  # pylint: disable=no-member
+        self.assertEqual(status_response.json["rows_written"], 1)  # pylint: disable=no-member
+        self.assertEqual(
+            status_response.json["download_url"],  # pylint: disable=no-member
+            storage.url(self.block.get_export_path(get_ledger(self.block).version())),
+        )
+
+    def test_start_export_field_ledger(self):
+        """
+        Test `start_export` handler with the `field` ledger backend.
+
+        Expected result: no job is submitted and the response has the URL of the streaming export.
+        """
+        self.block.set_late_submission(self.request)
+        request = Mock(body=json.dumps({"format": "ndjson"}).encode("utf-8"), method="POST")
+
+        with patch.object(
+            XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True
+        ), patch("extemporaneous_grading.extemporaneous_grading.get_job_executor") as get_job_executor:
+            response = self.block.start_export(request)
+
+        get_job_executor.return_value.submit.assert_not_called()
+        self.assertIsNone(response.json["job_id"])  # pylint: disable=no-member
+        self.assertEqual(
+            response.json["download_url"],  # pylint: disable=no-member
+            self.runtime.handler_url(self.block, "stream_export", query="format=ndjson"),
+        )
+
+    def test_export_status_unknown_job(self):
+        """
+        Test `export_status` handler with a job that does not exist.
+
+        Expected result: The handler responds with a not found error.
+        """
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            response = self.block.export_status(
+                Mock(body=json.dumps({"job_id": "unknown"}).encode("utf-8"), method="POST")
+            )
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_start_export_forbidden(self):
+        """
+        Test `start_export` handler for a learner.
+
+        Expected result: The handler responds with a forbidden error.
+        """
+        response = self.block.start_export(self.request)
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"LEDGER_BACKEND": "storage"}})
+    def test_start_course_export(self):
+        """
+        Test `start_course_export` handler.
+
+        Expected result: The course export job is submitted for the course of the block.
+        """
+        with patch.object(
+            XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True
+        ), patch("extemporaneous_grading.extemporaneous_grading.get_job_executor") as get_job_executor:
+            response = self.block.start_course_export(self.request)
+
+        job_id = response.json["job_id"]  # pylint: disable=no-member
+        get_job_executor.return_value.submit.assert_called_once_with(
+            run_course_export_job,
+            job_id,
+            "course-v1:test+test+test",
+            "extemporaneous_grading",
+            "late_submissions_exports/course-v1:test+test+test/course-v1:test+test+test_late_responses.csv",
+            "csv",
+        )
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"LEDGER_BACKEND": "field"}})
+    def test_start_course_export_field_ledger(self):
+        """
+        Test `start_course_export` handler with the `field` ledger backend.
+
+        Expected result: a bad request, since the course report only reads the storage ledgers.
+        """
+        with patch.object(
+            XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True
+        ), patch("extemporaneous_grading.extemporaneous_grading.get_job_executor") as get_job_executor:
+            response = self.block.start_course_export(self.request)
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        get_job_executor.return_value.submit.assert_not_called()
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"EXPORT_RETENTION_SECONDS": 0}})
+    def test_download_csv_cached(self):
+        """
+        Test `download_csv` handler with and without new late submissions.
+
+        Expected result: The CSV is reused until a new submission arrives, then the stale CSV is deleted.
+        """
+        storage = InMemoryStorage(base_url="/media/")
+        self.block.set_late_submission(self.request)
+
+        with patch.object(
+            XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True
+        ), patch("extemporaneous_grading.extemporaneous_grading.get_storage", return_value=storage):
+            first_url = self.block.download_csv(self.request).json["download_url"]  # pylint: disable=no-member
+            with patch.object(storage, "save") as save:
+                cached_url = self.block.download_csv(self.request).json["download_url"]  # pylint: disable=no-member
+            save.assert_not_called()
+
+            get_ledger(self.block).add({"anonymous_user_id": "another_anonymous_user_id"})
+            new_url = self.block.download_csv(self.request).json["download_url"]  # pylint: disable=no-member
+
+        export_directory = self.block.get_export_path("").rsplit("/", 1)[0]
+        self.assertEqual(first_url, cached_url)
+        self.assertNotEqual(first_url, new_url)
+        self.assertEqual(len(storage.listdir(export_directory)[1]), 1)
+
+    def test_download_csv_forbidden(self):
+        """
+        Test `download_csv` handler for a learner.
+
+        Expected result: The handler responds with a forbidden error and no export is written.
+        """
+        storage = InMemoryStorage()
+        self.block.set_late_submission(self.request)
+
+        with patch("extemporaneous_grading.extemporaneous_grading.get_storage", return_value=storage):
+            response = self.block.download_csv(self.request)
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertFalse(storage.exists("late_submissions_exports"))
+
+    @skipIf(TracerProvider is None, "opentelemetry-sdk is not installed")
+    def test_download_csv_span(self):
+        """
+        Test `download_csv` handler with a tracer.
+
+        Expected result: The span of the handler has the size of the ledger.
+        """
+        tracer = InMemoryTracer()
+        self.block.set_late_submission(self.request)
+
+        with patch("extemporaneous_grading.tracing.tracer", tracer.tracer), patch(
+            "extemporaneous_grading.extemporaneous_grading.get_storage", return_value=InMemoryStorage()
+        ), patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            self.block.download_csv(self.request)
+
+        span = tracer.get_finished_spans()[-1]
+        self.assertEqual(span.name, "extemporaneous_grading.download_csv")
+        self.assertEqual(span.attributes["extemporaneous_grading.ledger_size"], 1)
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"DELTA_EXPORT_LAG_SECONDS": 0}})
+    def test_late_submissions_since(self):
+        """
+        Test `late_submissions_since` handler with the cursor of a previous response.
+
+        Expected result: Only the late submissions added after the cursor.
+        """
+        self.block.set_late_submission(self.request)
+
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            first_response = self.block.late_submissions_since(self.request).json  # pylint: disable=no-member
+            get_ledger(self.block).add({"anonymous_user_id": "another_anonymous_user_id"})
+            second_response = self.block.late_submissions_since(
+                Mock(body=json.dumps({"cursor": first_response["next_cursor"]}).encode("utf-8"), method="POST")
+            ).json  # pylint: disable=no-member
+
+        self.assertEqual([record["username"] for record in first_response["records"]], ["test_user"])
+        self.assertEqual(
+            [record["anonymous_user_id"] for record in second_response["records"]], ["another_anonymous_user_id"]
+        )
+
+    @data({"cursor": "invalid"}, {"since": "yesterday"}, {"limit": "all"}, {"limit": -3})
+    def test_late_submissions_since_invalid(self, request_data: dict):
+        """
+        Test `late_submissions_since` handler with invalid parameters.
+
+        Expected result: The handler responds with a bad request error.
+        """
+        with patch.object(XBlockExtemporaneousGrading, "is_course_team", new_callable=PropertyMock, return_value=True):
+            response = self.block.late_submissions_since(
+                Mock(body=json.dumps(request_data).encode("utf-8"), method="POST")
+            )
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
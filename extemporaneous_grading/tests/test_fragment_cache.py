@@ -0,0 +1,53 @@
+"""
+Tests for the fragment cache of the Extemporaneous Grading XBlock.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from extemporaneous_grading.fragment_cache import (
+    FRAGMENT_CACHE_TIMEOUT,
+    get_fragment_cache,
+    get_fragment_cache_key,
+    get_fragment_timeout,
+    local_fragment_cache,
+)
+
+
+class TestFragmentCache(TestCase):
+    """Tests for the fragment cache."""
+
+    def test_get_fragment_cache(self):
+        """
+        Test the cache is the local memory cache unless a Django cache alias is configured.
+
+        Expected result: the local cache by default and the Django cache of the alias otherwise.
+        """
+        self.assertIs(get_fragment_cache(), local_fragment_cache)
+        with override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"FRAGMENT_CACHE": "default"}}):
+            self.assertIs(get_fragment_cache(), caches["default"])
+
+    def test_get_fragment_cache_key(self):
+        """
+        Test the cache key depends on all its parts.
+
+        Expected result: the same key for the same parts and a different key otherwise.
+        """
+        self.assertEqual(get_fragment_cache_key("block", "v1", True), get_fragment_cache_key("block", "v1", True))
+        self.assertNotEqual(get_fragment_cache_key("block", "v1", True), get_fragment_cache_key("block", "v1", False))
+
+    def test_get_fragment_timeout(self):
+        """
+        Test the timeout of the entries is bounded by their expiration.
+
+        Expected result: the default timeout, the time left or zero for expired entries.
+        """
+        self.assertEqual(get_fragment_timeout(None), FRAGMENT_CACHE_TIMEOUT)
+        self.assertAlmostEqual(get_fragment_timeout(timezone.now() + timedelta(minutes=1)), 60, delta=1)
+        self.assertEqual(get_fragment_timeout(timezone.now() + timedelta(days=1)), FRAGMENT_CACHE_TIMEOUT)
+        self.assertEqual(get_fragment_timeout(timezone.now() - timedelta(minutes=1)), 0)
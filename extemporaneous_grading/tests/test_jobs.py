@@ -0,0 +1,163 @@
+"""
+Tests for the late submissions export jobs.
+"""
+
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase, override_settings
+
+from extemporaneous_grading.jobs import (
+    JOB_FAILED,
+    JOB_PENDING,
+    JOB_SUCCEEDED,
+    CeleryJobExecutor,
+    ThreadPoolJobExecutor,
+    create_job,
+    get_job,
+    get_job_executor,
+    run_course_export_job,
+    run_export_job,
+    update_job,
+)
+from extemporaneous_grading.ledger import StorageLedger
+from extemporaneous_grading.reports import CourseBlock
+from test_utils import StubTask
+
+
+class TestExportJobs(TestCase):
+    """Tests for the export jobs"""
+
+    def setUp(self) -> None:
+        """Set up the test suite."""
+        cache.clear()
+        self.storage = InMemoryStorage(base_url="/media/")
+        for module in ("extemporaneous_grading.jobs", "extemporaneous_grading.ledger"):
+            storage_patcher = patch(f"{module}.get_storage", return_value=self.storage)
+            storage_patcher.start()
+            self.addCleanup(storage_patcher.stop)
+        self.ledger = StorageLedger("course-v1:test+test+test", "usage_id")
+        for index in range(3):
+            self.ledger.append(
+                {
+                    "anonymous_user_id": f"anonymous_{index}",
+                    "username": f"user_{index}",
+                    "email": f"user_{index}@example.com",
+                    "datetime": "2024-01-01T00:00:00+00:00",
+                }
+            )
+
+    def test_create_and_update_job(self):
+        """
+        Test creating a job and updating its progress.
+
+        Expected result: the job is pending and the percent follows the rows written.
+        """
+        job_id = create_job("usage_id", 4)
+
+        self.assertEqual(get_job(job_id)["status"], JOB_PENDING)
+        self.assertEqual(update_job(job_id, rows_written=1)["percent"], 25.0)
+
+    def test_run_export_job_from_ledger(self):
+        """
+        Test running a job that reads the storage ledger.
+
+        Expected result: the CSV is saved and the job succeeded with the download URL.
+        """
+        job_id = create_job("usage_id", 3)
+
+        run_export_job(job_id, "course-v1:test+test+test", "usage_id", "exports/export.csv")
+
+        job = get_job(job_id)
+        self.assertEqual(job["status"], JOB_SUCCEEDED)
+        self.assertEqual(job["rows_written"], 3)
+        self.assertEqual(job["percent"], 100.0)
+        self.assertEqual(job["download_url"], "/media/exports/export.csv")
+        with self.storage.open("exports/export.csv") as file:
+            self.assertEqual(len(file.read().splitlines()), 4)
+
+    def test_run_export_job_failed(self):
+        """
+        Test running a job that fails.
+
+        Expected result: the job is marked as failed with the error.
+        """
+        job_id = create_job("usage_id", 3)
+
+        with patch.object(self.storage, "save", side_effect=OSError("Storage unavailable")):
+            run_export_job(job_id, "course-v1:test+test+test", "usage_id", "exports/export.csv")
+
+        self.assertEqual(get_job(job_id)["status"], JOB_FAILED)
+        self.assertEqual(get_job(job_id)["error"], "Storage unavailable")
+
+    def test_run_course_export_job(self):
+        """
+        Test running a job that exports the late submissions of a course.
+
+        Expected result: the CSV has the records of the blocks with their usage ID and display name.
+        """
+        job_id = create_job("usage_id", None)
+        blocks = [
+            CourseBlock(usage_id, display_name, Mock(course_id="course-v1:test+test+test", late_submissions=[]))
+            for usage_id, display_name in (("usage_id", "Block"), ("empty_usage_id", "Empty Block"))
+        ]
+        for course_block in blocks:
+            course_block.block.scope_ids.usage_id = course_block.usage_id
+
+        with patch("extemporaneous_grading.jobs.get_course_blocks", return_value=blocks):
+            run_course_export_job(job_id, "course-v1:test+test+test", "extemporaneous_grading", "exports/course.csv")
+            repeated_job_id = create_job("usage_id", None)
+            run_course_export_job(
+                repeated_job_id, "course-v1:test+test+test", "extemporaneous_grading", "exports/course.csv"
+            )
+
+        job = get_job(job_id)
+        self.assertEqual(job["status"], JOB_SUCCEEDED)
+        self.assertEqual(job["total_rows"], 3)
+        self.assertEqual(job["rows_written"], 3)
+        _, filenames = self.storage.listdir("exports")
+        self.assertEqual(len(filenames), 1)
+        self.assertTrue(filenames[0].startswith("course_"))
+        self.assertEqual(job["download_url"], f"/media/exports/{filenames[0]}")
+        self.assertEqual(get_job(repeated_job_id)["download_url"], job["download_url"])
+        with self.storage.open(f"exports/{filenames[0]}") as file:
+            lines = file.read().decode("utf8").splitlines()
+        self.assertEqual(lines[0], "usage_id,display_name,anonymous_user_id,username,email,datetime")
+        self.assertTrue(lines[1].startswith("usage_id,Block,anonymous_"))
+
+    def test_celery_executor(self):
+        """
+        Test submitting a job to the Celery executor with a local task.
+
+        Expected result: the task receives the arguments of the job.
+        """
+        task = StubTask()
+        job_id = create_job("usage_id", 3)
+
+        CeleryJobExecutor(task=task).submit(
+            run_export_job, job_id, "course-v1:test+test+test", "usage_id", "exports/export.csv", "csv"
+        )
+
+        self.assertEqual(task.calls[0][0], "extemporaneous_grading.jobs.run_export_job")
+        self.assertEqual(get_job(job_id)["status"], JOB_SUCCEEDED)
+
+    def test_thread_pool_executor(self):
+        """
+        Test submitting a job to the thread pool executor.
+
+        Expected result: the job is run in the pool.
+        """
+        with patch.object(ThreadPoolJobExecutor, "get_pool") as get_pool:
+            ThreadPoolJobExecutor().submit(run_export_job, "job_id")
+
+        get_pool.return_value.submit.assert_called_once_with(run_export_job, "job_id")
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"EXPORT_JOB_EXECUTOR": "thread"}})
+    def test_get_job_executor(self):
+        """
+        Test getting the executor configured in the settings.
+
+        Expected result: the thread pool executor.
+        """
+        self.assertIsInstance(get_job_executor(), ThreadPoolJobExecutor)
@@ -0,0 +1,351 @@
+"""
+Tests for the late submission ledgers.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase, override_settings
+
+from extemporaneous_grading.ledger import (
+    FieldLedger,
+    LateSubmissionLedger,
+    StorageLedger,
+    get_ledger,
+    iter_late_submissions,
+    migrate_late_submissions,
+)
+
+
+def make_record(anonymous_user_id: str, acceptance_datetime: str = "2024-01-01T00:00:00+00:00") -> dict:
+    """Build a late submission record for the given anonymous user ID."""
+    return {
+        "anonymous_user_id": anonymous_user_id,
+        "username": f"user_{anonymous_user_id}",
+        "email": f"{anonymous_user_id}@example.com",
+        "datetime": acceptance_datetime,
+    }
+
+
+def make_timeline() -> list[dict]:
+    """Build records accepted on different days and hours, in order."""
+    return [
+        make_record(f"anonymous_{day}_{hour}", f"2024-01-0{day}T{hour:02d}:00:00+00:00")
+        for day in range(1, 4)
+        for hour in range(0, 24, 8)
+    ]
+
+
+class TestStorageLedger(TestCase):
+    """Tests for StorageLedger"""
+
+    def setUp(self) -> None:
+        """Set up the test suite."""
+        self.ledger = StorageLedger("course-v1:test+test+test", "usage_id", storage=InMemoryStorage())
+
+    def test_append(self):
+        """
+        Test that each record is stored in its own file in the shard of the learner.
+
+        Expected result: the record is stored in the sharded path and can be read back.
+        """
+        record = make_record("anonymous_1")
+
+        self.ledger.append(record)
+
+        path = self.ledger.get_record_path("anonymous_1")
+        self.assertTrue(self.ledger.storage.exists(path))
+        self.assertIn(f"/records/{StorageLedger.get_shard('anonymous_1')}/", path)
+        self.assertEqual(list(self.ledger), [record])
+
+    def test_add_keeps_first_record(self):
+        """
+        Test adding a record for a learner that already has one.
+
+        Expected result: the first record is kept.
+        """
+        first_record = make_record("anonymous_1")
+        second_record = {**first_record, "datetime": "2024-01-02T00:00:00+00:00"}
+
+        self.assertTrue(self.ledger.add(first_record))
+        self.assertFalse(self.ledger.add(second_record))
+
+        self.assertIn("anonymous_1", self.ledger)
+        self.assertNotIn("anonymous_2", self.ledger)
+        self.assertEqual(self.ledger.get("anonymous_1"), first_record)
+        self.assertEqual(len(self.ledger), 1)
+
+    def test_add_many(self):
+        """
+        Test adding several records at once.
+
+        Expected result: the result of each record, in order.
+        """
+        self.ledger.add(make_record("anonymous_1"))
+
+        records = [make_record("anonymous_1"), make_record("anonymous_2"), make_record("anonymous_2")]
+
+        added = self.ledger.add_many(records)
+
+        self.assertEqual(added, [False, True, False])
+        self.assertEqual(len(self.ledger), 2)
+
+    def test_add_race(self):
+        """
+        Test adding a record when a concurrent request wrote it after the existence check.
+
+        Expected result: the alternative file is deleted and only the first record is kept.
+        """
+        first_record = make_record("anonymous_1")
+        self.ledger.append(first_record)
+
+        # The record is not found by the ledger, but the storage finds it when saving.
+        with patch.object(self.ledger.storage, "exists", side_effect=[False, True, False]):
+            created = self.ledger.add({**first_record, "datetime": "2024-01-02T00:00:00+00:00"})
+
+        self.assertFalse(created)
+        self.assertEqual(list(self.ledger), [first_record])
+
+    def test_iter_and_len(self):
+        """
+        Test iterating over a ledger with records in several shards.
+
+        Expected result: all the records are returned.
+        """
+        records = [make_record(f"anonymous_{index}") for index in range(20)]
+
+        self.ledger.extend(records)
+
+        self.assertEqual(len(self.ledger), 20)
+        self.assertCountEqual(list(self.ledger), records)
+
+    def test_empty_ledger(self):
+        """
+        Test reading a ledger without records.
+
+        Expected result: no records.
+        """
+        self.assertEqual(list(self.ledger), [])
+        self.assertEqual(len(self.ledger), 0)
+
+
+    def test_get_records_since(self):
+        """
+        Test getting the records after a cursor in pages.
+
+        Expected result: the records in order of acceptance, without repetitions.
+        """
+        timeline = make_timeline()
+        self.ledger.extend(reversed(timeline))
+
+        first_page, cursor = self.ledger.get_records_since(limit=4)
+        second_page, cursor = self.ledger.get_records_since(cursor, limit=4)
+        third_page, cursor = self.ledger.get_records_since(cursor, limit=4)
+        empty_page, cursor = self.ledger.get_records_since(cursor, limit=4)
+        self.ledger.add(make_record("anonymous_late", "2024-01-05T00:00:00+00:00"))
+        delta, _ = self.ledger.get_records_since(cursor)
+
+        self.assertEqual(first_page + second_page + third_page, timeline)
+        self.assertEqual(empty_page, [])
+        self.assertEqual(delta, [make_record("anonymous_late", "2024-01-05T00:00:00+00:00")])
+
+    def test_get_records_since_datetime(self):
+        """
+        Test getting the records accepted after a datetime.
+
+        Expected result: the records accepted after the datetime.
+        """
+        timeline = make_timeline()
+        self.ledger.extend(timeline)
+
+        records, _ = self.ledger.get_records_since(since=datetime(2024, 1, 3, 8, tzinfo=timezone.utc))
+
+        self.assertEqual(records, timeline[-1:])
+
+    def test_get_records_since_invalid_cursor(self):
+        """
+        Test getting the records with an invalid cursor.
+
+        Expected result: a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            self.ledger.get_records_since("not a cursor")
+
+    def test_get_records_since_invalid_limit(self):
+        """
+        Test getting the records with a limit under one.
+
+        Expected result: a ValueError.
+        """
+        for limit in (0, -3):
+            with self.subTest(limit=limit), self.assertRaises(ValueError):
+                self.ledger.get_records_since(limit=limit)
+
+    def test_get_records_since_lag(self):
+        """
+        Test getting the records while the latest acceptances may still be written.
+
+        Expected result: the records accepted within the lag are returned only
+        by a later call with the same cursor.
+        """
+        now = datetime.now(timezone.utc)
+        old_record = make_record("anonymous_old", (now - timedelta(minutes=1)).isoformat())
+        recent_record = make_record("anonymous_recent", now.isoformat())
+        self.ledger.extend([old_record, recent_record])
+
+        records, cursor = self.ledger.get_records_since()
+        with override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"DELTA_EXPORT_LAG_SECONDS": 0}}):
+            later_records, _ = self.ledger.get_records_since(cursor)
+
+        self.assertEqual(records, [old_record])
+        self.assertEqual(later_records, [recent_record])
+
+
+class TestFieldLedger(TestCase):
+    """Tests for FieldLedger"""
+
+    def test_add_keeps_first_record(self):
+        """
+        Test adding records for learners in the legacy field.
+
+        Expected result: only the first record of each learner is appended.
+        """
+        block = Mock(late_submissions=[make_record("anonymous_1")])
+        ledger = FieldLedger(block)
+
+        self.assertFalse(ledger.add({**make_record("anonymous_1"), "username": "other"}))
+        self.assertTrue(ledger.add(make_record("anonymous_2")))
+        self.assertFalse(ledger.add(make_record("anonymous_2")))
+
+        self.assertEqual(block.late_submissions, [make_record("anonymous_1"), make_record("anonymous_2")])
+
+
+    def test_index_shared_by_block(self):
+        """
+        Test the index of the legacy field across the ledgers of a block.
+
+        Expected result: the index is kept on the block, extended with the
+        records appended elsewhere and rebuilt when the field is replaced.
+        """
+        block = Mock(late_submissions=[make_record("anonymous_1")])
+        index = FieldLedger(block).index
+
+        block.late_submissions.append(make_record("anonymous_2"))
+        self.assertIs(FieldLedger(block).index, index)
+        self.assertIn("anonymous_2", FieldLedger(block))
+
+        block.late_submissions = [make_record("anonymous_3")]
+        self.assertEqual(list(FieldLedger(block).index), ["anonymous_3"])
+
+    def test_get_records_since(self):
+        """
+        Test getting the records after a cursor or a datetime in the legacy field.
+
+        Expected result: the records after the position of the cursor or the datetime.
+        """
+        timeline = make_timeline()
+        ledger = FieldLedger(Mock(late_submissions=list(timeline)))
+
+        first_page, cursor = ledger.get_records_since(limit=5)
+        second_page, _ = ledger.get_records_since(cursor)
+        since_records, _ = ledger.get_records_since(since=datetime(2024, 1, 3, 8, tzinfo=timezone.utc))
+
+        self.assertEqual(first_page, timeline[:5])
+        self.assertEqual(second_page, timeline[5:])
+        self.assertEqual(since_records, timeline[-1:])
+
+    def test_get_records_since_invalid_limit(self):
+        """
+        Test getting the records of the legacy field with a limit under one.
+
+        Expected result: a ValueError.
+        """
+        ledger = FieldLedger(Mock(late_submissions=make_timeline()))
+
+        for limit in (0, -3):
+            with self.subTest(limit=limit), self.assertRaises(ValueError):
+                ledger.get_records_since(None, None, limit)
+
+    def test_default_get_records_since(self):
+        """
+        Test the default implementation of `get_records_since` of the ledgers.
+
+        Expected result: the records in order of acceptance after the cursor or
+        the datetime, regardless of the order they were stored in.
+        """
+        timeline = make_timeline()
+        ledger = FieldLedger(Mock(late_submissions=list(reversed(timeline))))
+
+        first_page, cursor = LateSubmissionLedger.get_records_since(ledger, limit=5)
+        second_page, cursor = LateSubmissionLedger.get_records_since(ledger, cursor)
+        empty_page, _ = LateSubmissionLedger.get_records_since(ledger, cursor)
+        since_records, _ = LateSubmissionLedger.get_records_since(
+            ledger, since=datetime(2024, 1, 3, 8, tzinfo=timezone.utc)
+        )
+
+        self.assertEqual(first_page + second_page, timeline)
+        self.assertEqual(len(first_page), 5)
+        self.assertEqual(empty_page, [])
+        self.assertEqual(since_records, timeline[-1:])
+        with self.assertRaises(ValueError):
+            LateSubmissionLedger.get_records_since(ledger, "not a cursor")
+
+
+class TestLedgerHelpers(TestCase):
+    """Tests for the ledger helpers"""
+
+    def setUp(self) -> None:
+        """Set up the test suite."""
+        self.block = Mock(course_id="course-v1:test+test+test", late_submissions=[make_record("legacy")])
+        self.block.scope_ids.usage_id = "usage_id"
+        storage_patcher = patch("extemporaneous_grading.ledger.get_storage", return_value=InMemoryStorage())
+        storage_patcher.start()
+        self.addCleanup(storage_patcher.stop)
+
+    def test_get_ledger_default(self):
+        """
+        Test getting the ledger without the `LEDGER_BACKEND` setting.
+
+        Expected result: a FieldLedger reading the legacy field.
+        """
+        ledger = get_ledger(self.block)
+
+        self.assertIsInstance(ledger, FieldLedger)
+        self.assertEqual(list(iter_late_submissions(self.block)), [make_record("legacy")])
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"LEDGER_BACKEND": "storage"}})
+    def test_iter_late_submissions(self):
+        """
+        Test the compatibility reader with legacy and ledger records.
+
+        Expected result: the legacy records followed by the ledger records.
+        """
+        get_ledger(self.block).append(make_record("new"))
+
+        self.assertEqual(list(iter_late_submissions(self.block)), [make_record("legacy"), make_record("new")])
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"LEDGER_BACKEND": "storage"}})
+    def test_iter_late_submissions_duplicates(self):
+        """
+        Test the compatibility reader with duplicated legacy records.
+
+        Expected result: a single record per learner.
+        """
+        self.block.late_submissions.append({**make_record("legacy"), "username": "duplicated"})
+        get_ledger(self.block).append(make_record("legacy"))
+
+        self.assertEqual(list(iter_late_submissions(self.block)), [make_record("legacy")])
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"LEDGER_BACKEND": "storage"}})
+    def test_migrate_late_submissions(self):
+        """
+        Test migrating the legacy field to the ledger.
+
+        Expected result: the records are moved to the ledger and the field is emptied.
+        """
+        migrated = migrate_late_submissions(self.block)
+
+        self.assertEqual(migrated, 1)
+        self.assertEqual(self.block.late_submissions, [])
+        self.assertEqual(list(iter_late_submissions(self.block)), [make_record("legacy")])
@@ -0,0 +1,139 @@
+"""
+Tests for the metrics of the Extemporaneous Grading XBlock.
+"""
+
+from __future__ import annotations
+
+import socket
+from unittest.mock import Mock
+
+from django.test import TestCase, override_settings
+
+from extemporaneous_grading.metrics import (
+    NOOP_METRICS_SINK,
+    InMemoryMetricsSink,
+    StatsdMetricsSink,
+    get_metrics_sink,
+    iter_counted_rows,
+)
+
+MEMORY_METRICS = {"extemporaneous_grading": {"METRICS_SINK": "memory"}}
+
+
+class TestMetrics(TestCase):
+    """Tests for the metrics sinks."""
+
+    def test_default_sink(self):
+        """
+        Test the sink without the `METRICS_SINK` setting.
+
+        Expected result: the no-op sink, whose timer does not measure anything.
+        """
+        metrics = get_metrics_sink()
+
+        self.assertIs(metrics, NOOP_METRICS_SINK)
+        self.assertFalse(metrics.enabled)
+        self.assertIs(metrics.timer("student_view"), metrics.timer("assets.load"))
+
+    @override_settings(XBLOCK_SETTINGS=MEMORY_METRICS)
+    def test_memory_sink(self):
+        """
+        Test the in-memory sink.
+
+        Expected result: the same sink in every call, with the timings, the
+        summed counters and the last value of the gauges.
+        """
+        metrics = get_metrics_sink()
+        metrics.reset()
+
+        with metrics.timer("student_view"):
+            pass
+        metrics.increment("late_submission.accepted")
+        metrics.increment("late_submission.accepted", 2)
+        metrics.gauge("ledger.size", 1)
+        metrics.gauge("ledger.size", 3)
+
+        self.assertIsInstance(metrics, InMemoryMetricsSink)
+        self.assertIs(get_metrics_sink(), metrics)
+        self.assertEqual(len(metrics.timings["student_view"]), 1)
+        self.assertEqual(metrics.counters["late_submission.accepted"], 3)
+        self.assertEqual(metrics.gauges, {"ledger.size": 3})
+
+    def test_statsd_sink(self):
+        """
+        Test the statsd sink with a local UDP server.
+
+        Expected result: a datagram in the statsd format for each metric.
+        """
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(server.close)
+        server.bind(("127.0.0.1", 0))
+        server.settimeout(1)
+        metrics = StatsdMetricsSink("127.0.0.1", server.getsockname()[1], prefix="test")
+
+        metrics.increment("exports.csv")
+        metrics.gauge("ledger.size", 10)
+        metrics.timing("student_view", 1.5)
+
+        received = [server.recv(1024) for _ in range(3)]
+        self.assertEqual(received, [b"test.exports.csv:1|c", b"test.ledger.size:10|g", b"test.student_view:1.5|ms"])
+
+    def test_statsd_sink_ignores_errors(self):
+        """
+        Test the statsd sink when the datagram cannot be sent.
+
+        Expected result: the error is ignored.
+        """
+        metrics = StatsdMetricsSink()
+        metrics.socket.close()
+        metrics.socket = Mock(sendto=Mock(side_effect=OSError))
+
+        metrics.increment("exports.csv")
+
+        metrics.socket.sendto.assert_called_once()
+
+    @override_settings(
+        XBLOCK_SETTINGS={
+            "extemporaneous_grading": {
+                "METRICS_SINK": "extemporaneous_grading.metrics.StatsdMetricsSink",
+                "METRICS_OPTIONS": {"host": "127.0.0.1", "port": 8126},
+            }
+        }
+    )
+    def test_sink_dotted_path(self):
+        """
+        Test the sink configured with a dotted path and options.
+
+        Expected result: the sink class created with the options.
+        """
+        metrics = get_metrics_sink()
+
+        self.assertIsInstance(metrics, StatsdMetricsSink)
+        self.assertEqual(metrics.address, ("127.0.0.1", 8126))
+
+    @override_settings(XBLOCK_SETTINGS=MEMORY_METRICS)
+    def test_iter_counted_rows(self):
+        """
+        Test counting the rows of an export of the whole ledger.
+
+        Expected result: the rows are counted once they are all read.
+        """
+        metrics = get_metrics_sink()
+        metrics.reset()
+
+        rows = iter_counted_rows(iter([{"a": 1}, {"a": 2}]), ledger_size=True)
+        self.assertEqual(metrics.counters["exports.rows"], 0)
+
+        self.assertEqual(list(rows), [{"a": 1}, {"a": 2}])
+        self.assertEqual(metrics.counters["exports.rows"], 2)
+        self.assertEqual(metrics.gauges["ledger.size"], 2)
+
+    def test_iter_counted_rows_disabled(self):
+        """
+        Test counting the rows with the metrics disabled.
+
+        Expected result: the records are returned as they are.
+        """
+        records = [{"a": 1}]
+
+        self.assertIs(iter_counted_rows(records), records)
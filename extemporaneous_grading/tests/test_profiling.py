@@ -0,0 +1,120 @@
+"""
+Tests for the on-demand profiling of the Extemporaneous Grading XBlock.
+"""
+
+from __future__ import annotations
+
+import marshal
+from unittest.mock import Mock, patch
+
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase, override_settings
+
+from extemporaneous_grading.profiling import (
+    PROFILE_REQUEST_PARAM,
+    PROFILES_DIRECTORY,
+    get_profile_path,
+    is_profile_requested,
+    profile,
+    should_profile,
+)
+
+
+class TestProfiling(TestCase):
+    """Tests for the profiling of the block."""
+
+    def setUp(self) -> None:
+        """Set up the profiling storage."""
+        self.storage = InMemoryStorage()
+        storage_patcher = patch("extemporaneous_grading.profiling.get_storage", return_value=self.storage)
+        storage_patcher.start()
+        self.addCleanup(storage_patcher.stop)
+
+    def test_should_profile_disabled(self):
+        """
+        Test sampling the calls without the `PROFILING_SAMPLE_RATE` setting.
+
+        Expected result: only the forced calls are profiled.
+        """
+        self.assertFalse(should_profile())
+        self.assertTrue(should_profile(forced=True))
+
+    @override_settings(XBLOCK_SETTINGS={"extemporaneous_grading": {"PROFILING_SAMPLE_RATE": 0.5}})
+    def test_should_profile_sample_rate(self):
+        """
+        Test sampling the calls with the `PROFILING_SAMPLE_RATE` setting.
+
+        Expected result: the calls are profiled when the random draw is under the rate.
+        """
+        with patch("extemporaneous_grading.profiling.random.random", side_effect=[0.4, 0.6]):
+            self.assertTrue(should_profile())
+            self.assertFalse(should_profile())
+
+    def test_is_profile_requested(self):
+        """
+        Test checking the query parameter of the current request.
+
+        Expected result: a profile is requested only if the parameter is set.
+        """
+        requests = [Mock(GET={PROFILE_REQUEST_PARAM: "1"}), Mock(GET={}), None]
+
+        with patch("extemporaneous_grading.profiling.get_current_request", side_effect=requests):
+            self.assertEqual([is_profile_requested() for _ in requests], [True, False, False])
+
+    def test_profile(self):
+        """
+        Test profiling a block of code.
+
+        Expected result: the profile is saved in the `pstats` format under the
+        course, usage ID, operation and phase.
+        """
+        with profile("course", "usage", "student_view", "due_datetime"):
+            sorted(range(100))
+
+        directory = f"{PROFILES_DIRECTORY}/course/usage/student_view"
+        _, filenames = self.storage.listdir(directory)
+        self.assertEqual(len(filenames), 1)
+        self.assertIn("_due_datetime_", filenames[0])
+        with self.storage.open(f"{directory}/{filenames[0]}") as file:
+            stats = marshal.loads(file.read())
+        self.assertIn("<built-in method builtins.sorted>", {function_name for _, _, function_name in stats})
+
+    def test_profile_with_active_profiler(self):
+        """
+        Test profiling when another profiler is active.
+
+        Expected result: the block runs without being profiled.
+        """
+        profiler = Mock(enable=Mock(side_effect=ValueError))
+        calls = []
+
+        with patch("extemporaneous_grading.profiling.cProfile.Profile", return_value=profiler):
+            with profile("course", "usage", "student_view", "due_datetime"):
+                calls.append(True)
+
+        self.assertEqual(calls, [True])
+        profiler.disable.assert_not_called()
+
+    def test_profile_save_error(self):
+        """
+        Test profiling when the profile cannot be saved.
+
+        Expected result: the error is logged and not raised.
+        """
+        with patch.object(self.storage, "save", side_effect=OSError), self.assertLogs(
+            "extemporaneous_grading.profiling", "ERROR"
+        ):
+            with profile("course", "usage", "download_csv", "late_due_datetime"):
+                pass
+
+    def test_get_profile_path(self):
+        """
+        Test the path of a profile.
+
+        Expected result: two profiles of the same operation get different paths.
+        """
+        path = get_profile_path("course", "usage", "download_csv", "late_due_datetime")
+
+        self.assertTrue(path.startswith(f"{PROFILES_DIRECTORY}/course/usage/download_csv/"))
+        self.assertTrue(path.endswith(".prof"))
+        self.assertNotEqual(path, get_profile_path("course", "usage", "download_csv", "late_due_datetime"))
@@ -0,0 +1,92 @@
+"""
+Tests for the course-wide late submissions reports.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import Mock, patch
+
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase
+
+from extemporaneous_grading.ledger import StorageLedger
+from extemporaneous_grading.reports import (
+    CourseBlock,
+    count_course_late_submissions,
+    get_course_report_version,
+    iter_course_late_submissions,
+)
+
+COURSE_ID = "course-v1:test+test+test"
+
+
+def make_course_block(usage_id: str, display_name: str, late_submissions: list | None = None) -> CourseBlock:
+    """Build a course block whose block has the given legacy late submissions."""
+    block = Mock(course_id=COURSE_ID, scope_ids=Mock(usage_id=usage_id), late_submissions=late_submissions or [])
+    return CourseBlock(usage_id, display_name, block)
+
+
+class TestCourseReports(TestCase):
+    """Tests for the course reports"""
+
+    def setUp(self) -> None:
+        """Set up the test suite."""
+        storage_patcher = patch("extemporaneous_grading.ledger.get_storage", return_value=InMemoryStorage())
+        storage_patcher.start()
+        self.addCleanup(storage_patcher.stop)
+        self.blocks = [make_course_block(f"usage_{index}", f"Block {index}") for index in range(5)]
+        for index, block in enumerate(self.blocks):
+            ledger = StorageLedger(COURSE_ID, block.usage_id)
+            for learner in range(index):
+                ledger.append({"anonymous_user_id": f"anonymous_{learner}", "username": f"user_{learner}"})
+
+    def test_count_course_late_submissions(self):
+        """
+        Test counting the records of all the blocks.
+
+        Expected result: the sum of the records of the ledgers.
+        """
+        self.assertEqual(count_course_late_submissions(self.blocks), 10)
+
+    def test_iter_course_late_submissions(self):
+        """
+        Test merging the ledgers of the blocks in batches.
+
+        Expected result: the records in the order of the blocks, with their block information.
+        """
+        records = list(iter_course_late_submissions(self.blocks, batch_size=2))
+
+        self.assertEqual(len(records), 10)
+        self.assertEqual([record["usage_id"] for record in records[:3]], ["usage_1", "usage_2", "usage_2"])
+        self.assertEqual(records[0]["display_name"], "Block 1")
+        self.assertEqual(records[0]["anonymous_user_id"], "anonymous_0")
+
+    def test_storage_ledger_only(self):
+        """
+        Test the report of blocks with records in the legacy field.
+
+        Expected result: only the records of the storage ledger, since the
+        blocks of the modulestore are not bound to the field data of the LMS.
+        """
+        legacy_records = [{"anonymous_user_id": "legacy", "username": "legacy_user"}]
+        blocks = [make_course_block("usage_1", "Block 1", legacy_records)]
+        version = get_course_report_version(blocks)
+
+        records = list(iter_course_late_submissions(blocks))
+        blocks[0].block.late_submissions.append({"anonymous_user_id": "other", "username": "other_user"})
+
+        self.assertEqual(count_course_late_submissions(blocks), 1)
+        self.assertEqual([record["anonymous_user_id"] for record in records], ["anonymous_0"])
+        self.assertEqual(get_course_report_version(blocks), version)
+
+    def test_get_course_report_version(self):
+        """
+        Test the version of the report of the blocks.
+
+        Expected result: the version changes when a late submission is added to any block.
+        """
+        version = get_course_report_version(self.blocks)
+
+        self.assertEqual(get_course_report_version(self.blocks), version)
+        StorageLedger(COURSE_ID, "usage_0").append({"anonymous_user_id": "anonymous_0"})
+        self.assertNotEqual(get_course_report_version(self.blocks), version)
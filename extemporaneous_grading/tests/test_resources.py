@@ -0,0 +1,154 @@
+"""
+Tests for the static assets of the Extemporaneous Grading XBlock.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import Mock, patch
+
+from ddt import data, ddt, unpack
+from django.test import TestCase
+from django.utils import translation
+from django.utils.translation import trans_real
+
+from extemporaneous_grading.resources import (
+    STATIC_ASSETS,
+    get_asset_digest,
+    get_asset_uri,
+    get_resource,
+    get_template,
+    get_translations_index,
+    get_translations_js,
+    open_asset,
+    render_template,
+)
+
+
+@ddt
+class TestResources(TestCase):
+    """Tests for the static assets cache."""
+
+    def test_get_resource_reads_once(self):
+        """
+        Test the resources are read once per process.
+
+        Expected result: the same string is returned without reading the package again.
+        """
+        path = STATIC_ASSETS[0]
+        content = get_resource(path)
+
+        with patch("extemporaneous_grading.resources.get_package_root") as get_package_root:
+            self.assertIs(get_resource(path), content)
+
+        get_package_root.assert_not_called()
+
+    def test_open_asset(self):
+        """
+        Test opening a static asset by its fingerprinted URI.
+
+        Expected result: the content of the asset.
+        """
+        path = STATIC_ASSETS[0]
+
+        asset = open_asset(get_asset_uri(path))
+
+        self.assertEqual(asset.read().decode("utf8"), get_resource(path))
+
+    def test_open_asset_rejects_unknown_uris(self):
+        """
+        Test only the static assets with their current fingerprint are served.
+
+        Expected result: None for other resources and outdated fingerprints.
+        """
+        path = STATIC_ASSETS[0]
+
+        self.assertIsNone(open_asset("public/js/translations/en/text.js"))
+        self.assertIsNone(open_asset(f"public/assets/{get_asset_digest(path)}/static/html/children.html"))
+        self.assertIsNone(open_asset(f"public/assets/outdated/{path}"))
+
+    def test_get_translations_index(self):
+        """
+        Test the translation files are indexed by locale.
+
+        Expected result: the English translation file is indexed.
+        """
+        self.assertEqual(get_translations_index()["en"], "public/js/translations/en/text.js")
+
+    @data(
+        ("en", "public/js/translations/en/text.js"),
+        ("es-419", "public/js/translations/es_419/text.js"),
+        ("es-ar", "public/js/translations/es/text.js"),
+        ("fr", "public/js/translations/en/text.js"),
+    )
+    @unpack
+    def test_get_translations_js(self, language: str, expected_path: str):
+        """
+        Test resolving the translation file of a language.
+
+        Expected result: the file of the full locale, then the language code, then English.
+        """
+        index = {
+            "en": "public/js/translations/en/text.js",
+            "es": "public/js/translations/es/text.js",
+            "es_419": "public/js/translations/es_419/text.js",
+        }
+        get_translations_js.cache_clear()
+        self.addCleanup(get_translations_js.cache_clear)
+
+        with patch("extemporaneous_grading.resources.get_translations_index", return_value=index):
+            self.assertEqual(get_translations_js(language), expected_path)
+
+    def test_get_template_compiles_once(self):
+        """
+        Test the templates are compiled once per process.
+
+        Expected result: the same compiled template is returned.
+        """
+        path = "static/html/late_due_datetime.html"
+
+        self.assertIs(get_template(path), get_template(path))
+
+    def test_render_template(self):
+        """
+        Test rendering a compiled template with a context.
+
+        Expected result: the template rendered with the values of the context.
+        """
+        block = Mock(late_due_date_explanation_text="Too late", is_course_team=False)
+
+        content = render_template("static/html/late_due_datetime.html", {"block": block, "next_transition": ""})
+
+        self.assertIn("Too late", content)
+        self.assertNotIn("download_csv", content)
+
+    def test_render_template_keeps_global_translations(self):
+        """
+        Test rendering a compiled template several times with the catalog of a block.
+
+        Expected result: every render uses the catalog of the block, and the
+        translations of the process are left unchanged.
+        """
+        i18n_service = trans_real.DjangoTranslation("es")
+        i18n_service._catalog = trans_real.TranslationCatalog()  # pylint: disable=protected-access
+        i18n_service._catalog.update(  # pylint: disable=protected-access
+            Mock(
+                plural=i18n_service.plural,
+                _catalog={"Accept Late Submission": "Aceptar entrega tardía", "Yes": "Sí, del bloque"},
+            )
+        )
+        i18n_service._fallback = None  # pylint: disable=protected-access
+        block = Mock(due_date_explanation_text="Due", is_course_team=False)
+
+        with translation.override("es"):
+            expected_yes = translation.gettext("Yes")
+            contents = [
+                render_template(
+                    "static/html/due_datetime.html", {"block": block, "next_transition": ""}, i18n_service
+                )
+                for _ in range(3)
+            ]
+            rendered_yes = translation.gettext("Yes")
+
+        self.assertTrue(all("Aceptar entrega tardía" in content for content in contents))
+        self.assertEqual(rendered_yes, expected_yes)
+        self.assertNotEqual(rendered_yes, "Sí, del bloque")
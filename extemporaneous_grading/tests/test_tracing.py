@@ -0,0 +1,54 @@
+"""
+Tests for the tracing of the Extemporaneous Grading XBlock.
+"""
+
+from __future__ import annotations
+
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from extemporaneous_grading.tracing import NOOP_SPAN, start_span
+from test_utils import InMemoryTracer, TracerProvider
+
+
+class TestTracing(TestCase):
+    """Tests for the spans of the block."""
+
+    def test_start_span_without_opentelemetry(self):
+        """
+        Test starting a span when `opentelemetry-api` is not installed.
+
+        Expected result: a no-op span that does not record its attributes.
+        """
+        with patch("extemporaneous_grading.tracing.tracer", None):
+            with start_span("student_view", {"xblock.usage_id": "usage"}) as span:
+                span.set_attribute("extemporaneous_grading.phase", "children")
+
+        self.assertIs(span, NOOP_SPAN)
+        self.assertFalse(span.is_recording())
+
+    @skipIf(TracerProvider is None, "opentelemetry-sdk is not installed")
+    def test_start_span(self):
+        """
+        Test starting nested spans.
+
+        Expected result: the spans are prefixed with the name of the tracer, have
+        their attributes and the inner span is a child of the outer one.
+        """
+        tracer = InMemoryTracer()
+
+        with patch("extemporaneous_grading.tracing.tracer", tracer.tracer):
+            with start_span("student_view", {"xblock.usage_id": "usage"}) as span:
+                span.set_attribute("extemporaneous_grading.phase", "children")
+                with start_span("render_template"):
+                    pass
+
+        inner, outer = tracer.get_finished_spans()
+        self.assertEqual(outer.name, "extemporaneous_grading.student_view")
+        self.assertEqual(
+            dict(outer.attributes), {"xblock.usage_id": "usage", "extemporaneous_grading.phase": "children"}
+        )
+        self.assertEqual(inner.name, "extemporaneous_grading.render_template")
+        self.assertEqual(inner.parent.span_id, outer.context.span_id)
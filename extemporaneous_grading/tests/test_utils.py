@@ -0,0 +1,50 @@
+"""
+Tests for the utilities of the Extemporaneous Grading XBlock.
+"""
+
+from unittest import skipIf
+from unittest.mock import Mock, patch
+
+from django.test import TestCase
+
+from extemporaneous_grading.utils import RequestCache, get_request_cached
+
+
+class TestGetRequestCached(TestCase):
+    """Tests for get_request_cached"""
+
+    @skipIf(RequestCache is None, "edx-django-utils is not installed")
+    def test_request_cache(self):
+        """
+        Test caching a value in the request cache of `edx-django-utils`.
+
+        Expected result: the value is computed once per request, for any owner,
+        and computed again after the request cache is cleared.
+        """
+        self.addCleanup(RequestCache.clear_all_namespaces)
+        compute = Mock(side_effect=["first", "second"])
+
+        values = [get_request_cached(Mock(), "key", compute) for _ in range(2)]
+        # The middleware of the platform clears the request cache at the end of each request.
+        RequestCache.clear_all_namespaces()
+        next_value = get_request_cached(Mock(), "key", compute)
+
+        self.assertEqual(values, ["first", "first"])
+        self.assertEqual(next_value, "second")
+        self.assertEqual(compute.call_count, 2)
+
+    def test_owner_cache(self):
+        """
+        Test caching a value on the owner when the request cache is not available.
+
+        Expected result: the value is computed once per owner.
+        """
+        owner, another_owner = Mock(), Mock()
+        compute = Mock(side_effect=["first", "second"])
+
+        with patch("extemporaneous_grading.utils.RequestCache", None):
+            values = [get_request_cached(owner, "key", compute) for _ in range(2)]
+            another_value = get_request_cached(another_owner, "key", compute)
+
+        self.assertEqual(values, ["first", "first"])
+        self.assertEqual(another_value, "second")
@@ -2,9 +2,88 @@
 Utilities for Extemporaneous Grading XBlock.
 """
 
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.files.storage import Storage, default_storage
+from django.utils.module_loading import import_string
+
+from extemporaneous_grading.constants import XBLOCK_SETTINGS_KEY
+
+try:
+    from edx_django_utils.cache import RequestCache
+except ImportError:  # pragma: no cover
+    RequestCache = None
+
 
 def _(text):
     """
     Make '_' a no-op so we can scrape strings.
     """
     return text
+
+
+def get_xblock_settings() -> dict:
+    """
+    Get the settings of this XBlock.
+
+    The settings are read from the `XBLOCK_SETTINGS` Django setting under the
+    `extemporaneous_grading` key.
+
+    Returns:
+        dict: The XBlock settings.
+    """
+    return getattr(settings, "XBLOCK_SETTINGS", {}).get(XBLOCK_SETTINGS_KEY, {})
+
+
+def get_storage(setting_name: str) -> Storage:
+    """
+    Get the storage configured in the given XBlock setting.
+
+    The setting follows the format of the Django `STORAGES` setting, e.g.
+    `{"BACKEND": "storages.backends.s3boto3.S3Boto3Storage", "OPTIONS": {...}}`.
+    If the setting is not defined, the default storage is used.
+
+    Args:
+        setting_name (str): The name of the XBlock setting.
+
+    Returns:
+        Storage: The storage instance.
+    """
+    storage_settings = get_xblock_settings().get(setting_name)
+    if not storage_settings:
+        return default_storage
+    storage_class = import_string(storage_settings["BACKEND"])
+    return storage_class(**storage_settings.get("OPTIONS", {}))
+
+
+def get_request_cached(owner: object, key: str, compute: Callable[[], Any]) -> Any:
+    """
+    Get a value computed once per request.
+
+    The value is kept in the request cache of `edx-django-utils`, which is
+    cleared at the end of each request. Where it is not available, the value is
+    kept on the `owner` object instead, e.g. the block, which lives for a
+    single request.
+
+    Args:
+        owner (object): The object that keeps the value if there is no request cache.
+        key (str): The key of the value.
+        compute (Callable[[], Any]): The function that computes the value.
+
+    Returns:
+        Any: The value.
+    """
+    if RequestCache is not None:
+        request_cache = RequestCache(XBLOCK_SETTINGS_KEY)
+        cached_response = request_cache.get_cached_response(key)
+        if cached_response.is_found:
+            return cached_response.value
+        value = compute()
+        request_cache.set(key, value)
+        return value
+
+    values = owner.__dict__.setdefault("_request_cache", {})
+    if key not in values:
+        values[key] = compute()
+    return values[key]
@@ -160,6 +160,10 @@ setup(
     ),
     include_package_data=True,
     install_requires=load_requirements("requirements/base.in"),
+    extras_require={
+        "parquet": ["pyarrow"],
+        "tracing": ["opentelemetry-api"],
+    },
     python_requires=">=3.8",
     license="AGPL 3.0",
     zip_safe=False,
@@ -8,3 +8,59 @@ in multiple test modules (i.e. factoryboy factories, base test classes).
 
 So this package is the place to put them.
 """
+
+from extemporaneous_grading.deadlines import DeadlineEvents
+from extemporaneous_grading.jobs import run_job
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+except ImportError:  # pragma: no cover
+    TracerProvider = None
+
+
+class StubTask:
+    """
+    Local stand-in of a Celery task that runs the export jobs synchronously.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def delay(self, *args):
+        """
+        Run the export job right away.
+        """
+        self.calls.append(args)
+        run_job(*args)
+
+
+class ImmediateDeadlineEvents(DeadlineEvents):
+    """
+    Local stand-in of a deadline events backend that notifies the transition right away.
+    """
+
+    def __iter__(self):
+        """
+        Send the transition event without waiting.
+        """
+        yield self.transition_event()
+
+
+class InMemoryTracer:
+    """
+    OpenTelemetry tracer that keeps the finished spans in memory. Requires `opentelemetry-sdk`.
+    """
+
+    def __init__(self):
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        self.tracer = provider.get_tracer("extemporaneous_grading")
+
+    def get_finished_spans(self) -> list:
+        """
+        Get the finished spans in the order they ended.
+        """
+        return list(self.exporter.get_finished_spans())